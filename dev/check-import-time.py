@@ -0,0 +1,83 @@
+# ! expected PWD is the repo root
+"""
+Check that importing the python package stays fast.
+
+Parse the output of ``python -X importtime`` and fail if:
+- a heavy module that must be lazy-loaded is imported with the package.
+- the cumulative import time of the package is above the given budget.
+
+usage: python dev/check-import-time.py [--budget-ms 1000]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PACKAGE = "streamlit_colourplotting"
+
+# modules that must only be imported on first use
+LAZY_MODULES = ["colour", "matplotlib", "cv2", "imageio", "psutil"]
+
+
+def measure_import_times(package: str) -> dict[str, tuple[int, int]]:
+    """
+    Returns:
+        dict["module name", ("self time in us", "cumulative time in us")]
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(Path("src").absolute())
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {package}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_time, cumulative_time, name = line[len("import time:") :].split("|")
+        times[name.strip()] = (int(self_time), int(cumulative_time))
+    return times
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=1000.0,
+        help="maximum cumulative import time of the package, in milliseconds.",
+    )
+    args = parser.parse_args(argv)
+
+    times = measure_import_times(PACKAGE)
+    failed = False
+
+    for lazy_module in LAZY_MODULES:
+        if lazy_module in times:
+            print(f"FAIL: '{lazy_module}' is imported with '{PACKAGE}'")
+            failed = True
+
+    package_time = times[PACKAGE][1] / 1000
+    own_time = sum(
+        self_time / 1000
+        for name, (self_time, _) in times.items()
+        if name.startswith(PACKAGE)
+    )
+    print(
+        f"'{PACKAGE}' import took {package_time:.1f}ms "
+        f"({own_time:.1f}ms in the package itself), budget is {args.budget_ms}ms"
+    )
+    if package_time > args.budget_ms:
+        print("FAIL: import time is above budget")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
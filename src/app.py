@@ -1,21 +1,18 @@
 import logging
 import os
 import sys
+import warnings
 from pathlib import Path
 
 # before colour first import
 os.environ["COLOUR_SCIENCE__DEFAULT_FLOAT_DTYPE"] = "float32"
 # must be executed before cv2 first import
 os.environ["OPENCV_IO_ENABLE_OPENEXR"] = "1"
-# to enable on cloud but to disable locally
-# os.environ["STCP_ENABLE_SIZE_LIMITATIONS"] = "1"
 
 THIS_DIR = Path(__file__).parent
 if THIS_DIR not in sys.path:
     sys.path.append(str(THIS_DIR))
 
-import colour.utilities
-import psutil
 import streamlit
 import streamlit_colourplotting
 
@@ -41,6 +38,12 @@ _configure_logging()
 
 LOGGER = logging.getLogger("streamlit_colourplotting.app")
 
+if not os.getenv("STCP_DISABLE_WARMUP"):
+    # only started once per process, so the first user doesn't wait for caches
+    streamlit_colourplotting.start_warmup(
+        [method.value for method in streamlit_colourplotting.ui.DiagramMethod]
+    )
+
 streamlit.set_page_config(
     page_title="Colour-science Plotting",
     page_icon="📊",
@@ -51,14 +54,19 @@ streamlit.set_page_config(
     },
 )
 
-colour.utilities.filter_warnings(colour_usage_warnings=True, python_warnings=True)
+# same as `colour.utilities.filter_warnings(python_warnings=True)` which silence
+# colour warnings too, but without importing colour which is slow.
+warnings.filterwarnings("ignore")
 # we create a first instance of the config at startup
 streamlit_colourplotting.ui.config(force_instance=True)
 streamlit_colourplotting.create_main_ui()
 
-LOGGER.debug(
-    f"Final app RAM={psutil.Process(os.getpid()).memory_info().rss / 1024**2}MB"
-)
+if LOGGER.isEnabledFor(logging.DEBUG):
+    import psutil
+
+    LOGGER.debug(
+        f"Final app RAM={psutil.Process(os.getpid()).memory_info().rss / 1024**2}MB"
+    )
 
 
 @streamlit_colourplotting.widgetify
@@ -70,6 +78,7 @@ def widget_log_level(key):
 with streamlit.sidebar:
     with streamlit.expander(" "):
         streamlit.caption("Please do not modify options here :)")
+        streamlit.caption(str(streamlit_colourplotting.get_warmup_report()))
         _options = ["DEBUG", "INFO", "WARNING", "ERROR"]
         streamlit.selectbox(
             label="log level",
@@ -1,3 +1,5 @@
 from ._utils import UifiedEnum
 from ._utils import widgetify
 from .ui import create_main_ui
+from .warmup import start_warmup
+from .warmup import get_warmup_report
@@ -0,0 +1,618 @@
+"""
+Convert R-G-B images to the chromaticity coordinates scattered in the diagram.
+"""
+
+from __future__ import annotations
+
+import collections
+import dataclasses
+import functools
+import logging
+import os
+import threading
+import typing
+from typing import Callable
+from typing import Hashable
+from typing import Optional
+
+import numpy
+
+from streamlit_colourplotting.colorlib import is_colorspace_decoding_linear
+from streamlit_colourplotting.core import convert_image_to_float
+
+if typing.TYPE_CHECKING:
+    from streamlit_colourplotting.colorlib import RgbColorspace
+    from streamlit_colourplotting.spatialindex import ChromaticityIndex
+
+LOGGER = logging.getLogger(__name__)
+
+SeriesT = typing.TypeVar(
+    "SeriesT",
+    "PlotSeries",
+    "TristimulusSeries",
+    "TristimulusPyramid",
+    "ChromaticityIndex",
+)
+
+
+@dataclasses.dataclass(frozen=True, eq=False)
+class PlotSeries:
+    """
+    A set of colors to scatter in the chromaticity diagram.
+
+    Compared by identity, use :meth:`is_same` to compare the content.
+    """
+
+    coordinates: numpy.ndarray
+    """
+    (N, 2) chromaticity coordinates in the diagram method coordinate system.
+    """
+
+    colors: numpy.ndarray
+    """
+    (N, 3) display R-G-B color of each coordinate, in the [0-1] range.
+    """
+
+    label: Optional[str] = None
+    """
+    name displayed in the legend.
+    """
+
+    sizes: Optional[numpy.ndarray] = None
+    """
+    (N,) factor applied to the marker size of each coordinate, None to use the same
+    size for all.
+    """
+
+    def is_same(self, other: "PlotSeries") -> bool:
+        return (
+            self.label == other.label
+            and self.coordinates.shape == other.coordinates.shape
+            and numpy.array_equal(self.coordinates, other.coordinates)
+            and numpy.array_equal(self.colors, other.colors)
+            and (self.sizes is None) == (other.sizes is None)
+            and (self.sizes is None or numpy.array_equal(self.sizes, other.sizes))
+        )
+
+    @property
+    def nbytes(self) -> int:
+        sizes_nbytes = 0 if self.sizes is None else self.sizes.nbytes
+        return self.coordinates.nbytes + self.colors.nbytes + sizes_nbytes
+
+
+DIAGRAM_PROJECTIONS: dict[
+    str, tuple[tuple[float, float, float], tuple[float, float]]
+] = {
+    "CIE 1931": ((1.0, 1.0, 1.0), (1.0, 1.0)),
+    "CIE 1960 UCS": ((1.0, 15.0, 3.0), (4.0, 6.0)),
+    "CIE 1976 UCS": ((1.0, 15.0, 3.0), (4.0, 9.0)),
+}
+"""
+chromaticity diagram method with the weights of X, Y, Z in the denominator and
+the scale of X and Y in the numerator of its coordinates, e.g. x = 1X / (1X+1Y+1Z).
+"""
+
+
+def XYZ_to_diagram_coordinates(XYZ: numpy.ndarray, method: str) -> numpy.ndarray:
+    """
+    Project CIE XYZ tristimulus values to the chromaticity coordinates of a diagram.
+
+    Same result as the ``XYZ_to_ij`` functions of
+    ``colour.plotting.diagrams.METHODS_CHROMATICITY_DIAGRAM`` but computed directly,
+    in the data type of the values. Values with a null denominator are projected
+    to (0, 0), like colour does.
+
+    Args:
+        XYZ: (..., 3) array of tristimulus values.
+        method: one of the :obj:`DIAGRAM_PROJECTIONS` key.
+
+    Returns:
+        (..., 2) array of coordinates.
+    """
+    weights, scales = DIAGRAM_PROJECTIONS[method]
+    XYZ = numpy.asarray(XYZ)
+    denominator = XYZ @ numpy.asarray(weights, dtype=XYZ.dtype)
+    reciprocal = numpy.divide(
+        1.0,
+        denominator,
+        out=numpy.zeros_like(denominator),
+        where=denominator != 0,
+    )
+    coordinates = XYZ[..., :2] * numpy.asarray(scales, dtype=XYZ.dtype)
+    coordinates *= reciprocal[..., numpy.newaxis]
+    return coordinates
+
+
+def diagram_coordinates_to_XYZ(
+    coordinates: numpy.ndarray,
+    method: str,
+) -> numpy.ndarray:
+    """
+    Get tristimulus values with the given chromaticity coordinates, to convert them
+    to the coordinates of another diagram method.
+
+    The luminance is lost by the projection, the values are scaled so the
+    denominator of the coordinates is 1.
+
+    Args:
+        coordinates: (..., 2) array of coordinates.
+        method: one of the :obj:`DIAGRAM_PROJECTIONS` key.
+
+    Returns:
+        (..., 3) array of tristimulus values.
+    """
+    weights, scales = DIAGRAM_PROJECTIONS[method]
+    coordinates = numpy.asarray(coordinates)
+    X = coordinates[..., 0] / scales[0]
+    Y = coordinates[..., 1] / scales[1]
+    Z = (1.0 - weights[0] * X - weights[1] * Y) / weights[2]
+    return numpy.stack([X, Y, Z], axis=-1)
+
+
+@dataclasses.dataclass(frozen=True, eq=False)
+class TristimulusSeries:
+    """
+    CIE XYZ tristimulus values of a set of colors, from which the coordinates of
+    every diagram method are cheaply derived, see :func:`project_series`.
+    """
+
+    XYZ: numpy.ndarray
+    """
+    (N, 3) tristimulus values, relative to the whitepoint of their colorspace.
+    """
+
+    colors: numpy.ndarray
+    """
+    (N, 3) display R-G-B color of each value, in the [0-1] range.
+    """
+
+    order_key: numpy.ndarray
+    """
+    (N,) key increasing with the linear green component of each source color,
+    colors with a higher key are drawn on top. See :func:`get_order_key`.
+    """
+
+    def __len__(self) -> int:
+        return len(self.XYZ)
+
+    @property
+    def nbytes(self) -> int:
+        return self.XYZ.nbytes + self.colors.nbytes + self.order_key.nbytes
+
+    def head(self, count: int) -> TristimulusSeries:
+        """
+        Get a view of the first values.
+        """
+        return TristimulusSeries(
+            XYZ=self.XYZ[:count],
+            colors=self.colors[:count],
+            order_key=self.order_key[:count],
+        )
+
+
+def get_order_key(values: numpy.ndarray) -> numpy.ndarray:
+    """
+    Get 16 bits integers sorted in the same order as the given floating point values.
+
+    Integers of 16 bits or less are sorted in linear time by numpy, and the half
+    float precision is enough to order colors.
+    """
+    bits = numpy.asarray(values, dtype=numpy.float16).view(numpy.uint16)
+    # flip all the bits of negative values, only the sign bit of positive ones
+    return numpy.where(bits & 0x8000, ~bits, bits | 0x8000).astype(numpy.uint16)
+
+
+def linearize_image(image: numpy.ndarray, colorspace: RgbColorspace) -> numpy.ndarray:
+    """
+    Return a floating point R-G-B image with linear encoding.
+
+    Args:
+        image: R-G-B image in its native data type.
+        colorspace: colorspace the image is encoded in.
+    """
+    image = convert_image_to_float(image)
+
+    # NOTE: colour plotting function expect linear encoding
+    if not is_colorspace_decoding_linear(colorspace):
+        image = colorspace.cctf_decoding(image)
+
+    return image
+
+
+def compute_tristimulus_series(
+    image: numpy.ndarray,
+    colorspace: RgbColorspace,
+) -> TristimulusSeries:
+    """
+    Compute the tristimulus values and display color of each pixel of the given image.
+
+    Args:
+        image: floating point R-G-B image with linear encoding, arbitrary dimensions.
+        colorspace: colorspace the image is encoded in.
+    """
+    import colour
+    import colour.plotting
+
+    RGB = numpy.reshape(image[..., :3], (-1, 3))
+
+    colors = colour.models.RGB_to_RGB(
+        RGB,
+        colorspace,
+        colour.plotting.CONSTANTS_COLOUR_STYLE.colour.colourspace,
+        apply_cctf_encoding=True,
+    )
+    colors = numpy.clip(numpy.reshape(colors, (-1, 3)), 0, 1)
+
+    XYZ = colour.models.RGB_to_XYZ(RGB, colorspace)
+    order_key = get_order_key(RGB[:, 1])
+
+    # they might be shared through the cache
+    XYZ.flags.writeable = False
+    colors.flags.writeable = False
+    order_key.flags.writeable = False
+    return TristimulusSeries(XYZ=XYZ, colors=colors, order_key=order_key)
+
+
+class TristimulusPyramid:
+    """
+    Tristimulus values of all the visible pixels of an image, in a random order so
+    any prefix is a uniform random subsample of the image.
+
+    Pixels are only converted the first time a prefix including them is requested,
+    smaller prefixes are then views of the values already converted.
+
+    Args:
+        get_image: return the R-G-B(-A) image in its native data type, only called
+            while pixels are left to convert.
+        shape: height and width of the image.
+        colorspace: colorspace the image is encoded in.
+        mask: boolean array of the image shape, only the pixels where it is True
+            are part of the pyramid. None for all the pixels.
+        seed: seed of the random order, so the same image give the same subsamples.
+        chunk_size: maximum number of pixels converted at once, to bound the
+            memory used by the conversion.
+    """
+
+    def __init__(
+        self,
+        get_image: Callable[[], numpy.ndarray],
+        shape: tuple[int, int],
+        colorspace: RgbColorspace,
+        mask: Optional[numpy.ndarray] = None,
+        seed: int = 0,
+        chunk_size: int = 2**20,
+    ):
+        self._get_image = get_image
+        self.colorspace = colorspace
+        self.chunk_size = chunk_size
+        self.shape = shape
+        index_type = numpy.int32 if shape[0] * shape[1] < 2**31 else numpy.int64
+        rng = numpy.random.default_rng(seed)
+        if mask is None:
+            self._order = rng.permutation(shape[0] * shape[1]).astype(index_type)
+        else:
+            # hidden pixels are never converted nor sampled
+            visible = numpy.flatnonzero(mask).astype(index_type)
+            self._order = visible[rng.permutation(len(visible))]
+        self.size = len(self._order)
+        self._converted: Optional[TristimulusSeries] = None
+        self._lock = threading.Lock()
+        self.on_convert: Optional[Callable[[], None]] = None
+        """
+        called after more pixels are converted, as :attr:`nbytes` grew.
+        """
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def nbytes(self) -> int:
+        converted_nbytes = self._converted.nbytes if self._converted else 0
+        return self._order.nbytes + converted_nbytes
+
+    def _convert(self, count: int):
+        converted = self._converted
+        start = len(converted) if converted else 0
+        image = self._get_image()
+        # gather then drop the alpha, slicing first would copy the whole image
+        pixels = numpy.reshape(image, (-1, image.shape[-1]))
+
+        chunks = []
+        for chunk_start in range(start, count, self.chunk_size):
+            chunk_order = self._order[
+                chunk_start : min(chunk_start + self.chunk_size, count)
+            ]
+            image = linearize_image(pixels[chunk_order, :3], self.colorspace)
+            chunks.append(compute_tristimulus_series(image, self.colorspace))
+
+        if converted:
+            chunks.insert(0, converted)
+        elif not chunks:
+            # no visible pixel
+            image = linearize_image(pixels[:0, :3], self.colorspace)
+            chunks.append(compute_tristimulus_series(image, self.colorspace))
+
+        series = TristimulusSeries(
+            XYZ=numpy.concatenate([chunk.XYZ for chunk in chunks]),
+            colors=numpy.concatenate([chunk.colors for chunk in chunks]),
+            order_key=numpy.concatenate([chunk.order_key for chunk in chunks]),
+        )
+        series.XYZ.flags.writeable = False
+        series.colors.flags.writeable = False
+        series.order_key.flags.writeable = False
+        self._converted = series
+
+        if count == self.size:
+            # the image is no longer needed, don't keep it alive
+            self._get_image = None
+
+    def head(self, count: int) -> TristimulusSeries:
+        """
+        Get the values of the first pixels, a uniform random subsample of the image.
+
+        Args:
+            count: number of pixels to get, clamped to the number of pixels.
+        """
+        count = max(min(count, self.size), 0)
+        with self._lock:
+            converting = self._converted is None or len(self._converted) < count
+            if converting:
+                self._convert(count)
+            series = self._converted.head(count)
+
+        if converting and self.on_convert is not None:
+            self.on_convert()
+        return series
+
+    def get_pixels(self, count: int) -> numpy.ndarray:
+        """
+        Get the index in the flattened image of the first pixels, in the same order
+        as the values returned by :meth:`head`.
+
+        Args:
+            count: number of pixels to get, clamped to the number of pixels.
+        """
+        return self._order[: max(min(count, self.size), 0)]
+
+
+def project_series(
+    series: TristimulusSeries,
+    method: str,
+    label: Optional[str] = None,
+) -> PlotSeries:
+    """
+    Get the chromaticity coordinates of the given tristimulus values.
+
+    Args:
+        series: tristimulus values to project.
+        method: one of the :obj:`DIAGRAM_PROJECTIONS` key.
+        label: name displayed in the legend.
+    """
+    # brighter colors are drawn on top, the order is random so gathering the
+    # fewest values is faster
+    order = numpy.argsort(series.order_key, kind="stable")
+    coordinates = XYZ_to_diagram_coordinates(series.XYZ, method)
+    coordinates = numpy.take(coordinates, order, axis=0)
+    colors = numpy.take(series.colors, order, axis=0)
+    coordinates.flags.writeable = False
+    colors.flags.writeable = False
+    return PlotSeries(coordinates=coordinates, colors=colors, label=label)
+
+
+def compute_series(
+    image: numpy.ndarray,
+    colorspace: RgbColorspace,
+    method: str,
+    label: Optional[str] = None,
+) -> PlotSeries:
+    """
+    Compute the chromaticity coordinates of each pixel of the given image, the same way
+    ``colour.plotting.plot_RGB_chromaticities_in_chromaticity_diagram`` does.
+
+    Args:
+        image: floating point R-G-B image with linear encoding, arbitrary dimensions.
+        colorspace: colorspace the image is encoded in.
+        method: one of the :obj:`DIAGRAM_PROJECTIONS` key.
+        label: name displayed in the legend.
+    """
+    return project_series(
+        compute_tristimulus_series(image, colorspace),
+        method,
+        label=label,
+    )
+
+
+class SeriesReservoir:
+    """
+    Accumulate series into a uniform random subset of a maximum number of points.
+
+    Every point added has the same probability to be kept, whatever the number of
+    points added in total (reservoir sampling).
+
+    Args:
+        max_points: maximum number of points kept.
+        seed: seed of the random generator, so the same input give the same points.
+    """
+
+    def __init__(self, max_points: int, seed: int = 0):
+        self.max_points = max_points
+        self.count = 0
+        """
+        total number of points added.
+        """
+        self._rng = numpy.random.default_rng(seed)
+        self._coordinates = numpy.empty((max_points, 2), dtype=numpy.float32)
+        self._colors = numpy.empty((max_points, 3), dtype=numpy.float32)
+
+    def add(self, series: PlotSeries):
+        coordinates = series.coordinates
+        colors = series.colors
+
+        # fill the reservoir first
+        filled = min(self.max_points - min(self.count, self.max_points), len(colors))
+        start = self.count
+        self._coordinates[start : start + filled] = coordinates[:filled]
+        self._colors[start : start + filled] = colors[:filled]
+
+        # then the i-th point replaces a random point with a probability max_points/i
+        indices = numpy.arange(self.count + filled, self.count + len(colors))
+        replaced = self._rng.integers(0, indices + 1)
+        kept = replaced < self.max_points
+        # on duplicate indices the last point is kept, same as a sequential loop
+        self._coordinates[replaced[kept]] = coordinates[filled:][kept]
+        self._colors[replaced[kept]] = colors[filled:][kept]
+
+        self.count += len(colors)
+
+    def to_series(self, label: Optional[str] = None) -> PlotSeries:
+        size = min(self.count, self.max_points)
+        coordinates = self._coordinates[:size].copy()
+        colors = self._colors[:size].copy()
+        # brighter colors are drawn on top, like for a single image
+        order = colors[:, 1].argsort()
+        coordinates = coordinates[order]
+        colors = colors[order]
+        coordinates.flags.writeable = False
+        colors.flags.writeable = False
+        return PlotSeries(coordinates=coordinates, colors=colors, label=label)
+
+
+class SeriesHistogram:
+    """
+    Accumulate series into a 2D histogram of the chromaticity coordinates.
+
+    Each occupied bin become a single point, colored with the mean color of the bin
+    and sized relative to the number of points in it.
+
+    Args:
+        bins: number of bins on each axis.
+        bounds: (min, max) coordinates covered by the bins on both axes, points
+            outside are ignored.
+    """
+
+    def __init__(self, bins: int = 128, bounds: tuple[float, float] = (-0.1, 1.0)):
+        self.bins = bins
+        self.bounds = bounds
+        self.count = 0
+        """
+        total number of points added, including the ones outside the bounds.
+        """
+        self._counts = numpy.zeros(bins * bins, dtype=numpy.int64)
+        self._colors_sum = numpy.zeros((bins * bins, 3), dtype=numpy.float64)
+
+    def add(self, series: PlotSeries):
+        self.count += len(series.colors)
+
+        bound_min, bound_max = self.bounds
+        cells = (series.coordinates - bound_min) / (bound_max - bound_min) * self.bins
+        cells = numpy.floor(cells)
+        inside = numpy.all((cells >= 0) & (cells < self.bins), axis=-1)
+        cells = cells[inside].astype(numpy.int64)
+        colors = series.colors[inside]
+
+        flat_cells = cells[:, 0] * self.bins + cells[:, 1]
+        length = self.bins * self.bins
+        self._counts += numpy.bincount(flat_cells, minlength=length)
+        for channel in range(3):
+            self._colors_sum[:, channel] += numpy.bincount(
+                flat_cells, weights=colors[:, channel], minlength=length
+            )
+
+    def to_series(self, label: Optional[str] = None) -> PlotSeries:
+        occupied = numpy.flatnonzero(self._counts)
+        counts = self._counts[occupied]
+
+        bound_min, bound_max = self.bounds
+        cell_size = (bound_max - bound_min) / self.bins
+        cells = numpy.stack([occupied // self.bins, occupied % self.bins], axis=-1)
+        coordinates = (bound_min + (cells + 0.5) * cell_size).astype(numpy.float32)
+        colors = (self._colors_sum[occupied] / counts[:, numpy.newaxis]).astype(
+            numpy.float32
+        )
+        sizes = counts / counts.max() if len(counts) else counts.astype(numpy.float64)
+
+        # denser bins are drawn on top
+        order = counts.argsort()
+        coordinates = coordinates[order]
+        colors = colors[order]
+        sizes = sizes[order]
+        for array in (coordinates, colors, sizes):
+            array.flags.writeable = False
+        return PlotSeries(
+            coordinates=coordinates, colors=colors, label=label, sizes=sizes
+        )
+
+
+class PlotSeriesCache:
+    """
+    Thread-safe least-recently-used cache of :class:`PlotSeries`,
+    :class:`TristimulusSeries`, :class:`TristimulusPyramid` or
+    ``spatialindex.ChromaticityIndex``.
+
+    Args:
+        max_entries: maximum number of series kept.
+        max_bytes: maximum memory used by all the series kept.
+    """
+
+    def __init__(self, max_entries: int = 64, max_bytes: int = 1024**3):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._series: collections.OrderedDict[
+            Hashable,
+            typing.Union[
+                PlotSeries, TristimulusSeries, TristimulusPyramid, ChromaticityIndex
+            ],
+        ] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, compute: Callable[[], SeriesT]) -> SeriesT:
+        """
+        Get the series for the given key, computing it if not cached.
+
+        Args:
+            key: identify everything the series depends on.
+            compute: function returning the series if not cached.
+        """
+        with self._lock:
+            series = self._series.get(key)
+            if series is not None:
+                self._series.move_to_end(key)
+                return series
+
+        # concurrent computation of the same key is rare and harmless
+        series = compute()
+
+        with self._lock:
+            self._series[key] = series
+            if isinstance(series, TristimulusPyramid):
+                # pyramids grow after being cached, as more pixels are requested
+                series.on_convert = functools.partial(self._on_pyramid_convert, key)
+            self._evict()
+        return series
+
+    def _on_pyramid_convert(self, key: Hashable):
+        with self._lock:
+            if key in self._series:
+                self._series.move_to_end(key)
+                self._evict()
+
+    def _evict(self):
+        used_bytes = sum(cached.nbytes for cached in self._series.values())
+        # always keep the most recently used series
+        while len(self._series) > 1 and (
+            len(self._series) > self.max_entries or used_bytes > self.max_bytes
+        ):
+            _, removed = self._series.popitem(last=False)
+            used_bytes -= removed.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+PLOT_SERIES_CACHE = PlotSeriesCache(
+    max_bytes=int(float(os.getenv("STCP_SERIES_CACHE_MB", "1024")) * 1024**2)
+)
+"""
+Process-wide cache shared by all the sessions.
+"""
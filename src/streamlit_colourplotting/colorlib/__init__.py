@@ -5,11 +5,11 @@ This whole lib is copied from https://github.com/MrLixm/cocoon
 from ._bitdepth import convert_float_to_int8
 from ._bitdepth import convert_int8_to_float
 
-from ._colorspace import RgbColorspace
-from ._colorspace import sRGB_COLORSPACE
+from . import _colorspace
 from ._colorspace import ChromaticAdaptationTransform
 from ._colorspace import get_available_colorspaces
 from ._colorspace import get_colorspace
+from ._colorspace import get_linearized_colorspace
 from ._colorspace import colorspace_to_colorspace
 from ._colorspace import is_colorspace_decoding_linear
 
@@ -21,3 +21,13 @@ from ._colorstr import convert_str_to_color
 from ._colorstr import convert_color_to_str
 from ._colorstr import fix_color_str
 from ._colorstr import validate_color_str
+from ._colorstr import convert_strs_to_colors
+from ._colorstr import validate_color_strs
+
+
+def __getattr__(name: str):
+    # lazy attributes, see _colorspace.__getattr__
+    if name in ("RgbColorspace", "sRGB_COLORSPACE"):
+        return getattr(_colorspace, name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
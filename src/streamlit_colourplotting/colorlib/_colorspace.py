@@ -1,10 +1,29 @@
+from __future__ import annotations
+
 import enum
-import colour
+import functools
+import typing
+
 import numpy
 
-RgbColorspace = colour.RGB_Colourspace
+if typing.TYPE_CHECKING:
+    from colour import RGB_Colourspace as RgbColorspace
+
+
+def __getattr__(name: str):
+    # importing colour is slow (it also import matplotlib) so we only do it
+    # the first time one of those attribute is accessed.
+    if name == "RgbColorspace":
+        import colour
+
+        return colour.RGB_Colourspace
+
+    if name == "sRGB_COLORSPACE":
+        import colour
+
+        return colour.models.RGB_COLOURSPACE_sRGB
 
-sRGB_COLORSPACE = colour.models.RGB_COLOURSPACE_sRGB
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class ChromaticAdaptationTransform(enum.Enum):
@@ -114,9 +133,27 @@ def get_available_colorspaces() -> list[str]:
 
 
 def get_colorspace(name: str) -> RgbColorspace | None:
+    import colour
+
     return colour.models.RGB_COLOURSPACES.get(name)
 
 
+@functools.lru_cache(maxsize=None)
+def get_linearized_colorspace(colorspace: RgbColorspace) -> RgbColorspace:
+    """
+    Get a copy of the given colorspace with linear transfer functions.
+
+    The same instance is returned for the same colorspace so it can be compared
+    between streamlit reruns.
+    """
+    import colour
+
+    colorspace = colorspace.copy()
+    colorspace.cctf_decoding = colour.linear_function
+    colorspace.cctf_encoding = colour.linear_function
+    return colorspace
+
+
 def colorspace_to_colorspace(
     array: numpy.ndarray,
     source_colorspace: RgbColorspace,
@@ -124,6 +161,8 @@ def colorspace_to_colorspace(
     chromatic_adaptation_transform: ChromaticAdaptationTransform | None = None,
 ) -> numpy.ndarray:
 
+    import colour
+
     cat = chromatic_adaptation_transform or ChromaticAdaptationTransform.get_default()
 
     return colour.models.RGB_to_RGB(
@@ -137,6 +176,8 @@ def colorspace_to_colorspace(
 
 
 def is_colorspace_decoding_linear(colorspace: RgbColorspace) -> bool:
+    import colour
+
     return (
         colorspace.cctf_decoding is None
         or colorspace.cctf_decoding == colour.linear_function
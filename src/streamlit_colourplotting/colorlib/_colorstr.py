@@ -7,13 +7,45 @@ This allows to specify a color value in a single line which is very useful in th
 import enum
 import abc
 import re
+from typing import Sequence
 from typing import Type
 
+import numpy
+
+from ._bitdepth import convert_int8_to_float
 from ._rgbacolor import RGBAColor
 
 DEFAULT_COLOR = RGBAColor(0.0, 0.0, 0.0)
 
 
+def _get_unmatched_mask(
+    pattern: re.Pattern, user_inputs: Sequence[str]
+) -> numpy.ndarray:
+    """
+    Returns:
+        boolean array of shape (N,), True for the strings not fully matching the pattern.
+    """
+    return numpy.fromiter(
+        (pattern.fullmatch(user_input) is None for user_input in user_inputs),
+        dtype=numpy.bool_,
+        count=len(user_inputs),
+    )
+
+
+def _get_searched_mask(
+    pattern: re.Pattern, user_inputs: Sequence[str]
+) -> numpy.ndarray:
+    """
+    Returns:
+        boolean array of shape (N,), True for the strings containing a match of the pattern.
+    """
+    return numpy.fromiter(
+        (pattern.search(user_input) is not None for user_input in user_inputs),
+        dtype=numpy.bool_,
+        count=len(user_inputs),
+    )
+
+
 class ValidatorResult(enum.Enum):
     """
     Results of a validation operation.
@@ -31,6 +63,11 @@ class _BaseRGBColorStringConverter(abc.ABC):
 
     Validations = ValidatorResult
 
+    # a string containing a match can never be converted
+    _INVALID_PATTERN: re.Pattern
+    # a string fully matching it is a color in the exact format
+    _VALID_PATTERN: re.Pattern
+
     @classmethod
     @abc.abstractmethod
     def fix(cls, user_input: str) -> str:
@@ -63,6 +100,53 @@ class _BaseRGBColorStringConverter(abc.ABC):
         """
         pass
 
+    @classmethod
+    @abc.abstractmethod
+    def to_array(
+        cls, user_inputs: Sequence[str]
+    ) -> tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Convert a batch of strings to an array of colors in one go.
+
+        Returns:
+            tuple["float32 array of shape (N, 3)", "boolean mask of shape (N,), True for invalid rows"].
+            Invalid rows are filled with the default color.
+        """
+        pass
+
+    @classmethod
+    def validate_array(cls, user_inputs: Sequence[str]) -> numpy.ndarray:
+        """
+        Validate a batch of strings.
+
+        Returns:
+            int8 array of shape (N,) containing :class:`ValidatorResult` values.
+        """
+        validations = numpy.full(
+            len(user_inputs), cls.Validations.acceptable.value, numpy.int8
+        )
+        validations[cls._get_valid_mask(user_inputs)] = cls.Validations.valid.value
+        # invalid takes precedence like in :meth:`validate`
+        validations[cls._get_invalid_mask(user_inputs)] = cls.Validations.invalid.value
+        return validations
+
+    @classmethod
+    def _get_invalid_mask(cls, user_inputs: Sequence[str]) -> numpy.ndarray:
+        """
+        Returns:
+            boolean array of shape (N,), True for the strings :meth:`validate` find invalid.
+        """
+        return _get_searched_mask(cls._INVALID_PATTERN, user_inputs)
+
+    @classmethod
+    def _get_valid_mask(cls, user_inputs: Sequence[str]) -> numpy.ndarray:
+        """
+        Returns:
+            boolean array of shape (N,), True for the strings :meth:`validate` find
+            valid, if not invalid.
+        """
+        return ~_get_unmatched_mask(cls._VALID_PATTERN, user_inputs)
+
 
 class _FloatD4RGBColorStringConverter(_BaseRGBColorStringConverter):
     """
@@ -76,6 +160,13 @@ class _FloatD4RGBColorStringConverter(_BaseRGBColorStringConverter):
     DEFAULT_VALUE = 0.0
     SEPARATOR = " "
 
+    _INVALID_PATTERN = re.compile(r"[^\d. -]")
+    _VALID_PATTERN = re.compile(r"-?\d\.\d{4} -?\d\.\d{4} -?\d\.\d{4}")
+    # a string that can be fed to float() for each of the 3 channels
+    _PARSABLE_PATTERN = re.compile(
+        r"-?(?:\d+\.?\d*|\.\d+) -?(?:\d+\.?\d*|\.\d+) -?(?:\d+\.?\d*|\.\d+)"
+    )
+
     @classmethod
     def fix(cls, user_input: str) -> str:
         """
@@ -148,18 +239,39 @@ class _FloatD4RGBColorStringConverter(_BaseRGBColorStringConverter):
 
     @classmethod
     def validate(cls, user_input: str) -> ValidatorResult:
-        if re.search(rf"[^\d.{cls.SEPARATOR}-]", user_input):
+        if cls._INVALID_PATTERN.search(user_input):
             return cls.Validations.invalid
 
-        decimals = "\\d" * cls.DECIMALS
-        if re.match(
-            rf"^-?\d\.{decimals}{cls.SEPARATOR}-?\d\.{decimals}{cls.SEPARATOR}-?\d\.{decimals}$",
-            user_input,
-        ):
+        if cls._VALID_PATTERN.fullmatch(user_input):
             return cls.Validations.valid
 
         return cls.Validations.acceptable
 
+    @classmethod
+    def _to_parsable(cls, user_input: str) -> str:
+        """
+        Return the given string with channels separated by a single space.
+        """
+        return user_input
+
+    @classmethod
+    def to_array(
+        cls, user_inputs: Sequence[str]
+    ) -> tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Args:
+            user_inputs: example: ``["0.253 -0.1 0.005", "1.0 1.0 1.0"]``
+        """
+        array = numpy.full((len(user_inputs), 3), cls.DEFAULT_VALUE, numpy.float32)
+        parsables = [cls._to_parsable(user_input) for user_input in user_inputs]
+        invalid = _get_unmatched_mask(cls._PARSABLE_PATTERN, parsables)
+        valids = [parsable for parsable, bad in zip(parsables, invalid) if not bad]
+        if valids:
+            array[~invalid] = numpy.fromstring(
+                " ".join(valids), dtype=numpy.float32, sep=" "
+            ).reshape(-1, 3)
+        return array, invalid
+
 
 class _FloatD4TupleRGBColorStringConverter(_FloatD4RGBColorStringConverter):
     """
@@ -172,6 +284,9 @@ class _FloatD4TupleRGBColorStringConverter(_FloatD4RGBColorStringConverter):
     DEFAULT_VALUE = 0.0
     SEPARATOR = ", "
 
+    _INVALID_PATTERN = re.compile(r"[^\d., -]|, *-{2,},")
+    _VALID_PATTERN = re.compile(r"\(-?\d\.\d{4}, -?\d\.\d{4}, -?\d\.\d{4}\)")
+
     @classmethod
     def fix(cls, user_input: str) -> str:
         """
@@ -214,20 +329,25 @@ class _FloatD4TupleRGBColorStringConverter(_FloatD4RGBColorStringConverter):
     def validate(cls, user_input: str) -> ValidatorResult:
         simplified_input = user_input.lstrip("(").rstrip(")")
 
-        if re.search(rf"[^\d.{cls.SEPARATOR}-]", simplified_input) or re.search(
-            r", *-{2,},", simplified_input
-        ):
+        if cls._INVALID_PATTERN.search(simplified_input):
             return cls.Validations.invalid
 
-        decimals = "\\d" * cls.DECIMALS
-        if re.match(
-            rf"^\(-?\d\.{decimals}{cls.SEPARATOR}-?\d\.{decimals}{cls.SEPARATOR}-?\d\.{decimals}\)$",
-            user_input,
-        ):
+        if cls._VALID_PATTERN.fullmatch(user_input):
             return cls.Validations.valid
 
         return cls.Validations.acceptable
 
+    @classmethod
+    def _get_invalid_mask(cls, user_inputs: Sequence[str]) -> numpy.ndarray:
+        simplified_inputs = [
+            user_input.lstrip("(").rstrip(")") for user_input in user_inputs
+        ]
+        return _get_searched_mask(cls._INVALID_PATTERN, simplified_inputs)
+
+    @classmethod
+    def _to_parsable(cls, user_input: str) -> str:
+        return user_input.lstrip("(").rstrip(")").replace(cls.SEPARATOR, " ")
+
 
 class _UInt8RGBColorStringConverter(_BaseRGBColorStringConverter):
     """
@@ -239,6 +359,9 @@ class _UInt8RGBColorStringConverter(_BaseRGBColorStringConverter):
     DEFAULT_VALUE = 0
     SEPARATOR = " "
 
+    _INVALID_PATTERN = re.compile(r"[^\d ]")
+    _VALID_PATTERN = re.compile(r"(\d{1,3}) (\d{1,3}) (\d{1,3})")
+
     @classmethod
     def fix(cls, user_input: str) -> str:
         """
@@ -301,14 +424,12 @@ class _UInt8RGBColorStringConverter(_BaseRGBColorStringConverter):
 
     @classmethod
     def validate(cls, user_input: str) -> ValidatorResult:
-        if re.search(rf"[^\d{cls.SEPARATOR}]", user_input):
+        if cls._INVALID_PATTERN.search(user_input):
             return cls.Validations.invalid
 
-        if re.match(
-            rf"^\d{{1,3}}{cls.SEPARATOR}\d{{1,3}}{cls.SEPARATOR}\d{{1,3}}$",
-            user_input,
-        ):
-            r, g, b = user_input.split(cls.SEPARATOR)
+        match = cls._VALID_PATTERN.fullmatch(user_input)
+        if match:
+            r, g, b = match.groups()
             if int(r) > 255 or int(g) > 255 or int(b) > 255:
                 # allowed cause clamped in fix() method anyway
                 return cls.Validations.acceptable
@@ -317,6 +438,36 @@ class _UInt8RGBColorStringConverter(_BaseRGBColorStringConverter):
 
         return cls.Validations.acceptable
 
+    @classmethod
+    def _get_valid_mask(cls, user_inputs: Sequence[str]) -> numpy.ndarray:
+        valid = ~_get_unmatched_mask(cls._VALID_PATTERN, user_inputs)
+        valids = [user_input for user_input, good in zip(user_inputs, valid) if good]
+        if valids:
+            int8_array = numpy.fromstring(" ".join(valids), dtype=numpy.uint16, sep=" ")
+            # allowed cause clamped in fix() method anyway, but only acceptable
+            valid[valid] = numpy.all(int8_array.reshape(-1, 3) <= 255, axis=1)
+        return valid
+
+    @classmethod
+    def to_array(
+        cls, user_inputs: Sequence[str]
+    ) -> tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Values superior to 255 are clamped like in :meth:`fix`.
+
+        Args:
+            user_inputs: example: ``["126 0 255", "0 0 0"]``
+        """
+        array = numpy.full((len(user_inputs), 3), cls.DEFAULT_VALUE, numpy.float32)
+        invalid = _get_unmatched_mask(cls._VALID_PATTERN, user_inputs)
+        valids = [
+            user_input for user_input, bad in zip(user_inputs, invalid) if not bad
+        ]
+        if valids:
+            int8_array = numpy.fromstring(" ".join(valids), dtype=numpy.uint16, sep=" ")
+            array[~invalid] = convert_int8_to_float(int8_array).reshape(-1, 3)
+        return array, invalid
+
 
 class _HexRGBColorStringConverter(_BaseRGBColorStringConverter):
     """
@@ -325,6 +476,11 @@ class _HexRGBColorStringConverter(_BaseRGBColorStringConverter):
     Example of a valid string: ``#78BD68``
     """
 
+    _INVALID_PATTERN = re.compile("[^a-f0-9]")
+    _VALID_PATTERN = re.compile(r"#[A-Fa-f0-9]{6}")
+    # same as not being invalid in validate()
+    _NOT_INVALID_PATTERN = re.compile(r"#+[A-Fa-f0-9]*")
+
     @classmethod
     def fix(cls, user_input: str) -> str:
         """
@@ -365,14 +521,38 @@ class _HexRGBColorStringConverter(_BaseRGBColorStringConverter):
 
         sanitized_input = user_input.lstrip("#").lower()
 
-        if re.search("[^a-f0-9]", sanitized_input):
+        if cls._INVALID_PATTERN.search(sanitized_input):
             return cls.Validations.invalid
 
-        if re.match(r"^#[A-Fa-f0-9]{6}$", user_input):
+        if cls._VALID_PATTERN.fullmatch(user_input):
             return cls.Validations.valid
 
         return cls.Validations.acceptable
 
+    @classmethod
+    def _get_invalid_mask(cls, user_inputs: Sequence[str]) -> numpy.ndarray:
+        return _get_unmatched_mask(cls._NOT_INVALID_PATTERN, user_inputs)
+
+    @classmethod
+    def to_array(
+        cls, user_inputs: Sequence[str]
+    ) -> tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        The array contains the sRGB encoded values, like :meth:`to_color`.
+
+        Args:
+            user_inputs: example: ``["#78BD68", "#000000"]``
+        """
+        array = numpy.zeros((len(user_inputs), 3), numpy.float32)
+        invalid = _get_unmatched_mask(cls._VALID_PATTERN, user_inputs)
+        valids = [
+            user_input[1:] for user_input, bad in zip(user_inputs, invalid) if not bad
+        ]
+        if valids:
+            int8_array = numpy.frombuffer(bytes.fromhex("".join(valids)), numpy.uint8)
+            array[~invalid] = convert_int8_to_float(int8_array).reshape(-1, 3)
+        return array, invalid
+
 
 class ColorStringFormat(enum.Enum):
     """
@@ -430,6 +610,38 @@ def validate_color_str(user_str: str, str_format: ColorStringFormat) -> Validato
     return converter_class.validate(user_str)
 
 
+def convert_strs_to_colors(
+    user_strs: Sequence[str],
+    str_format: ColorStringFormat,
+) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Convert a batch of strings in the given format to an array of colors.
+
+    Much faster than calling :func:`convert_str_to_color` in a loop for large batches.
+
+    Returns:
+        tuple["float32 array of shape (N, 3)", "boolean mask of shape (N,), True for invalid rows"].
+        Invalid rows are filled with the default color.
+    """
+    converter_class = _get_class_from_format(str_format)
+    return converter_class.to_array(user_strs)
+
+
+def validate_color_strs(
+    user_strs: Sequence[str],
+    str_format: ColorStringFormat,
+) -> numpy.ndarray:
+    """
+    Determine for each given string if it CAN be converted to a valid color in the given format.
+
+    Returns:
+        int8 array of shape (N,) containing :class:`ValidatorResult` values.
+        ``result == ValidatorResult.invalid.value`` gives the mask of invalid rows.
+    """
+    converter_class = _get_class_from_format(str_format)
+    return converter_class.validate_array(user_strs)
+
+
 def fix_color_str(user_str: str, str_format: ColorStringFormat) -> str:
     """
     Sanitize the given string, so it can be a valid represention of a color instance as string.
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import dataclasses
 import logging
+import typing
 from typing import Literal
 from typing import overload
 from typing import Optional
@@ -9,13 +10,15 @@ from typing import Union
 
 import numpy
 
-from . import RgbColorspace
-from . import sRGB_COLORSPACE
+from . import _colorspace
 from . import colorspace_to_colorspace
 from . import ChromaticAdaptationTransform
 from . import convert_int8_to_float
 from . import convert_float_to_int8
 
+if typing.TYPE_CHECKING:
+    from . import RgbColorspace
+
 logger = logging.getLogger(__name__)
 
 
@@ -116,7 +119,7 @@ class RGBAColor:
         """
         hexadecimal = hexadecimal.lstrip("#")
         r, g, b = tuple(int(hexadecimal[i : i + 2], 16) for i in (0, 2, 4))
-        colorspace = sRGB_COLORSPACE if assume_srgb else None
+        colorspace = _colorspace.sRGB_COLORSPACE if assume_srgb else None
         return cls.from_int8(r, g, b, colorspace=colorspace, alpha=alpha)
 
     @classmethod
@@ -216,7 +219,7 @@ class RGBAColor:
         """
         intermediate = self
         if force_srgb:
-            intermediate = self.as_colorspace(sRGB_COLORSPACE)
+            intermediate = self.as_colorspace(_colorspace.sRGB_COLORSPACE)
 
         r, g, b = intermediate.to_int8(alpha=False)
         return "#{0:02x}{1:02x}{2:02x}".format(r, g, b)
@@ -1,14 +1,14 @@
+import dataclasses
 import logging
+import math
 import os
+import struct
 import sys
 from io import BytesIO
+from typing import Optional
 
-import colour.io
-import imageio.v3 as imageio
 import numpy
 
-import cv2
-
 LOGGER = logging.getLogger(__name__)
 
 
@@ -71,7 +71,7 @@ def rescale_image_fast(image_array: numpy.ndarray, target_width: int):
         initial image rescaled as specified
     """
     source_width = image_array.shape[1]
-    target_width = max(target_width, source_width)
+    target_width = min(target_width, source_width)
     width_ratio = int(source_width / target_width)
 
     source_height = image_array.shape[0]
@@ -83,36 +83,329 @@ def rescale_image_fast(image_array: numpy.ndarray, target_width: int):
     return image_array.copy()
 
 
-def read_image_from_bytes(bytesio: BytesIO) -> numpy.ndarray:
+def _get_decode_reductions(extension: str) -> tuple[int, ...]:
     """
-    Return an RGB image with a floating point encoding from the given bytes buffer.
+    Get the factors the given image format can be downscaled by while decoding it.
+    """
+    # JPEG store blocks of DCT coefficients, downscaling them is much cheaper
+    # than decoding the full image.
+    if extension.lower() in (".jpg", ".jpeg"):
+        return 1, 2, 4, 8
+    return (1,)
+
+
+def _split_stride(stride: int, reductions: tuple[int, ...]) -> tuple[int, int]:
+    """
+    Split the given stride into a decoder reduction and a stride applied after decoding.
+
+    Returns:
+        tuple["reduction factor", "remaining stride"], they multiply to the given stride
+        or slightly above when it is not a multiple of the reduction, so the image
+        never has more pixels than requested.
+    """
+    stride = max(stride, 1)
+    reduction = max(factor for factor in reductions if factor <= stride)
+    return reduction, math.ceil(stride / reduction)
+
+
+@dataclasses.dataclass(frozen=True)
+class ImageInfo:
+    """
+    Properties of an encoded image as described by its header.
+    """
+
+    width: int
+    height: int
+    channels: int
+    dtype: numpy.dtype
+    """
+    data type of the array returned by the decoder.
+    """
+
+    frames: int = 1
+
+    reductions: tuple[int, ...] = (1,)
+    """
+    factors the image can be downscaled by while being decoded.
+    """
+
+    @property
+    def bit_depth(self) -> int:
+        """
+        Number of bits per channel of the decoded image.
+        """
+        return self.dtype.itemsize * 8
+
+    @property
+    def frame_nbytes(self) -> int:
+        """
+        Size in bytes of a single frame returned by the decoder.
+        """
+        return self.width * self.height * self.channels * self.dtype.itemsize
+
+    @property
+    def decoded_nbytes(self) -> int:
+        """
+        Size in bytes of the array returned by the decoder.
+        """
+        return self.frame_nbytes * self.frames
+
+    def estimate_read_nbytes(self, stride: int = 1) -> int:
+        """
+        Estimate the peak memory used by :func:`decode_image_from_bytes` in bytes.
+
+        Args:
+            stride: same as :func:`decode_image_from_bytes`
+        """
+        reduction, remaining_stride = _split_stride(stride, self.reductions)
+        decoded_nbytes = self.decoded_nbytes
+        itemsize = self.dtype.itemsize
+        if reduction > 1:
+            # reduced decoding always produce 8bit R-G-B
+            itemsize = 1
+            decoded_nbytes = (
+                math.ceil(self.width / reduction)
+                * math.ceil(self.height / reduction)
+                * 3
+            )
+        stride = reduction * remaining_stride
+        width = math.ceil(self.width / stride)
+        height = math.ceil(self.height / stride)
+        # the alpha channel is kept if requested, assume it is
+        channels = 4 if self.channels in (2, 4) and reduction == 1 else 3
+        # the decoded array + its strided R-G-B(-A) copy
+        return decoded_nbytes + width * height * channels * itemsize
+
+
+def _probe_exr_header(data: bytes) -> ImageInfo:
+    if data[:4] != b"\x76\x2f\x31\x01":
+        raise ValueError("Invalid OpenEXR file: wrong magic number.")
+
+    # cv2 always decode to float32
+    dtype = numpy.dtype(numpy.float32)
+    data_window = None
+    channels = 0
+
+    # attributes are stored as: name\0 type\0 size(int32) value[size]
+    cursor = 8
+    while cursor < len(data) and data[cursor] != 0:
+        name_end = data.index(b"\0", cursor)
+        type_end = data.index(b"\0", name_end + 1)
+        name = data[cursor:name_end]
+        (size,) = struct.unpack_from("<i", data, type_end + 1)
+        value_start = type_end + 5
+
+        if name == b"dataWindow":
+            data_window = struct.unpack_from("<4i", data, value_start)
+        elif name == b"channels":
+            # list of: name\0 pixel_type(int32) pLinear(uint8) reserved(3) x/y sampling(2*int32)
+            channel_cursor = value_start
+            while data[channel_cursor] != 0:
+                channel_cursor = data.index(b"\0", channel_cursor) + 1 + 16
+                channels += 1
+
+        cursor = value_start + size
+
+    if data_window is None:
+        raise ValueError("Invalid OpenEXR file: missing dataWindow attribute.")
+
+    xmin, ymin, xmax, ymax = data_window
+    return ImageInfo(
+        width=xmax - xmin + 1,
+        height=ymax - ymin + 1,
+        channels=min(max(channels, 3), 4),
+        dtype=dtype,
+    )
+
+
+def _probe_hdr_header(data: bytes) -> ImageInfo:
+    # header is text lines terminated by an empty line, followed by the resolution
+    # string such as "-Y 512 +X 768"
+    header_end = data.find(b"\n\n")
+    if not data.startswith(b"#?") or header_end < 0:
+        raise ValueError("Invalid Radiance HDR file: cannot find header.")
+
+    resolution = data[header_end + 2 : data.index(b"\n", header_end + 2)].split()
+    axes = {
+        axis[-1:]: int(size) for axis, size in zip(resolution[::2], resolution[1::2])
+    }
+    return ImageInfo(
+        width=axes[b"X"],
+        height=axes[b"Y"],
+        channels=3,
+        dtype=numpy.dtype(numpy.float32),
+    )
+
+
+def probe_image_from_bytes(bytesio: BytesIO) -> ImageInfo:
+    """
+    Get the properties of the image in the given bytes buffer, without decoding it.
     """
-    LOGGER.debug(f"initial BytesIO size { sys.getsizeof(bytesio) / 1024**2}MB")
-    # make sure the buffer cursor is back at start
     bytesio.seek(0)
+    extension = os.path.splitext(bytesio.name)[-1]
+
+    if extension == ".exr":
+        # header size is unbounded but 64KB is already generous
+        info = _probe_exr_header(bytesio.read(65536))
+
+    elif extension == ".hdr":
+        info = _probe_hdr_header(bytesio.read(4096))
+
+    else:
+        import imageio.v3 as imageio
+
+        # imageio close the file object it's given
+        properties = imageio.improps(bytesio.getvalue(), extension=extension)
+        shape = properties.shape
+        frames = 1
+        if properties.is_batch:
+            frames, shape = shape[0], shape[1:]
+        if len(shape) == 2:
+            shape = shape + (1,)
+        dtype = numpy.dtype(properties.dtype)
+        if extension.lower() == ".png" and _read_png_bit_depth(bytesio.read(26)) == 16:
+            dtype = numpy.dtype(numpy.uint16)
+        info = ImageInfo(
+            width=shape[1],
+            height=shape[0],
+            channels=shape[2],
+            dtype=dtype,
+            frames=frames,
+            reductions=_get_decode_reductions(extension),
+        )
+
+    bytesio.seek(0)
+    return info
+
+
+def _read_png_bit_depth(data: bytes) -> int:
+    # the IHDR chunk is always first, its bit depth is right after width and height
+    if data[:8] != b"\x89PNG\r\n\x1a\n" or data[12:16] != b"IHDR":
+        raise ValueError("Invalid PNG file: cannot find IHDR chunk.")
+    return data[24]
+
+
+def _convert_bgr_to_rgb(image: numpy.ndarray) -> numpy.ndarray:
+    # cv2 images are B-G-R(-A)
+    if image.ndim == 2 or image.shape[2] < 3:
+        return image
+    if image.shape[2] > 3:
+        return image[:, :, [2, 1, 0, 3]]
+    return image[:, :, 2::-1]
+
+
+def decode_image_from_bytes(
+    bytesio: BytesIO,
+    stride: int = 1,
+    keep_alpha: bool = False,
+) -> numpy.ndarray:
+    """
+    Return an R-G-B image in the native data type of its encoding from the given
+    bytes buffer (uint8, uint16, float16, float32).
+
+    When the format allows it, the image is downscaled while being decoded which is
+    much faster than a full decode; in which case the pixels are averaged instead
+    of being skipped.
+
+    Args:
+        bytesio: encoded image with a ``name`` attribute to retrieve its extension.
+        stride: only keep approximately every Nth pixel on each axis, reducing
+            the memory used by the returned image.
+        keep_alpha: return an R-G-B-A image if the image has an alpha channel,
+            see :func:`get_alpha_mask`.
+    """
+    LOGGER.debug(f"initial BytesIO size { sys.getsizeof(bytesio) / 1024**2}MB")
 
     extension = os.path.splitext(bytesio.name)[-1]
+    reduction, stride = _split_stride(stride, _get_decode_reductions(extension))
+
+    bytesio.seek(0)
+    is_png_16bit = (
+        extension.lower() == ".png" and _read_png_bit_depth(bytesio.read(26)) == 16
+    )
+    # make sure the buffer cursor is back at start
+    bytesio.seek(0)
 
     # imageio can't read exr that are not filepaths
-    if extension in [".exr", ".hdr"]:
+    # imageio (pillow) read 16bit R-G-B png as 8bit
+    if extension in [".exr", ".hdr"] or is_png_16bit:
+        import cv2
+
         byte_array = numpy.asarray(bytearray(bytesio.read()))
         image = cv2.imdecode(byte_array, cv2.IMREAD_UNCHANGED)
-        image = cv2.cvtColor(
-            image,
-            cv2.COLOR_BGR2RGB,
-        )
+        if image is None:
+            raise ValueError(f"Cannot decode image {bytesio.name}")
+        image = _convert_bgr_to_rgb(image)
+
+    elif reduction > 1:
+        import cv2
+
+        flags = getattr(cv2, f"IMREAD_REDUCED_COLOR_{reduction}")
+        # imageio doesn't apply the exif orientation, stay consistent with it
+        flags |= cv2.IMREAD_IGNORE_ORIENTATION
+        byte_array = numpy.asarray(bytearray(bytesio.read()))
+        image = cv2.imdecode(byte_array, flags)
+        if image is None:
+            raise ValueError(f"Cannot decode image {bytesio.name}")
+        image = _convert_bgr_to_rgb(image)
+        LOGGER.debug(f"decoded image reduced {reduction} times {image.shape}")
 
     else:
-        image = imageio.imread(bytesio)
+        import imageio.v3 as imageio
+
+        image = imageio.imread(bytesio.getvalue(), extension=extension)
+
+    if stride > 1:
+        image = image[::stride, ::stride, ...]
 
     if len(image.shape) == 2:
         image = image[:, :, numpy.newaxis]
-        image = numpy.repeat(image, 3, axis=2)
+
+    # gray images, with or without alpha
+    if image.shape[2] < 3:
+        gray_channels = [0, 0, 0] if image.shape[2] == 1 else [0, 0, 0, 1]
+        image = image[:, :, gray_channels]
 
     if image.shape[2] > 3:
-        image = image[:, :, :3]
+        image = image[:, :, :4] if keep_alpha else image[:, :, :3]
 
-    LOGGER.debug(f"initial ndarray size {sys.getsizeof(image) / 1024**2}MB")
-    image = colour.io.convert_bit_depth(image, "float32")
-    LOGGER.debug(f"float32 ndarray size {sys.getsizeof(image) / 1024**2}MB")
+    # copy if needed so the full resolution array can be freed
+    image = numpy.ascontiguousarray(image)
+    LOGGER.debug(f"{image.dtype} ndarray size {image.nbytes / 1024**2}MB")
     return image
+
+
+def convert_image_to_float(image: numpy.ndarray) -> numpy.ndarray:
+    """
+    Convert an image in any of the data type returned by :func:`decode_image_from_bytes`
+    to float32, integer types being normalized to the [0-1] range.
+    """
+    import colour.io
+
+    return colour.io.convert_bit_depth(image, "float32")
+
+
+def get_alpha_mask(
+    image: numpy.ndarray, threshold: float = 0.0
+) -> Optional[numpy.ndarray]:
+    """
+    Get which pixels of an image are visible according to its alpha channel.
+
+    Args:
+        image: R-G-B-A image in any of the data type returned by
+            :func:`decode_image_from_bytes`.
+        threshold: pixels with an alpha at or below it are not visible, in the [0-1]
+            range whatever the data type.
+
+    Returns:
+        boolean array of the image height and width, None if the image has no
+        alpha channel.
+    """
+    if image.ndim < 3 or image.shape[2] < 4:
+        return None
+
+    if numpy.issubdtype(image.dtype, numpy.integer):
+        # compare in the native type, avoiding a float copy of the channel
+        threshold = math.floor(threshold * numpy.iinfo(image.dtype).max)
+
+    return image[:, :, 3] > threshold
@@ -0,0 +1,364 @@
+"""
+Static layers of the chromaticity diagram shared by all the users.
+
+The spectral locus, the RGB background and the whitepoint of a diagram only depend
+on the diagram method and the colour matching functions, not on what the user submit.
+They are computed once per process and shared across all the streamlit sessions.
+"""
+
+import dataclasses
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import colour
+import colour.plotting
+import colour.plotting.diagrams
+import numpy
+from matplotlib.collections import LineCollection
+from matplotlib.patches import Polygon
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_CMFS = "CIE 1931 2 Degree Standard Observer"
+
+DEFAULT_BACKGROUND_SAMPLES = 256
+
+
+@dataclasses.dataclass(frozen=True)
+class DiagramLayers:
+    """
+    Precomputed data required to draw the static part of a chromaticity diagram.
+
+    All coordinates are expressed in the diagram method coordinate system.
+    """
+
+    method: str
+    samples: int
+
+    locus: numpy.ndarray
+    """
+    (N, 2) polyline of the spectral locus closed by the line of purples.
+    """
+
+    locus_colors: numpy.ndarray
+    """
+    (N, 3) RGB color of each vertex of ``locus``.
+    """
+
+    locus_boundary: numpy.ndarray
+    """
+    (M, 2) spectral locus without the line of purples, used as clipping path.
+    """
+
+    labels: numpy.ndarray
+    """
+    (L,) wavelengths labelled around the spectral locus.
+    """
+
+    labels_lines: numpy.ndarray
+    """
+    (L*2, 2) segments going from the locus to outside for each label.
+    """
+
+    labels_normals: numpy.ndarray
+    """
+    (L*2, 2) normal of the locus for each label segment point.
+    """
+
+    labels_colors: numpy.ndarray
+    """
+    (L*2, 3) RGB color of each label segment point.
+    """
+
+    background: numpy.ndarray
+    """
+    (samples, samples, 3) RGB raster of the diagram colours, covering the [0-1] range.
+    """
+
+    whitepoint: numpy.ndarray
+    """
+    (2,) coordinates of the plotting colourspace whitepoint.
+    """
+
+    def to_arrays(self) -> dict[str, numpy.ndarray]:
+        return {
+            field.name: numpy.asarray(getattr(self, field.name))
+            for field in dataclasses.fields(self)
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "DiagramLayers":
+        values = {field.name: arrays[field.name] for field in dataclasses.fields(cls)}
+        values["method"] = str(values["method"])
+        values["samples"] = int(values["samples"])
+        return cls(**values)
+
+
+def compute_diagram_layers(
+    method: str,
+    samples: int = DEFAULT_BACKGROUND_SAMPLES,
+) -> DiagramLayers:
+    """
+    Compute the static layers of the given diagram the same way ``colour`` does.
+
+    Args:
+        method: one of the ``colour.plotting.diagrams.METHODS_CHROMATICITY_DIAGRAM`` key.
+        samples: resolution of the background raster on one axis.
+    """
+    methods = colour.plotting.diagrams.METHODS_CHROMATICITY_DIAGRAM
+    method = colour.utilities.validate_method(method, tuple(methods))
+    cmfs = colour.utilities.first_item(
+        colour.plotting.filter_cmfs(DEFAULT_CMFS).values()
+    )
+    illuminant = colour.plotting.CONSTANTS_COLOUR_STYLE.colour.colourspace.whitepoint
+
+    XYZ_to_ij = methods[method]["XYZ_to_ij"]
+    ij_to_XYZ = methods[method]["ij_to_XYZ"]
+    xy_to_ij = methods[method]["xy_to_ij"]
+
+    lines_sl, lines_w = colour.plotting.diagrams.lines_spectral_locus(
+        cmfs, None, method
+    )
+    labels = colour.plotting.diagrams.LABELS_CHROMATICITY_DIAGRAM_DEFAULT[method]
+    labels = [label for label in labels if label in cmfs.wavelengths]
+
+    ii, jj = numpy.meshgrid(
+        numpy.linspace(0, 1, samples), numpy.linspace(1, 0, samples)
+    )
+    background = colour.algebra.normalise_maximum(
+        colour.plotting.XYZ_to_plotting_colourspace(
+            ij_to_XYZ(colour.utilities.tstack([ii, jj])), illuminant
+        ),
+        axis=-1,
+    )
+
+    return DiagramLayers(
+        method=method,
+        samples=samples,
+        locus=lines_sl["position"],
+        locus_colors=lines_sl["colour"],
+        locus_boundary=XYZ_to_ij(cmfs.values, illuminant),
+        labels=numpy.array(labels),
+        labels_lines=lines_w["position"],
+        labels_normals=lines_w["normal"],
+        labels_colors=lines_w["colour"],
+        background=background,
+        whitepoint=xy_to_ij(illuminant),
+    )
+
+
+class DiagramLayersRegistry:
+    """
+    Thread-safe, lazily populated, collection of :class:`DiagramLayers`.
+
+    Each layer is computed only once even if requested by multiple threads
+    at the same time. If a cache directory is given, layers are persisted as ``.npz``
+    so they don't need to be recomputed on the next process start.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self._cache_dir = cache_dir
+        self._layers: dict[tuple[str, int], DiagramLayers] = {}
+        self._locks: dict[tuple[str, int], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _get_cache_path(self, method: str, samples: int) -> Optional[Path]:
+        if not self._cache_dir:
+            return None
+        slug = method.lower().replace(" ", "-")
+        return (
+            self._cache_dir / f"diagram-{slug}-{samples}-colour{colour.__version__}.npz"
+        )
+
+    def _read_cache(self, path: Optional[Path]) -> Optional[DiagramLayers]:
+        if path is None or not path.exists():
+            return None
+        try:
+            with numpy.load(path) as arrays:
+                return DiagramLayers.from_arrays(arrays)
+        except Exception as error:
+            LOGGER.warning(f"ignoring invalid diagram cache {path}: {error}")
+            return None
+
+    def _write_cache(self, path: Optional[Path], layers: DiagramLayers):
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # write then rename so concurrent processes never read a partial file
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp.npz")
+            numpy.savez(tmp_path, **layers.to_arrays())
+            os.replace(tmp_path, path)
+        except OSError as error:
+            LOGGER.warning(f"cannot write diagram cache {path}: {error}")
+
+    def get(
+        self,
+        method: str,
+        samples: int = DEFAULT_BACKGROUND_SAMPLES,
+    ) -> DiagramLayers:
+        """
+        Get the layers for the given diagram method, computing them on first call.
+        """
+        key = (method.lower(), samples)
+
+        layers = self._layers.get(key)
+        if layers is not None:
+            return layers
+
+        with self._lock:
+            key_lock = self._locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # another thread might have computed it while we were waiting
+            layers = self._layers.get(key)
+            if layers is not None:
+                return layers
+
+            start_time = time.time()
+            cache_path = self._get_cache_path(method, samples)
+            layers = self._read_cache(cache_path)
+            if layers is None:
+                layers = compute_diagram_layers(method, samples)
+                self._write_cache(cache_path, layers)
+
+            LOGGER.debug(
+                f"diagram layers {key} loaded in {time.time() - start_time:.3f}s"
+            )
+            self._layers[key] = layers
+            return layers
+
+    def clear(self):
+        with self._lock:
+            self._layers.clear()
+
+
+def _get_cache_dir_from_env() -> Optional[Path]:
+    cache_dir = os.getenv("STCP_DIAGRAM_CACHE_DIR")
+    return Path(cache_dir) if cache_dir else None
+
+
+DIAGRAM_LAYERS = DiagramLayersRegistry(cache_dir=_get_cache_dir_from_env())
+"""
+Process-wide registry shared by all the sessions.
+"""
+
+
+@colour.plotting.override_style()
+def plot_chromaticity_diagram(
+    cmfs=DEFAULT_CMFS,
+    show_diagram_colours: bool = True,
+    show_spectral_locus: bool = True,
+    method: str = "CIE 1931",
+    **kwargs,
+):
+    """
+    Drop-in replacement of :func:`colour.plotting.plot_chromaticity_diagram`
+    which use the precomputed :data:`DIAGRAM_LAYERS`.
+
+    To use as ``chromaticity_diagram_callable`` of the colour plotting functions.
+    """
+    if cmfs != DEFAULT_CMFS:
+        return colour.plotting.diagrams.plot_chromaticity_diagram(
+            cmfs, show_diagram_colours, show_spectral_locus, method=method, **kwargs
+        )
+
+    style = colour.plotting.CONSTANTS_COLOUR_STYLE
+    layers = DIAGRAM_LAYERS.get(method)
+    method = layers.method
+
+    settings = {"uniform": True}
+    settings.update(kwargs)
+    _figure, axes = colour.plotting.artist(**settings)
+
+    if show_diagram_colours:
+        opacity = kwargs.get("diagram_opacity", 1)
+        clipping_path = kwargs.get("diagram_clipping_path")
+        polygon = Polygon(
+            layers.locus_boundary if clipping_path is None else clipping_path,
+            facecolor="none",
+            edgecolor="none",
+            zorder=style.zorder.background_polygon,
+        )
+        axes.add_patch(polygon)
+        image = axes.imshow(
+            layers.background,
+            interpolation="bilinear",
+            extent=(0, 1, 0, 1),
+            clip_path=None,
+            alpha=opacity,
+            zorder=style.zorder.background_polygon,
+        )
+        image.set_clip_path(polygon)
+
+    if show_spectral_locus:
+        locus_colors = kwargs.get("spectral_locus_colours")
+        if locus_colors is None:
+            locus_colors = style.colour.dark
+        opacity = kwargs.get("spectral_locus_opacity", 1)
+        use_rgb = str(locus_colors).upper() == "RGB"
+
+        axes.add_collection(
+            LineCollection(
+                numpy.reshape(
+                    numpy.concatenate([layers.locus[:-1], layers.locus[1:]], axis=1),
+                    (-1, 2, 2),
+                ),
+                colors=layers.locus_colors if use_rgb else locus_colors,
+                alpha=opacity,
+                zorder=style.zorder.background_line,
+            )
+        )
+        axes.add_collection(
+            LineCollection(
+                numpy.reshape(layers.labels_lines, (-1, 2, 2)),
+                colors=layers.labels_colors[::2] if use_rgb else locus_colors,
+                alpha=opacity,
+                zorder=style.zorder.background_line,
+            )
+        )
+
+        positions = layers.labels_lines[::2]
+        normals = layers.labels_normals[::2]
+        colors = layers.labels_colors[::2]
+        for index, label in enumerate(layers.labels):
+            axes.plot(
+                positions[index, 0],
+                positions[index, 1],
+                "o",
+                color=colors[index] if use_rgb else locus_colors,
+                alpha=opacity,
+                zorder=style.zorder.background_line,
+            )
+            axes.text(
+                positions[index, 0] + normals[index, 0] / 50 * 1.25,
+                positions[index, 1] + normals[index, 1] / 50 * 1.25,
+                label,
+                clip_on=True,
+                ha="left" if normals[index, 0] >= 0 else "right",
+                va="center",
+                fontsize="x-small-colour-science",
+                zorder=style.zorder.background_label,
+            )
+
+    if method == "cie 1931":
+        x_label, y_label = "CIE x", "CIE y"
+    elif method == "cie 1960 ucs":
+        x_label, y_label = "CIE u", "CIE v"
+    else:
+        x_label, y_label = "CIE u'", "CIE v'"
+
+    settings = {
+        "axes": axes,
+        "show": True,
+        "bounding_box": (0, 1, 0, 1),
+        "title": f"{method.upper()} Chromaticity Diagram - {DEFAULT_CMFS}",
+        "x_label": x_label,
+        "y_label": y_label,
+    }
+    settings.update(kwargs)
+    return colour.plotting.render(**settings)
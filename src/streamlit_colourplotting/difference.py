@@ -0,0 +1,364 @@
+"""
+Per-pixel color difference between two images of the same size.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import dataclasses
+import os
+import typing
+from typing import Callable
+from typing import Optional
+
+import numpy
+
+from streamlit_colourplotting.chromaticity import linearize_image
+from streamlit_colourplotting.core import rescale_image_fast
+
+if typing.TYPE_CHECKING:
+    from streamlit_colourplotting.colorlib import RgbColorspace
+
+CHUNK_SIZE = 2**18
+"""
+number of pixels converted at once, bounding the memory of the intermediate arrays
+to a few MB whatever the size of the images.
+"""
+
+PERCENTILES = (50, 90, 95, 99)
+
+HEATMAP_MAXIMUM = {"ΔE 2000": 10.0, "ΔE ITP": 20.0}
+"""
+difference mapped to the brightest color of the heatmap, per method. Fixed so two
+heatmaps can be compared.
+"""
+
+ITP_LUMINANCE = 100.0
+"""
+absolute luminance in cd/m² of the R-G-B value 1.0, as SDR images are usually
+graded for.
+"""
+
+_LAB_EPSILON = (6 / 29) ** 3
+
+
+def XYZ_to_Lab(XYZ: numpy.ndarray, whitepoint: numpy.ndarray) -> numpy.ndarray:
+    """
+    Same as ``colour.XYZ_to_Lab`` but in float32 on (3, N) arrays.
+
+    Args:
+        XYZ: (3, N) array of the X, Y and Z values.
+        whitepoint: xy chromaticity coordinates of the reference white.
+
+    Returns:
+        (3, N) array of the L*, a* and b* values.
+    """
+    import colour
+
+    white_XYZ = colour.xy_to_XYZ(whitepoint)[:, numpy.newaxis]
+    return _normalized_XYZ_to_Lab(XYZ / white_XYZ.astype(numpy.float32))
+
+
+def _normalized_XYZ_to_Lab(XYZ: numpy.ndarray) -> numpy.ndarray:
+    f = numpy.where(
+        XYZ > _LAB_EPSILON,
+        numpy.cbrt(XYZ),
+        XYZ * numpy.float32(1 / (3 * (6 / 29) ** 2)) + numpy.float32(4 / 29),
+    )
+    return numpy.stack(
+        [
+            116 * f[1] - 16,
+            500 * (f[0] - f[1]),
+            200 * (f[1] - f[2]),
+        ]
+    )
+
+
+def _RGB_to_Lab(RGB: numpy.ndarray, colorspace: RgbColorspace) -> numpy.ndarray:
+    """
+    Convert linear R-G-B values to CIE L*a*b* relative to the colorspace whitepoint.
+
+    Returns:
+        (3, N) array of the L*, a* and b* values.
+    """
+    import colour
+
+    whitepoint = colour.xy_to_XYZ(colorspace.whitepoint)
+    # normalize by the whitepoint in the same matrix multiplication
+    matrix = (colorspace.matrix_RGB_to_XYZ / whitepoint[:, numpy.newaxis]).astype(
+        numpy.float32
+    )
+    return _normalized_XYZ_to_Lab(matrix @ RGB.T)
+
+
+def _delta_E_CIE2000(Lab1: numpy.ndarray, Lab2: numpy.ndarray) -> numpy.ndarray:
+    """
+    Same as ``colour.difference.delta_E_CIE2000`` but in float32 on (3, N) arrays,
+    a few times faster.
+    """
+    L1, a1, b1 = Lab1
+    L2, a2, b2 = Lab2
+
+    def _get_c7_ratio(chroma):
+        chroma7 = chroma**7
+        return numpy.sqrt(chroma7 / (chroma7 + numpy.float32(25**7)))
+
+    C_bar = (numpy.hypot(a1, b1) + numpy.hypot(a2, b2)) * 0.5
+    G = 1.5 - 0.5 * _get_c7_ratio(C_bar)
+    a1 = a1 * G
+    a2 = a2 * G
+    C1 = numpy.hypot(a1, b1)
+    C2 = numpy.hypot(a2, b2)
+    h1 = numpy.arctan2(b1, a1) % numpy.float32(2 * numpy.pi)
+    h2 = numpy.arctan2(b2, a2) % numpy.float32(2 * numpy.pi)
+    C_product = C1 * C2
+    achromatic = C_product == 0
+
+    h_difference = h2 - h1
+    h_difference = numpy.where(
+        h_difference > numpy.pi,
+        h_difference - numpy.float32(2 * numpy.pi),
+        h_difference,
+    )
+    h_difference = numpy.where(
+        h_difference < -numpy.pi,
+        h_difference + numpy.float32(2 * numpy.pi),
+        h_difference,
+    )
+    h_difference[achromatic] = 0
+    delta_H = 2 * numpy.sqrt(C_product) * numpy.sin(h_difference * 0.5)
+
+    h_sum = h1 + h2
+    h_bar = numpy.where(
+        numpy.abs(h1 - h2) > numpy.pi,
+        numpy.where(
+            h_sum < 2 * numpy.pi,
+            h_sum + numpy.float32(2 * numpy.pi),
+            h_sum - numpy.float32(2 * numpy.pi),
+        ),
+        h_sum,
+    )
+    h_bar = numpy.where(achromatic, h_sum, h_bar * 0.5)
+
+    L_bar = (L1 + L2) * 0.5 - 50
+    C_bar = (C1 + C2) * 0.5
+
+    T = (
+        1
+        - 0.17 * numpy.cos(h_bar - numpy.float32(numpy.radians(30)))
+        + 0.24 * numpy.cos(2 * h_bar)
+        + 0.32 * numpy.cos(3 * h_bar + numpy.float32(numpy.radians(6)))
+        - 0.20 * numpy.cos(4 * h_bar - numpy.float32(numpy.radians(63)))
+    )
+    delta_theta = numpy.float32(numpy.radians(30)) * numpy.exp(
+        -(((numpy.degrees(h_bar) - 275) / 25) ** 2)
+    )
+    R_T = -2 * _get_c7_ratio(C_bar) * numpy.sin(2 * delta_theta)
+
+    L_bar = L_bar * L_bar
+    L_term = (L2 - L1) / (1 + 0.015 * L_bar / numpy.sqrt(20 + L_bar))
+    C_term = (C2 - C1) / (1 + 0.045 * C_bar)
+    H_term = delta_H / (1 + 0.015 * C_bar * T)
+
+    return numpy.sqrt(
+        L_term * L_term + C_term * C_term + H_term * H_term + R_T * C_term * H_term
+    )
+
+
+def _RGB_to_ICtCp(RGB: numpy.ndarray, colorspace: RgbColorspace) -> numpy.ndarray:
+    """
+    Convert linear R-G-B values to ITU-R BT.2100 ICtCp with the PQ transfer function.
+
+    Returns:
+        (3, N) array of the I, Ct and Cp values.
+    """
+    import colour
+    import colour.models.rgb.ictcp
+
+    from streamlit_colourplotting.colorlib import ChromaticAdaptationTransform
+
+    # ICtCp is defined from BT.2020 primaries, folded with the LMS conversion
+    matrix = colour.matrix_RGB_to_RGB(
+        colorspace,
+        colour.RGB_COLOURSPACES["ITU-R BT.2020"],
+        chromatic_adaptation_transform=ChromaticAdaptationTransform.get_default().value,
+    )
+    matrix = colour.models.rgb.ictcp.MATRIX_ICTCP_RGB_TO_LMS @ matrix
+    LMS = matrix.astype(numpy.float32) @ RGB.T
+
+    # SMPTE ST 2084 inverse EOTF, same constants as colour.models.eotf_inverse_ST2084
+    m1 = numpy.float32(2610 / 4096 / 4)
+    m2 = numpy.float32(2523 / 4096 * 128)
+    c1 = numpy.float32(3424 / 4096)
+    c2 = numpy.float32(2413 / 4096 * 32)
+    c3 = numpy.float32(2392 / 4096 * 32)
+    Y = numpy.abs(LMS * numpy.float32(ITP_LUMINANCE / 10000)) ** m1
+    LMS_p = numpy.sign(LMS) * ((c1 + c2 * Y) / (1 + c3 * Y)) ** m2
+
+    matrix = colour.models.rgb.ictcp.MATRIX_ICTCP_LMS_P_TO_ICTCP
+    return matrix.astype(numpy.float32) @ LMS_p
+
+
+def _delta_E_ITP(ICtCp1: numpy.ndarray, ICtCp2: numpy.ndarray) -> numpy.ndarray:
+    """
+    Same as ``colour.difference.delta_E_ITP`` on (3, N) arrays.
+    """
+    I, Ct, Cp = ICtCp2 - ICtCp1
+    Ct = Ct * 0.5
+    return 720 * numpy.sqrt(I * I + Ct * Ct + Cp * Cp)
+
+
+DIFFERENCE_METHODS: dict[
+    str,
+    tuple[
+        Callable[[numpy.ndarray, RgbColorspace], numpy.ndarray],
+        Callable[[numpy.ndarray, numpy.ndarray], numpy.ndarray],
+    ],
+] = {
+    "ΔE 2000": (_RGB_to_Lab, _delta_E_CIE2000),
+    "ΔE ITP": (_RGB_to_ICtCp, _delta_E_ITP),
+}
+"""
+color model to convert the pixels to and difference formula, per method name.
+"""
+
+
+@dataclasses.dataclass(frozen=True, eq=False)
+class DifferenceMap:
+    """
+    Color difference of each pixel between two images.
+    """
+
+    method: str
+    """
+    one of the :obj:`DIFFERENCE_METHODS` key.
+    """
+
+    values: numpy.ndarray
+    """
+    float32 array of the image height and width. NaN where a pixel is not finite in
+    either image.
+    """
+
+    mean: float
+    percentiles: dict[int, float]
+    maximum: float
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
+
+    def get_worst_pixels(self, count: int) -> numpy.ndarray:
+        """
+        Get the index in the flattened image of the pixels with the largest
+        difference, largest first.
+        """
+        values = numpy.nan_to_num(self.values.ravel(), nan=-1.0)
+        count = min(count, values.size - numpy.count_nonzero(numpy.isnan(self.values)))
+        if count <= 0:
+            return numpy.zeros(0, dtype=numpy.intp)
+        worst = numpy.argpartition(values, values.size - count)[values.size - count :]
+        return worst[numpy.argsort(values[worst])[::-1]]
+
+    def get_heatmap(self, target_width: int) -> numpy.ndarray:
+        """
+        Get a uint8 R-G-B thumbnail of the difference, each thumbnail pixel showing
+        the largest difference of the pixels it covers so isolated errors stay visible.
+        """
+        import matplotlib
+
+        height, width = self.values.shape
+        step = max(width // target_width, 1)
+        values = numpy.nan_to_num(self.values, nan=0.0)
+        # pad to a multiple of the step so the max can be taken over blocks
+        padded = numpy.zeros(
+            (-(-height // step) * step, -(-width // step) * step), dtype=numpy.float32
+        )
+        padded[:height, :width] = values
+        blocks = padded.reshape(padded.shape[0] // step, step, -1, step)
+        pooled = blocks.max(axis=3).max(axis=1)
+        pooled = rescale_image_fast(pooled, target_width)
+
+        normalized = numpy.clip(pooled / HEATMAP_MAXIMUM[self.method], 0, 1)
+        colors = matplotlib.colormaps["inferno"](normalized)[..., :3]
+        return numpy.round(colors * 255).astype(numpy.uint8)
+
+
+def compute_difference_map(
+    reference: numpy.ndarray,
+    compared: numpy.ndarray,
+    colorspace: RgbColorspace,
+    method: str,
+    mask: Optional[numpy.ndarray] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> DifferenceMap:
+    """
+    Compute the color difference of each pixel between two images, converting a
+    chunk of pixels at a time.
+
+    Args:
+        reference: R-G-B image in its native data type.
+        compared: R-G-B image of the same height and width as ``reference``.
+        colorspace: colorspace both images are encoded in.
+        method: one of the :obj:`DIFFERENCE_METHODS` key.
+        mask: boolean array of the image height and width, only the pixels where
+            it is True are compared, the others are NaN. None for all the pixels.
+        chunk_size: number of pixels converted at once.
+    """
+    if reference.shape[:2] != compared.shape[:2]:
+        raise ValueError(
+            f"images must have the same size, got {reference.shape[:2]} "
+            f"and {compared.shape[:2]}"
+        )
+    convert, get_difference = DIFFERENCE_METHODS[method]
+
+    shape = reference.shape[:2]
+    # gather then drop the alpha, slicing first would copy the whole image
+    reference = numpy.reshape(reference, (-1, reference.shape[-1]))
+    compared = numpy.reshape(compared, (-1, compared.shape[-1]))
+    pixels = None if mask is None else numpy.flatnonzero(mask)
+    values = numpy.empty(
+        len(reference) if pixels is None else len(pixels), dtype=numpy.float32
+    )
+
+    def _compute_chunk(start: int):
+        end = start + chunk_size
+        chunk = slice(start, end) if pixels is None else pixels[start:end]
+        converted = [
+            convert(
+                linearize_image(image[chunk, :3], colorspace).astype(
+                    numpy.float32, copy=False
+                ),
+                colorspace,
+            )
+            for image in (reference, compared)
+        ]
+        values[start:end] = get_difference(*converted)
+
+    # numpy releases the GIL, one chunk in flight per core bounds the memory
+    with concurrent.futures.ThreadPoolExecutor(os.cpu_count()) as executor:
+        # consume the results to raise the exceptions of the workers
+        list(executor.map(_compute_chunk, range(0, len(values), chunk_size)))
+
+    if pixels is not None:
+        visible_values = values
+        values = numpy.full(len(reference), numpy.nan, dtype=numpy.float32)
+        values[pixels] = visible_values
+    values = numpy.reshape(values, shape)
+    values.flags.writeable = False
+
+    finite = values[numpy.isfinite(values)]
+    if finite.size:
+        percentiles = numpy.percentile(finite, PERCENTILES)
+        mean, maximum = float(finite.mean()), float(finite.max())
+    else:
+        percentiles = [numpy.nan] * len(PERCENTILES)
+        mean = maximum = numpy.nan
+
+    return DifferenceMap(
+        method=method,
+        values=values,
+        mean=mean,
+        percentiles=dict(zip(PERCENTILES, map(float, percentiles))),
+        maximum=maximum,
+    )
@@ -0,0 +1,162 @@
+"""
+Statistics on the chromaticities of a series relative to colorspaces gamut and to
+the spectral locus.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import functools
+import json
+import typing
+from typing import Sequence
+
+import numpy
+
+from streamlit_colourplotting.chromaticity import XYZ_to_diagram_coordinates
+from streamlit_colourplotting.geometry import convex_hull
+from streamlit_colourplotting.geometry import points_in_convex_polygon
+
+if typing.TYPE_CHECKING:
+    from streamlit_colourplotting.chromaticity import PlotSeries
+    from streamlit_colourplotting.colorlib import RgbColorspace
+
+SPECTRAL_LOCUS_NAME = "Spectral Locus"
+
+DEFAULT_CMFS = "CIE 1931 2 Degree Standard Observer"
+"""
+colour matching functions used by the plotted diagram for the spectral locus.
+"""
+
+
+@functools.lru_cache
+def get_colorspace_gamut(colorspace: RgbColorspace, method: str) -> numpy.ndarray:
+    """
+    Get the triangle of the colorspace primaries in the given diagram coordinates.
+
+    Args:
+        colorspace: colorspace to get the primaries from.
+        method: one of the ``chromaticity.DIAGRAM_PROJECTIONS`` key.
+
+    Returns:
+        (3, 2) array of vertices in counter-clockwise order.
+    """
+    # some colorspaces use a rounded matrix that doesn't exactly match their
+    # primaries; use the matrix like the conversion of the plotted pixels.
+    XYZ = numpy.transpose(colorspace.matrix_RGB_to_XYZ)
+    return convex_hull(XYZ_to_diagram_coordinates(XYZ, method))
+
+
+@functools.lru_cache
+def get_spectral_locus_gamut(method: str, cmfs: str = DEFAULT_CMFS) -> numpy.ndarray:
+    """
+    Get the area of all the visible chromaticities in the given diagram coordinates.
+
+    The chromaticity diagrams are projective transforms of XYZ so the visible
+    chromaticities are exactly the convex hull of the spectral locus.
+
+    Args:
+        method: one of the ``chromaticity.DIAGRAM_PROJECTIONS`` key.
+        cmfs: name of the colour matching functions of the spectral locus.
+
+    Returns:
+        (N, 2) array of vertices in counter-clockwise order.
+    """
+    import colour
+
+    XYZ = colour.MSDS_CMFS[cmfs].values
+    # the XYZ of wavelengths at both end of the spectrum can be 0
+    XYZ = XYZ[numpy.sum(XYZ, axis=-1) > 0]
+    return convex_hull(XYZ_to_diagram_coordinates(XYZ, method))
+
+
+def get_gamuts(
+    colorspaces: Sequence[RgbColorspace],
+    method: str,
+) -> list[tuple[str, numpy.ndarray]]:
+    """
+    Get the name and polygon of the given colorspaces gamut followed by the
+    spectral locus, in the given diagram coordinates.
+    """
+    gamuts = {
+        colorspace.name: get_colorspace_gamut(colorspace, method)
+        for colorspace in colorspaces
+    }
+    gamuts[SPECTRAL_LOCUS_NAME] = get_spectral_locus_gamut(method)
+    return list(gamuts.items())
+
+
+@dataclasses.dataclass(frozen=True)
+class GamutStatistics:
+    """
+    Proportion of the points of a series outside of multiple gamuts.
+    """
+
+    label: str
+
+    points: int
+    """
+    number of points the proportions are computed from.
+    """
+
+    outside: dict[str, float]
+    """
+    gamut name and the proportion of points outside of it, in the [0-1] range.
+    """
+
+    def to_dict(self) -> dict:
+        return dataclasses.asdict(self)
+
+
+def compute_gamut_statistics(
+    series: PlotSeries,
+    gamuts: Sequence[tuple[str, numpy.ndarray]],
+    label: str,
+) -> GamutStatistics:
+    """
+    Compute the proportion of the points of the series outside of each gamut.
+
+    Points of a series with sizes are weighted by their size.
+
+    Args:
+        series: chromaticities in the same diagram coordinates as the gamuts.
+        gamuts: name and convex polygon in counter-clockwise order of each gamut.
+        label: name of the series in the statistics.
+    """
+    coordinates = series.coordinates
+    weights = series.sizes
+    valid = numpy.all(numpy.isfinite(coordinates), axis=-1)
+    if not numpy.all(valid):
+        coordinates = coordinates[valid]
+        weights = weights[valid] if weights is not None else None
+
+    total = len(coordinates) if weights is None else float(numpy.sum(weights))
+
+    outside = {}
+    for name, polygon in gamuts:
+        if not total:
+            outside[name] = 0.0
+            continue
+        outside_mask = ~points_in_convex_polygon(coordinates, polygon)
+        if weights is None:
+            outside[name] = numpy.count_nonzero(outside_mask) / total
+        else:
+            outside[name] = float(numpy.sum(weights[outside_mask])) / total
+
+    return GamutStatistics(label=label, points=len(coordinates), outside=outside)
+
+
+def gamut_statistics_to_json(
+    statistics: Sequence[GamutStatistics],
+    diagram_method: str,
+) -> str:
+    """
+    Serialize the given statistics to a JSON document.
+    """
+    return json.dumps(
+        {
+            "diagram_method": diagram_method,
+            "series": [single_statistics.to_dict() for single_statistics in statistics],
+        },
+        indent=4,
+    )
@@ -0,0 +1,197 @@
+"""
+Vectorized 2D geometry on chromaticity coordinates.
+"""
+
+from typing import Sequence
+
+import numpy
+
+SMALL_POLYGON_SIZE = 8
+"""
+polygons with up to this number of vertices test all their edges instead of searching.
+"""
+
+
+def _cross(origin: numpy.ndarray, a: numpy.ndarray, b: numpy.ndarray):
+    """
+    Z component of the cross product of the vectors origin->a and origin->b.
+
+    Positive if b is on the left of origin->a.
+    """
+    return (a[..., 0] - origin[..., 0]) * (b[..., 1] - origin[..., 1]) - (
+        a[..., 1] - origin[..., 1]
+    ) * (b[..., 0] - origin[..., 0])
+
+
+def _monotone_chain(points: numpy.ndarray) -> numpy.ndarray:
+    """
+    Andrew's monotone chain algorithm, in O(n log n).
+    """
+    # also sort the points by x then y
+    points = numpy.unique(points, axis=0)
+    if len(points) < 3:
+        return points
+
+    def _half_hull(sorted_points: list[list[float]]) -> list[list[float]]:
+        hull = []
+        for x, y in sorted_points:
+            while len(hull) >= 2:
+                (ox, oy), (ax, ay) = hull[-2], hull[-1]
+                if (ax - ox) * (y - oy) - (ay - oy) * (x - ox) > 0:
+                    break
+                hull.pop()
+            hull.append([x, y])
+        return hull
+
+    # python floats are much faster than numpy scalars in a loop
+    sorted_points = points.tolist()
+    lower = _half_hull(sorted_points)
+    upper = _half_hull(sorted_points[::-1])
+    # last point of each half is the first of the other
+    return numpy.array(lower[:-1] + upper[:-1])
+
+
+def _discard_interior_points(points: numpy.ndarray) -> numpy.ndarray:
+    """
+    Discard the points inside the polygon of the extreme points along the axes and
+    diagonals (Akl-Toussaint heuristic), as they cannot be on the hull.
+
+    Usually discard most points of a cloud, in a few vectorized passes.
+    """
+    x = points[:, 0]
+    y = points[:, 1]
+    extremes = points[
+        [
+            numpy.argmin(x),
+            numpy.argmax(x),
+            numpy.argmin(y),
+            numpy.argmax(y),
+            numpy.argmin(x + y),
+            numpy.argmax(x + y),
+            numpy.argmin(x - y),
+            numpy.argmax(x - y),
+        ]
+    ]
+    polygon = _monotone_chain(extremes)
+    if len(polygon) < 3:
+        return points
+
+    # points on the polygon edges are collinear with hull vertices, so can be
+    # discarded too.
+    outside = ~points_in_convex_polygon(points, polygon, tolerance=0.0)
+    return numpy.concatenate([polygon, points[outside]])
+
+
+def convex_hull(points: numpy.ndarray, chunk_size: int = 2**16) -> numpy.ndarray:
+    """
+    Compute the convex hull of the given points, in O(n log n).
+
+    Points are processed by chunks whose hulls are then merged, which bounds the
+    memory used for large sets of points.
+
+    Args:
+        points: (N, 2) array of coordinates. Non-finite coordinates are ignored.
+        chunk_size: maximum number of points processed at once.
+
+    Returns:
+        (M, 2) array of the hull vertices in counter-clockwise order, without
+        collinear vertices and without repeating the first vertex.
+    """
+    points = numpy.reshape(numpy.asarray(points, dtype=numpy.float64), (-1, 2))
+    points = points[numpy.all(numpy.isfinite(points), axis=-1)]
+
+    if len(points) > chunk_size:
+        return merge_convex_hulls(
+            [
+                convex_hull(points[start : start + chunk_size])
+                for start in range(0, len(points), chunk_size)
+            ]
+        )
+
+    if len(points) > SMALL_POLYGON_SIZE:
+        points = _discard_interior_points(points)
+    return _monotone_chain(points)
+
+
+def merge_convex_hulls(hulls: Sequence[numpy.ndarray]) -> numpy.ndarray:
+    """
+    Compute the convex hull of the union of the given hulls.
+
+    The hull of a set of points is the merge of the hulls of any split of those
+    points, so hulls can be computed by tiles or incrementally.
+
+    Args:
+        hulls: (M, 2) arrays of hull vertices, as returned by :func:`convex_hull`.
+    """
+    hulls = [hull for hull in hulls if len(hull)]
+    if not hulls:
+        return numpy.empty((0, 2), dtype=numpy.float64)
+    return _monotone_chain(numpy.concatenate(hulls))
+
+
+def points_in_convex_polygon(
+    points: numpy.ndarray,
+    polygon: numpy.ndarray,
+    tolerance: float = 1e-5,
+) -> numpy.ndarray:
+    """
+    Test which points are inside the given convex polygon, in O(n log m).
+
+    The edges of small polygons are all tested. For larger ones, the polygon is split in triangles fanning from its first vertex; each point is
+    assigned to the triangle of the same angle with a binary search, then tested
+    against the single polygon edge of that triangle.
+
+    Args:
+        points: (N, 2) array of coordinates.
+        polygon: (M, 2) array of the polygon vertices in counter-clockwise order,
+            as returned by :func:`convex_hull`.
+        tolerance: distance to the polygon under which points outside are
+            considered inside, to absorb floating point errors for points on edges.
+
+    Returns:
+        (N,) boolean array, True where the point is inside or on the polygon.
+    """
+    points = numpy.asarray(points)
+    if not numpy.issubdtype(points.dtype, numpy.floating):
+        points = points.astype(numpy.float64)
+    # computing in the points data type avoid copying them
+    polygon = numpy.asarray(polygon, dtype=points.dtype)
+    if len(polygon) < 3:
+        return numpy.zeros(len(points), dtype=bool)
+
+    if len(polygon) <= SMALL_POLYGON_SIZE:
+        inside = numpy.ones(len(points), dtype=bool)
+        for edge_start, edge_end in zip(polygon, numpy.roll(polygon, -1, axis=0)):
+            edge_length = numpy.linalg.norm(edge_end - edge_start)
+            inside &= _cross(edge_start, edge_end, points) >= -tolerance * edge_length
+        return inside
+
+    origin = polygon[0]
+    rays = polygon[1:] - origin
+    vectors = points - origin
+
+    def _angle(vectors: numpy.ndarray) -> numpy.ndarray:
+        # angle from the first ray, vertices of a convex polygon are in [0-pi]
+        cross = rays[0, 0] * vectors[..., 1] - rays[0, 1] * vectors[..., 0]
+        dot = rays[0, 0] * vectors[..., 0] + rays[0, 1] * vectors[..., 1]
+        return numpy.arctan2(cross, dot)
+
+    ray_angles = _angle(rays)
+    triangles = numpy.searchsorted(ray_angles, _angle(vectors), side="right") - 1
+    triangles = numpy.clip(triangles, 0, len(rays) - 2)
+
+    edge_start = polygon[1:-1][triangles]
+    edge_end = polygon[2:][triangles]
+    edge_length = numpy.linalg.norm(edge_end - edge_start, axis=-1)
+
+    # signed distance to each edge, positive on the inner side
+    inside = _cross(edge_start, edge_end, points) >= -tolerance * edge_length
+    # the first and last triangle are the only ones with an edge of the polygon
+    # on their side, the other triangles are within the angle of the polygon.
+    first_ray, last_ray = rays[0], rays[-1]
+    first_side = first_ray[0] * vectors[..., 1] - first_ray[1] * vectors[..., 0]
+    last_side = last_ray[0] * vectors[..., 1] - last_ray[1] * vectors[..., 0]
+    inside &= first_side >= -tolerance * numpy.linalg.norm(first_ray)
+    inside &= last_side <= tolerance * numpy.linalg.norm(last_ray)
+
+    return inside
@@ -0,0 +1,269 @@
+"""
+Decoded images shared by all the sessions and kept across reruns.
+
+Images are identified by the hash of their encoded bytes so the same file uploaded
+by multiple users is only decoded and stored once. Sessions only keep a small
+:class:`ImageHandle` on the stored image.
+"""
+
+import collections
+import dataclasses
+import functools
+import logging
+import os
+import threading
+import weakref
+from pathlib import Path
+from typing import Callable
+from typing import Optional
+
+import numpy
+
+from streamlit_colourplotting.core import ImageInfo
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class _StoreEntry:
+    array: numpy.ndarray
+    info: ImageInfo
+    stride: int
+    references: int = 0
+    spill_path: Optional[Path] = None
+
+    @property
+    def memory_nbytes(self) -> int:
+        # spilled arrays are memory-mapped and can be paged out by the OS
+        return 0 if self.spill_path else self.array.nbytes
+
+
+@dataclasses.dataclass
+class _KeyLock:
+    lock: threading.Lock = dataclasses.field(default_factory=threading.Lock)
+    waiters: int = 0
+
+
+class ImageHandle:
+    """
+    Reference to an image of an :class:`ImageStore`.
+
+    The image is kept in the store as long as one of its handles is alive.
+    """
+
+    def __init__(self, store: "ImageStore", key: str, info: ImageInfo, stride: int):
+        self._store = store
+        self.key = key
+        self.info = info
+        """
+        properties of the full resolution encoded image.
+        """
+        self.stride = stride
+        """
+        stride the image was decoded with to fit in the memory budget.
+        """
+        self._finalizer = weakref.finalize(self, store._release, key)
+
+    def get(self) -> numpy.ndarray:
+        """
+        Get the R-G-B image in its native data type. Must be considered read-only.
+        """
+        return self._store.get(self.key)
+
+    def get_getter(self) -> Callable[[], numpy.ndarray]:
+        """
+        Get a function returning the image like :meth:`get` but that doesn't keep
+        the handle, and so the image, alive. It raises a KeyError once the image
+        is removed from the store.
+        """
+        return functools.partial(self._store.get, self.key)
+
+    def release(self):
+        """
+        Release the reference on the image, the handle cannot be used anymore after.
+        """
+        self._finalizer()
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.key}>"
+
+
+class ImageStore:
+    """
+    Thread-safe, content-addressed, collection of decoded images.
+
+    When the images stored exceed the given budget, the least recently used images
+    without any handle are removed, then if a spill directory is given, the images
+    still referenced are written to it and memory-mapped back.
+
+    Args:
+        max_bytes: maximum memory used by all the images stored.
+        spill_dir: directory to write images to when above the budget.
+    """
+
+    def __init__(self, max_bytes: int, spill_dir: Optional[Path] = None):
+        self.max_bytes = max_bytes
+        self._spill_dir = spill_dir
+        self._entries: collections.OrderedDict[str, _StoreEntry] = (
+            collections.OrderedDict()
+        )
+        self._locks: dict[str, _KeyLock] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def used_bytes(self) -> int:
+        with self._lock:
+            return sum(entry.memory_nbytes for entry in self._entries.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def acquire(
+        self,
+        key: str,
+        load: Callable[[], numpy.ndarray],
+        info: ImageInfo,
+        stride: int = 1,
+    ) -> ImageHandle:
+        """
+        Get a handle on the image with the given key, loading it on first request.
+
+        Args:
+            key: unique identifier of the image content.
+            load: function returning the R-G-B image if not stored yet.
+            info: properties of the full resolution encoded image.
+            stride: stride the image is decoded with by ``load``.
+        """
+        with self._lock:
+            key_lock = self._locks.setdefault(key, _KeyLock())
+            key_lock.waiters += 1
+
+        try:
+            # don't block the whole store while an image is being decoded
+            with key_lock.lock:
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is not None:
+                        entry.references += 1
+                        self._entries.move_to_end(key)
+                        return ImageHandle(self, key, entry.info, entry.stride)
+
+                array = load()
+                array.flags.writeable = False
+
+                with self._lock:
+                    entry = _StoreEntry(array=array, info=info, stride=stride)
+                    entry.references += 1
+                    self._entries[key] = entry
+                    LOGGER.debug(f"stored image {key} ({array.nbytes / 1024**2:.1f}MB)")
+                    handle = ImageHandle(self, key, entry.info, entry.stride)
+                    self._enforce_budget()
+                    return handle
+        finally:
+            # also when load() raised, else the lock would be kept forever
+            with self._lock:
+                key_lock.waiters -= 1
+                if not key_lock.waiters:
+                    del self._locks[key]
+
+    def get(self, key: str) -> numpy.ndarray:
+        with self._lock:
+            self._entries.move_to_end(key)
+            return self._entries[key].array
+
+    def _release(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.references -= 1
+            self._enforce_budget()
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        if entry.spill_path:
+            # open memory-maps stay valid after unlinking on posix
+            try:
+                entry.spill_path.unlink()
+            except OSError as error:
+                LOGGER.warning(
+                    f"cannot remove spilled image {entry.spill_path}: {error}"
+                )
+        LOGGER.debug(f"removed image {key} from store")
+
+    def _spill(self, key: str, entry: _StoreEntry) -> bool:
+        spill_path = self._spill_dir / f"{key}.npy"
+        try:
+            self._spill_dir.mkdir(parents=True, exist_ok=True)
+            numpy.save(spill_path, entry.array)
+        except OSError as error:
+            LOGGER.warning(f"cannot spill image to {spill_path}: {error}")
+            return False
+
+        entry.array = numpy.load(spill_path, mmap_mode="r")
+        entry.spill_path = spill_path
+        LOGGER.debug(f"spilled image {key} to {spill_path}")
+        return True
+
+    def _enforce_budget(self):
+        used_bytes = self.used_bytes
+        if used_bytes <= self.max_bytes:
+            return
+
+        # least recently used first
+        for key, entry in list(self._entries.items()):
+            if used_bytes <= self.max_bytes:
+                return
+            if entry.references <= 0:
+                used_bytes -= entry.memory_nbytes
+                self._remove(key)
+
+        if not self._spill_dir:
+            if used_bytes > self.max_bytes:
+                LOGGER.warning(
+                    f"image store above budget with {used_bytes / 1024**2:.1f}MB "
+                    f"of images still in use"
+                )
+            return
+
+        for key, entry in list(self._entries.items()):
+            if used_bytes <= self.max_bytes:
+                return
+            if entry.spill_path is None:
+                nbytes = entry.memory_nbytes
+                if self._spill(key, entry):
+                    used_bytes -= nbytes
+
+
+def _create_image_store_from_env() -> ImageStore:
+    max_megabytes = os.getenv("STCP_IMAGE_STORE_MB")
+    if max_megabytes:
+        max_bytes = int(float(max_megabytes) * 1024**2)
+    else:
+        import psutil
+
+        max_bytes = psutil.virtual_memory().total // 4
+
+    spill_dir = os.getenv("STCP_IMAGE_STORE_SPILL_DIR")
+    spill_dir = Path(spill_dir) if spill_dir else None
+    LOGGER.debug(f"image store of {max_bytes / 1024**2:.0f}MB spilled to {spill_dir}")
+    return ImageStore(max_bytes=max_bytes, spill_dir=spill_dir)
+
+
+_LOCK = threading.Lock()
+_IMAGE_STORE: Optional[ImageStore] = None
+
+
+def get_image_store() -> ImageStore:
+    """
+    Get the process-wide store shared by all the sessions, created on first call.
+    """
+    global _IMAGE_STORE
+
+    with _LOCK:
+        if _IMAGE_STORE is None:
+            _IMAGE_STORE = _create_image_store_from_env()
+    return _IMAGE_STORE
@@ -0,0 +1,154 @@
+"""
+Process-wide memory budget shared by all the sessions to decode the submitted images.
+
+Decoding an image can take much more memory than its file size; without a budget a few
+users submitting large images at the same time can exhaust the server memory.
+"""
+
+import contextlib
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+from streamlit_colourplotting.core import ImageInfo
+
+LOGGER = logging.getLogger(__name__)
+
+
+class MemoryBudget:
+    """
+    Thread-safe accounting of the memory reserved to decode images.
+
+    Images too big for a single reservation are decoded at a lower resolution,
+    and reservations that don't fit in what's left of the budget wait for
+    the other ones to be released.
+
+    Args:
+        max_bytes: maximum memory all the reservations combined can use.
+        max_image_bytes: maximum memory a single reservation can use.
+            Default to half of ``max_bytes``.
+        max_concurrent: maximum number of reservations at the same time.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        max_image_bytes: Optional[int] = None,
+        max_concurrent: int = 2,
+    ):
+        self.max_bytes = max_bytes
+        self.max_image_bytes = min(max_image_bytes or max_bytes // 2, max_bytes)
+        self.max_concurrent = max_concurrent
+        self._used_bytes = 0
+        self._condition = threading.Condition()
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+
+    @property
+    def used_bytes(self) -> int:
+        return self._used_bytes
+
+    def get_stride(self, info: ImageInfo) -> int:
+        """
+        Get the smallest stride for which reading the given image fits in a reservation.
+
+        Raises:
+            ValueError: if the image cannot be read even at a lower resolution.
+        """
+        if info.estimate_read_nbytes(max(info.width, info.height)) > (
+            self.max_image_bytes
+        ):
+            raise ValueError(
+                f"Image of {info.width}x{info.height} would need "
+                f"{info.decoded_nbytes / 1024**2:.0f}MB to be decoded, the limit "
+                f"is {self.max_image_bytes / 1024**2:.0f}MB. Submit a smaller image."
+            )
+
+        stride = 1
+        while info.estimate_read_nbytes(stride) > self.max_image_bytes:
+            stride += 1
+        return stride
+
+    @contextlib.contextmanager
+    def reserve(self, nbytes: int, timeout: Optional[float] = None):
+        """
+        Context manager blocking until the given amount of memory is available.
+
+        Args:
+            nbytes: amount of memory to reserve in bytes.
+            timeout: maximum time in seconds to wait, None to wait indefinitely.
+
+        Raises:
+            ValueError: if the amount is above the maximum of a single reservation.
+            TimeoutError: if the memory was not available in time.
+        """
+        if nbytes > self.max_image_bytes:
+            raise ValueError(
+                f"Cannot reserve {nbytes / 1024**2:.0f}MB, "
+                f"the limit is {self.max_image_bytes / 1024**2:.0f}MB."
+            )
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def _remaining() -> Optional[float]:
+            return None if deadline is None else max(deadline - time.monotonic(), 0)
+
+        if not self._semaphore.acquire(timeout=_remaining()):
+            raise TimeoutError("Too many images are being decoded, retry later.")
+
+        try:
+            with self._condition:
+                if not self._condition.wait_for(
+                    lambda: self._used_bytes + nbytes <= self.max_bytes,
+                    _remaining(),
+                ):
+                    raise TimeoutError("Not enough memory available, retry later.")
+                self._used_bytes += nbytes
+
+            LOGGER.debug(
+                f"reserved {nbytes / 1024**2:.1f}MB, "
+                f"{self._used_bytes / 1024**2:.1f}MB in use"
+            )
+            try:
+                yield
+            finally:
+                with self._condition:
+                    self._used_bytes -= nbytes
+                    self._condition.notify_all()
+        finally:
+            self._semaphore.release()
+
+
+def _create_memory_budget_from_env() -> MemoryBudget:
+    max_megabytes = os.getenv("STCP_MEMORY_BUDGET_MB")
+    if max_megabytes:
+        max_bytes = int(float(max_megabytes) * 1024**2)
+    else:
+        import psutil
+
+        max_bytes = psutil.virtual_memory().total // 2
+
+    max_concurrent = int(os.getenv("STCP_MAX_CONCURRENT_DECODES", "2"))
+    budget = MemoryBudget(max_bytes=max_bytes, max_concurrent=max_concurrent)
+    LOGGER.debug(
+        f"memory budget of {max_bytes / 1024**2:.0f}MB "
+        f"for {max_concurrent} concurrent decodes"
+    )
+    return budget
+
+
+_LOCK = threading.Lock()
+_MEMORY_BUDGET: Optional[MemoryBudget] = None
+
+
+def get_memory_budget() -> MemoryBudget:
+    """
+    Get the process-wide budget shared by all the sessions, created on first call.
+    """
+    global _MEMORY_BUDGET
+
+    with _LOCK:
+        if _MEMORY_BUDGET is None:
+            _MEMORY_BUDGET = _create_memory_budget_from_env()
+    return _MEMORY_BUDGET
@@ -0,0 +1,192 @@
+"""
+Dominant colors of an image, found by clustering its pixels in CIE L*a*b*.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy
+
+from streamlit_colourplotting.chromaticity import PlotSeries
+from streamlit_colourplotting.chromaticity import TristimulusSeries
+from streamlit_colourplotting.chromaticity import XYZ_to_diagram_coordinates
+from streamlit_colourplotting.difference import XYZ_to_Lab
+
+SEED = 0
+"""
+the same pixels always give the same palette.
+"""
+
+BATCH_SIZE = 4096
+ITERATIONS = 64
+
+CHUNK_SIZE = 2**18
+"""
+number of points assigned to their nearest centroid at once.
+"""
+
+MAX_MARKER_SIZE = 40.0
+"""
+marker size factor of the most populated color, the area of the other markers
+being proportional to their population.
+"""
+
+
+def _get_nearest(points: numpy.ndarray, centroids: numpy.ndarray) -> numpy.ndarray:
+    """
+    Get the index of the nearest centroid of each point.
+
+    Args:
+        points: (3, N) array.
+        centroids: (K, 3) array.
+    """
+    # |p - c|² = |p|² - 2 p.c + |c|², the first term is the same for all centroids
+    squared_norms = numpy.einsum("ij,ij->i", centroids, centroids)[:, numpy.newaxis]
+    nearest = numpy.empty(points.shape[1], dtype=numpy.intp)
+    for start in range(0, points.shape[1], CHUNK_SIZE):
+        chunk = points[:, start : start + CHUNK_SIZE]
+        # (K, N) so the reduction is over the first axis, much faster than the last
+        distances = squared_norms - 2 * (centroids @ chunk)
+        nearest[start : start + CHUNK_SIZE] = numpy.argmin(distances, axis=0)
+    return nearest
+
+
+def _sum_by_cluster(
+    values: numpy.ndarray,
+    labels: numpy.ndarray,
+    count: int,
+) -> numpy.ndarray:
+    """
+    Sum the (D, N) values of the points of each cluster into a (K, D) array.
+    """
+    return numpy.stack(
+        [numpy.bincount(labels, weights=row, minlength=count) for row in values],
+        axis=-1,
+    )
+
+
+def _init_centroids(
+    points: numpy.ndarray,
+    count: int,
+    rng: numpy.random.Generator,
+) -> numpy.ndarray:
+    """
+    Pick the initial centroids among the given (3, N) points with k-means++, each
+    new centroid being more likely to be far from the already picked ones.
+    """
+    centroids = [points[:, rng.integers(points.shape[1])]]
+    distances = numpy.sum((points - centroids[0][:, numpy.newaxis]) ** 2, axis=0)
+    for _ in range(1, count):
+        total = distances.sum()
+        if total <= 0:
+            # less distinct points than centroids
+            index = rng.integers(points.shape[1])
+        else:
+            index = rng.choice(points.shape[1], p=distances / total)
+        centroids.append(points[:, index])
+        new_distances = numpy.sum((points - points[:, index : index + 1]) ** 2, axis=0)
+        distances = numpy.minimum(distances, new_distances)
+    return numpy.stack(centroids)
+
+
+def minibatch_kmeans(
+    points: numpy.ndarray,
+    count: int,
+    batch_size: int = BATCH_SIZE,
+    iterations: int = ITERATIONS,
+    seed: int = SEED,
+) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Cluster the given points with mini-batch k-means, each iteration only moving the
+    centroids toward the mean of a small random batch of points.
+
+    Args:
+        points: (3, N) float array of finite values.
+        count: number of clusters.
+        batch_size: number of points of each iteration.
+        iterations: number of batches.
+        seed: of the random batches and initial centroids.
+
+    Returns:
+        (K, 3) centroids and (N,) index of the cluster of each point.
+    """
+    rng = numpy.random.default_rng(seed)
+    size = points.shape[1]
+    batch_size = min(batch_size, size)
+
+    centroids = _init_centroids(
+        points[:, rng.choice(size, batch_size, replace=False)], count, rng
+    )
+    totals = numpy.zeros(count)
+    for _ in range(iterations):
+        batch = points[:, rng.choice(size, batch_size, replace=False)]
+        labels = _get_nearest(batch, centroids)
+        counts = numpy.bincount(labels, minlength=count)
+        totals += counts
+        # each centroid stays the mean of all the points ever assigned to it
+        updated = counts > 0
+        sums = _sum_by_cluster(batch, labels, count)
+        centroids[updated] += (
+            sums[updated] - counts[updated, numpy.newaxis] * centroids[updated]
+        ) / totals[updated, numpy.newaxis]
+
+    return centroids, _get_nearest(points, centroids)
+
+
+def compute_palette_series(
+    series: TristimulusSeries,
+    whitepoint: numpy.ndarray,
+    method: str,
+    count: int,
+    label: Optional[str] = None,
+) -> PlotSeries:
+    """
+    Get the dominant colors of the given tristimulus values, as a series with a
+    point per color sized by the number of values of that color.
+
+    Args:
+        series: tristimulus values to cluster.
+        whitepoint: xy chromaticity coordinates of the white of the colorspace the
+            values were converted from.
+        method: one of the ``chromaticity.DIAGRAM_PROJECTIONS`` key.
+        count: maximum number of colors.
+        label: name displayed in the legend.
+    """
+    XYZ = numpy.ascontiguousarray(series.XYZ.T, dtype=numpy.float32)
+    Lab = XYZ_to_Lab(XYZ, whitepoint)
+    finite = numpy.isfinite(Lab)
+    finite = finite[0] & finite[1] & finite[2]
+    if not numpy.all(finite):
+        XYZ, Lab = XYZ[:, finite], Lab[:, finite]
+    colors = series.colors[finite].T
+
+    count = min(count, Lab.shape[1])
+    if not count:
+        return PlotSeries(
+            coordinates=numpy.zeros((0, 2), dtype=numpy.float32),
+            colors=numpy.zeros((0, 3), dtype=numpy.float32),
+            label=label,
+            sizes=numpy.zeros(0),
+        )
+
+    _, labels = minibatch_kmeans(Lab, count)
+    populations = numpy.bincount(labels, minlength=count)
+    populated = populations > 0
+    populations = populations[populated]
+
+    # tristimulus values add up, the chromaticity of the mean is the one of the mix
+    XYZ = _sum_by_cluster(XYZ, labels, count)[populated]
+    colors = _sum_by_cluster(colors, labels, count)[populated]
+    colors = colors / populations[:, numpy.newaxis]
+    coordinates = XYZ_to_diagram_coordinates(XYZ, method)
+    sizes = MAX_MARKER_SIZE * populations / populations.max()
+
+    # smaller markers are drawn on top of the larger ones
+    order = numpy.argsort(-populations, kind="stable")
+    coordinates = coordinates[order].astype(numpy.float32)
+    colors = numpy.clip(colors[order], 0, 1).astype(numpy.float32)
+    sizes = sizes[order]
+    for array in (coordinates, colors, sizes):
+        array.flags.writeable = False
+    return PlotSeries(coordinates=coordinates, colors=colors, label=label, sizes=sizes)
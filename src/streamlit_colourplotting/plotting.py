@@ -0,0 +1,446 @@
+"""
+Generate the chromaticity diagram figure, independently of any streamlit session.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import functools
+import threading
+import typing
+from typing import Sequence
+
+import colour.plotting
+import matplotlib.colors
+import matplotlib.pyplot
+import matplotlib.style
+import numpy
+
+from streamlit_colourplotting import diagram
+from streamlit_colourplotting.chromaticity import PlotSeries
+from streamlit_colourplotting.core import transform_box
+from streamlit_colourplotting.geometry import convex_hull
+from streamlit_colourplotting.temperature import get_planckian_locus
+
+if typing.TYPE_CHECKING:
+    from streamlit_colourplotting.colorlib import RgbColorspace
+
+SERIES_COLORS = [
+    "#53DD97",
+    "#F44336",
+    "#2196F3",
+    "#FFC107",
+    "#9C27B0",
+    "#00BCD4",
+    "#FF5722",
+    "#8BC34A",
+]
+"""
+color of each series when plotting multiple ones.
+"""
+
+RASTER_DPI = 200
+"""
+resolution the markers are rasterized for, should match the resolution the figure is
+saved with.
+"""
+
+PLANCKIAN_LOCUS_LABELS = (1500, 2000, 2500, 3000, 4000, 5000, 6500, 10000)
+"""
+temperatures in kelvin marked with a tick and a label on the Planckian locus.
+"""
+
+PLANCKIAN_LOCUS_TICK_DUV = 0.02
+"""
+half-length of the ticks on the Planckian locus, as a distance to the locus.
+"""
+
+RENDER_LOCK = threading.RLock()
+"""
+Matplotlib pyplot and style context are global to the process; this make sure
+only one thread is generating a figure at a time.
+"""
+
+
+@dataclasses.dataclass(frozen=True)
+class PlotSettings:
+    """
+    Snapshot of all the options affecting the look of the generated plot.
+    """
+
+    colorspace: RgbColorspace
+    """
+    colorspace the plotted image is encoded in.
+    """
+
+    diagram_method: str = "CIE 1976 UCS"
+
+    figure_colorspaces: tuple[tuple[RgbColorspace, str], ...] = ()
+    """
+    colorspaces gamut to draw with their associated hexadecimal color.
+    """
+
+    scatter_size: float = 25.0
+    scatter_color: str = "RGB"
+    """
+    hexadecimal color or "RGB" to use the color each marker represent.
+    """
+
+    scatter_alpha: float = 0.85
+    marker_style: typing.Union[str, int] = "o"
+
+    scatter_outline: bool = False
+    """
+    draw the convex hull of each series as a single line instead of each point.
+    """
+
+    scatter_raster: bool = False
+    """
+    draw the markers as squares in an image instead of individual shapes, which can
+    plot millions of points in a fraction of the time.
+    """
+
+    raster_aggregate: str = "last"
+    """
+    how the colors of the points in the same raster pixel are combined, see
+    :func:`rasterize_points`.
+    """
+
+    locus_show: bool = True
+    locus_color: str = "RGB"
+    """
+    hexadecimal color or "RGB" to use the color each wavelength represent.
+    """
+
+    locus_alpha: float = 1.0
+    locus_background: bool = False
+
+    show_whitepoints: bool = True
+    show_pointer_gamut: bool = False
+    pointer_gamut_color: str = "#555555"
+    pointer_gamut_alpha: float = 1.0
+
+    show_planckian_locus: bool = False
+    planckian_locus_color: str = "#222222"
+    planckian_locus_alpha: float = 1.0
+
+    show_legend: bool = True
+    show_axes: bool = True
+    style: dict = dataclasses.field(default_factory=dict)
+    """
+    matplotlib rcParams to use for the figure.
+    """
+
+    show_grid: bool = False
+    grid_color: str = "#CACACA"
+    grid_alpha: float = 0.5
+
+    axes_scale: float = 1.0
+    axes_offset_x: float = 0.0
+    axes_offset_y: float = 0.0
+
+
+def rasterize_points(
+    coordinates: numpy.ndarray,
+    colors: numpy.ndarray,
+    alpha: float,
+    bounds: tuple[float, float, float, float],
+    shape: tuple[int, int],
+    aggregate: str = "last",
+) -> numpy.ndarray:
+    """
+    Draw each point as a single pixel of an R-G-B-A image, in O(points + pixels).
+
+    The colors of the points falling in the same pixel are combined with one of
+    the following aggregate:
+
+    - ``last``: the point drawn last is on top, like with a scatter.
+    - ``mean``: average color of the points.
+    - ``saturated``: color of the most saturated point.
+
+    Args:
+        coordinates: (N, 2) array of x, y coordinates.
+        colors: (N, 3) array of R-G-B color of each point, or a single (3,) color.
+        alpha: opacity of the pixels with points.
+        bounds: xmin, xmax, ymin, ymax coordinates covered by the image.
+        shape: height, width of the image in pixels.
+        aggregate: how to combine the colors of the points in the same pixel.
+
+    Returns:
+        (height, width, 4) float32 image with the first row at the top (ymax).
+    """
+    x_min, x_max, y_min, y_max = bounds
+    height, width = shape
+    image = numpy.zeros((height, width, 4), dtype=numpy.float32)
+
+    columns = (coordinates[..., 0] - x_min) * (width / (x_max - x_min))
+    rows = (y_max - coordinates[..., 1]) * (height / (y_max - y_min))
+    inside = (columns >= 0) & (columns < width) & (rows >= 0) & (rows < height)
+    columns = columns[inside].astype(numpy.intp)
+    rows = rows[inside].astype(numpy.intp)
+
+    colors = numpy.asarray(colors)
+    if colors.ndim == 1 or aggregate == "last":
+        if colors.ndim > 1:
+            colors = colors[inside]
+        # on duplicate indices the last assigned value is kept
+        image[rows, columns, :3] = colors
+        image[rows, columns, 3] = alpha
+        return image
+
+    colors = colors[inside]
+    pixels = rows * width + columns
+    flat_image = image.reshape(-1, 4)
+
+    if aggregate == "mean":
+        counts = numpy.bincount(pixels, minlength=height * width)
+        occupied = counts > 0
+        for channel in range(3):
+            sums = numpy.bincount(
+                pixels, weights=colors[:, channel], minlength=height * width
+            )
+            flat_image[occupied, channel] = sums[occupied] / counts[occupied]
+        flat_image[occupied, 3] = alpha
+
+    elif aggregate == "saturated":
+        saturation = numpy.max(colors, axis=-1) - numpy.min(colors, axis=-1)
+        pixel_saturation = numpy.full(height * width, -1.0, dtype=saturation.dtype)
+        numpy.maximum.at(pixel_saturation, pixels, saturation)
+        # points tied for the same pixel are deterministically resolved by order
+        winners = saturation == pixel_saturation[pixels]
+        flat_image[pixels[winners], :3] = colors[winners]
+        flat_image[pixels[winners], 3] = alpha
+
+    else:
+        raise ValueError(f"Unsupported aggregate {aggregate}")
+
+    return image
+
+
+def _get_raster_shape(
+    axes: matplotlib.pyplot.Axes,
+    marker_size: float,
+) -> tuple[int, int]:
+    """
+    Get the number of pixels of a raster covering the axes, one pixel per marker.
+
+    Args:
+        marker_size: area of the markers in points^2, like for a scatter.
+    """
+    figure_width, figure_height = axes.figure.get_size_inches()
+    position = axes.get_position()
+    # diameter of the markers in output pixels
+    marker_pixels = max(numpy.sqrt(marker_size) * RASTER_DPI / 72, 1.0)
+    width = figure_width * position.width * RASTER_DPI / marker_pixels
+    height = figure_height * position.height * RASTER_DPI / marker_pixels
+    return max(round(height), 1), max(round(width), 1)
+
+
+def _plot_planckian_locus(axes: matplotlib.pyplot.Axes, settings: PlotSettings):
+    """
+    Draw the Planckian locus with ticks perpendicular to it at a few temperatures.
+    """
+    style = {
+        "color": settings.planckian_locus_color,
+        "alpha": settings.planckian_locus_alpha,
+        "zorder": 1,
+    }
+    locus = get_planckian_locus(settings.diagram_method)
+    axes.plot(locus[:, 0], locus[:, 1], linewidth=1, label="Planckian Locus", **style)
+
+    temperatures = numpy.array(PLANCKIAN_LOCUS_LABELS, dtype=numpy.float64)
+    ticks_start = get_planckian_locus(
+        settings.diagram_method, temperatures, duv=-PLANCKIAN_LOCUS_TICK_DUV
+    )
+    ticks_end = get_planckian_locus(
+        settings.diagram_method, temperatures, duv=PLANCKIAN_LOCUS_TICK_DUV
+    )
+    for temperature, start, end in zip(PLANCKIAN_LOCUS_LABELS, ticks_start, ticks_end):
+        axes.plot([start[0], end[0]], [start[1], end[1]], linewidth=0.75, **style)
+        axes.annotate(
+            f"{temperature}K",
+            xy=start,
+            fontsize="x-small",
+            ha="center",
+            va="top",
+            **style,
+        )
+
+
+def generate_plot(
+    series: Sequence[PlotSeries],
+    settings: PlotSettings,
+) -> tuple[matplotlib.pyplot.Figure, matplotlib.pyplot.Axes]:
+    """
+    Generate the matplotlib graph scattering the given chromaticities.
+
+    When multiple series are given, each one use a distinct color and is labelled
+    in the legend.
+
+    When outlines are requested, only the convex hull of each series is drawn
+    so the rendering cost doesn't depend on the number of points.
+
+    When rasterized, the marker style and the size of each point are ignored.
+
+    Args:
+        series: chromaticities to scatter, computed for the diagram method of the settings.
+        settings: options configuring the look of the graph.
+    """
+    # use the process-wide precomputed locus and background instead of
+    # letting colour recompute them for every plot.
+    chromaticity_diagram_callable = functools.partial(
+        colour.plotting.models.plot_RGB_colourspaces_in_chromaticity_diagram,
+        chromaticity_diagram_callable=diagram.plot_chromaticity_diagram,
+    )
+
+    plot_settings = {}
+    if settings.figure_colorspaces:
+        colors = [color for _, color in settings.figure_colorspaces]
+        if len(colors) == 1:
+            # ensure the list is always of len 2 at minimum
+            colors.append("#000000")
+        color_map = matplotlib.colors.LinearSegmentedColormap.from_list("user", colors)
+        plot_settings["colour_cycle_map"] = color_map
+
+    # same as colour.plotting.plot_RGB_chromaticities_in_chromaticity_diagram
+    # but we scatter the chromaticities ourselves.
+    kwargs = {
+        "method": settings.diagram_method,
+        "colourspaces": [colorspace for colorspace, _ in settings.figure_colorspaces],
+        # styling
+        "show_spectral_locus": settings.locus_show,
+        "spectral_locus_colours": settings.locus_color,
+        "spectral_locus_opacity": settings.locus_alpha,
+        "show_diagram_colours": settings.locus_background,
+        "show_whitepoints": settings.show_whitepoints,
+        "show_pointer_gamut": settings.show_pointer_gamut,
+        "pointer_gamut_colours": settings.pointer_gamut_color,
+        "pointer_gamut_opacity": settings.pointer_gamut_alpha,
+        "transparent_background": False,
+        # prevent calling show()
+        "standalone": True,
+        "legend": settings.show_legend,
+        "axes_visible": settings.show_axes,
+        "aspect": "equal",
+        **plot_settings,
+    }
+
+    # computed before waiting for the render lock
+    outlines = (
+        [convex_hull(single_series.coordinates) for single_series in series]
+        if settings.scatter_outline
+        else None
+    )
+
+    with RENDER_LOCK, matplotlib.style.context(settings.style):
+        figure, axes = colour.plotting.artist(**{"uniform": True, **kwargs})
+
+        chromaticity_diagram_callable(
+            **{
+                **kwargs,
+                "axes": axes,
+                "show": False,
+                # the source colorspace is always drawn
+                "colourspaces": [settings.colorspace, *kwargs["colourspaces"]],
+            }
+        )
+
+        bounds_x_min, bounds_x_max = axes.get_xlim()
+        bounds_y_min, bounds_y_max = axes.get_ylim()
+
+        view_box = transform_box(
+            bounds_x_min,
+            bounds_x_max,
+            bounds_y_min,
+            bounds_y_max,
+            scale=settings.axes_scale,
+            offset_x=settings.axes_offset_x,
+            offset_y=settings.axes_offset_y,
+        )
+
+        for index, single_series in enumerate(series):
+            if len(series) > 1:
+                color = SERIES_COLORS[index % len(SERIES_COLORS)]
+                label = single_series.label
+            elif settings.scatter_color.upper() == "RGB":
+                color = single_series.colors
+                label = None
+            else:
+                color = settings.scatter_color
+                label = None
+
+            if outlines is not None:
+                # a line has a single color, can't use the one of each point
+                outline_color = color if isinstance(color, str) else SERIES_COLORS[0]
+                # close the polyline
+                outline = numpy.concatenate([outlines[index], outlines[index][:1]])
+                axes.plot(
+                    outline[..., 0],
+                    outline[..., 1],
+                    color=outline_color,
+                    alpha=settings.scatter_alpha,
+                    linewidth=2,
+                    zorder=0,
+                    label=label,
+                )
+                continue
+
+            if settings.scatter_raster:
+                image = rasterize_points(
+                    single_series.coordinates,
+                    (
+                        matplotlib.colors.to_rgb(color)
+                        if isinstance(color, str)
+                        else color
+                    ),
+                    alpha=settings.scatter_alpha,
+                    bounds=view_box,
+                    shape=_get_raster_shape(axes, settings.scatter_size),
+                    aggregate=settings.raster_aggregate,
+                )
+                axes.imshow(
+                    image,
+                    extent=view_box,
+                    origin="upper",
+                    interpolation="nearest",
+                    zorder=0,
+                )
+                if label:
+                    # images are not displayed in the legend
+                    axes.scatter([], [], c=color, marker="s", label=label)
+                continue
+
+            axes.scatter(
+                single_series.coordinates[..., 0],
+                single_series.coordinates[..., 1],
+                s=(
+                    settings.scatter_size
+                    if single_series.sizes is None
+                    else settings.scatter_size * single_series.sizes
+                ),
+                c=color,
+                alpha=settings.scatter_alpha,
+                marker=settings.marker_style,
+                zorder=0,
+                label=label,
+            )
+
+        if settings.show_planckian_locus:
+            _plot_planckian_locus(axes, settings)
+
+        figure, axes = colour.plotting.render(**{**kwargs, "axes": axes, "show": True})
+
+        bounds_x_min, bounds_x_max, bounds_y_min, bounds_y_max = view_box
+        axes.set_xlim(bounds_x_min, bounds_x_max)
+        axes.set_ylim(bounds_y_min, bounds_y_max)
+
+        if settings.show_grid:
+            # NOTE: doesn't work anyway cause colour use negative zorder
+            axes.set_axisbelow(True)
+            axes.grid(
+                visible=settings.show_grid,
+                alpha=settings.grid_alpha,
+                color=settings.grid_color,
+            )
+
+    return figure, axes
@@ -0,0 +1,232 @@
+"""
+Read the frames of a video or of a zip of an image sequence one at a time.
+
+Frames are decoded when iterated and never kept, so whole shots can be processed
+in a constant amount of memory.
+"""
+
+import contextlib
+import io
+import logging
+import math
+import os
+import re
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import Iterator
+from typing import Optional
+from typing import Sequence
+
+import numpy
+
+from streamlit_colourplotting.core import ImageInfo
+from streamlit_colourplotting.core import decode_image_from_bytes
+from streamlit_colourplotting.core import probe_image_from_bytes
+from streamlit_colourplotting.memory import MemoryBudget
+
+LOGGER = logging.getLogger(__name__)
+
+VIDEO_EXTENSIONS = [".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v"]
+
+ARCHIVE_EXTENSIONS = [".zip"]
+
+
+def _natural_sort_key(name: str) -> list:
+    # so "frame.10.png" is after "frame.9.png"
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+class FrameSequence:
+    """
+    Frames of an encoded sequence, decoded on iteration.
+    """
+
+    def __len__(self) -> int:
+        """
+        Number of frames in the sequence, might be an estimation for videos.
+        """
+        raise NotImplementedError()
+
+    def count_frames(self, frame_step: int = 1) -> int:
+        """
+        Number of frames iterated with the given frame step.
+        """
+        return math.ceil(len(self) / frame_step)
+
+    def iter_frames(
+        self,
+        frame_step: int = 1,
+        stride: int = 1,
+        budget: Optional[MemoryBudget] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[numpy.ndarray]:
+        """
+        Decode the frames one after the other.
+
+        Args:
+            frame_step: only decode every Nth frame.
+            stride: only keep every Nth pixel on each axis of the frames.
+            budget: memory budget to decode the frames within.
+            timeout: maximum time in seconds to wait for memory to decode a frame.
+
+        Returns:
+            R-G-B images in the native data type of their encoding.
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class VideoSequence(FrameSequence):
+    """
+    Frames of a video decoded with OpenCV.
+
+    Args:
+        data: the encoded video.
+        extension: file extension of the video, with the dot.
+    """
+
+    def __init__(self, data: bytes, extension: str):
+        import cv2
+
+        # OpenCV can only read videos from disk
+        with tempfile.NamedTemporaryFile(suffix=extension, delete=False) as file:
+            file.write(data)
+        self._path = Path(file.name)
+
+        self._capture = cv2.VideoCapture(str(self._path))
+        if not self._capture.isOpened():
+            self.close()
+            raise ValueError(f"Cannot decode video with extension {extension}")
+
+        self.info = ImageInfo(
+            width=int(self._capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            height=int(self._capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            channels=3,
+            dtype=numpy.dtype(numpy.uint8),
+            frames=int(self._capture.get(cv2.CAP_PROP_FRAME_COUNT)),
+        )
+
+    def __len__(self) -> int:
+        return self.info.frames
+
+    def iter_frames(
+        self,
+        frame_step: int = 1,
+        stride: int = 1,
+        budget: Optional[MemoryBudget] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[numpy.ndarray]:
+        # a single frame is decoded at a time, reserve it for the whole iteration
+        reservation = (
+            budget.reserve(self.info.frame_nbytes, timeout=timeout)
+            if budget
+            else contextlib.nullcontext()
+        )
+        with reservation:
+            index = 0
+            while True:
+                # grab without retrieving skip the color conversion of the frame
+                if not self._capture.grab():
+                    return
+                if index % frame_step == 0:
+                    retrieved, frame = self._capture.retrieve()
+                    if not retrieved:
+                        return
+                    # BGR to RGB
+                    yield numpy.ascontiguousarray(frame[::stride, ::stride, 2::-1])
+                index += 1
+
+    def close(self):
+        if getattr(self, "_capture", None) is not None:
+            self._capture.release()
+        with contextlib.suppress(OSError):
+            self._path.unlink()
+
+
+class ZipSequence(FrameSequence):
+    """
+    Images of a zip archive, sorted by name, decoded as frames.
+
+    Args:
+        data: the zip archive.
+        extensions: file extension of the images to read in the archive, other
+            files are ignored.
+    """
+
+    def __init__(self, data: bytes, extensions: Sequence[str]):
+        self._zipfile = zipfile.ZipFile(io.BytesIO(data))
+        extensions = [extension.lower() for extension in extensions]
+        self._names = sorted(
+            [
+                info.filename
+                for info in self._zipfile.infolist()
+                if not info.is_dir()
+                and not Path(info.filename).name.startswith(".")
+                and not info.filename.startswith("__MACOSX")
+                and os.path.splitext(info.filename)[-1].lower() in extensions
+            ],
+            key=_natural_sort_key,
+        )
+        if not self._names:
+            raise ValueError(
+                f"No image found in archive, supported extensions are {extensions}"
+            )
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def iter_frames(
+        self,
+        frame_step: int = 1,
+        stride: int = 1,
+        budget: Optional[MemoryBudget] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[numpy.ndarray]:
+        for name in self._names[::frame_step]:
+            bytesio = io.BytesIO(self._zipfile.read(name))
+            bytesio.name = name
+
+            if not budget:
+                yield decode_image_from_bytes(bytesio, stride=stride)
+                continue
+
+            info = probe_image_from_bytes(bytesio)
+            frame_stride = max(stride, budget.get_stride(info))
+            with budget.reserve(
+                info.estimate_read_nbytes(frame_stride), timeout=timeout
+            ):
+                frame = decode_image_from_bytes(bytesio, stride=frame_stride)
+            yield frame
+
+    def close(self):
+        self._zipfile.close()
+
+
+def open_frame_sequence(
+    data: bytes,
+    name: str,
+    image_extensions: Sequence[str],
+) -> FrameSequence:
+    """
+    Open the given video or zip archive of images.
+
+    Args:
+        data: the encoded video or zip archive.
+        name: file name of the data, used to retrieve its type.
+        image_extensions: file extension of the images to read in archives.
+    """
+    extension = os.path.splitext(name)[-1].lower()
+    if extension in ARCHIVE_EXTENSIONS:
+        return ZipSequence(data, image_extensions)
+    if extension in VIDEO_EXTENSIONS:
+        return VideoSequence(data, extension)
+    raise ValueError(f"Unsupported sequence extension {extension}")
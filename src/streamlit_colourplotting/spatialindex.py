@@ -0,0 +1,252 @@
+"""
+Spatial index over the chromaticity coordinates of all the pixels of an image, to
+find the pixels in a region of the diagram without testing every pixel.
+"""
+
+from __future__ import annotations
+
+import typing
+from typing import Callable
+
+import numpy
+
+from streamlit_colourplotting.chromaticity import XYZ_to_diagram_coordinates
+from streamlit_colourplotting.geometry import points_in_convex_polygon
+
+if typing.TYPE_CHECKING:
+    from streamlit_colourplotting.chromaticity import TristimulusPyramid
+
+MAX_BINS = 256
+"""
+cells ids fit in 16 bits so sorting the points by cell is a linear radix sort.
+"""
+
+
+class ChromaticityIndex:
+    """
+    Uniform grid over chromaticity coordinates, mapped back to the pixels they
+    come from.
+
+    Points are stored sorted by cell so the points of a set of cells are a few
+    contiguous ranges. A query takes the cells entirely inside the region as is and
+    only tests the points of the cells crossed by the region boundary.
+
+    Args:
+        coordinates: (N, 2) chromaticity coordinates. Non-finite coordinates are
+            never part of a region.
+        pixels: (N,) index of the pixel of each coordinate in the flattened image.
+        shape: height and width of the image.
+        bins: number of cells on each axis of the grid, up to :obj:`MAX_BINS`.
+    """
+
+    def __init__(
+        self,
+        coordinates: numpy.ndarray,
+        pixels: numpy.ndarray,
+        shape: tuple[int, int],
+        bins: int = MAX_BINS,
+    ):
+        if not 0 < bins <= MAX_BINS:
+            raise ValueError(f"bins must be in [1-{MAX_BINS}], got {bins}")
+
+        if not numpy.all(numpy.isfinite(coordinates)):
+            finite = numpy.isfinite(coordinates)
+            valid = finite[:, 0] & finite[:, 1]
+            coordinates = coordinates[valid]
+            pixels = pixels[valid]
+
+        self.shape = shape
+        self.bins = bins
+
+        if len(coordinates):
+            # reductions along the short last axis are slow, reduce each column instead
+            minimum = numpy.array(
+                [float(coordinates[:, axis].min()) for axis in (0, 1)]
+            )
+            maximum = numpy.array(
+                [float(coordinates[:, axis].max()) for axis in (0, 1)]
+            )
+        else:
+            minimum = maximum = numpy.zeros(2)
+        cell_size = numpy.maximum((maximum - minimum) / bins, 1e-6)
+        # cell edges on each axis, computed like the cell of each point
+        self._edges = [
+            minimum[axis] + cell_size[axis] * numpy.arange(bins + 1) for axis in (0, 1)
+        ]
+        # points are binned in their own data type, so can end up in a cell next to
+        # the one of their exact value.
+        self._margin = max(float(numpy.max(cell_size)) * 0.01, 1e-5)
+
+        scale = (1.0 / cell_size).astype(coordinates.dtype)
+        cells = (coordinates - minimum.astype(coordinates.dtype)) * scale
+        cells = numpy.clip(cells, 0, bins - 1).astype(numpy.uint16)
+        cell_ids = cells[:, 1] * numpy.uint16(bins) + cells[:, 0]
+        del cells
+
+        order = numpy.argsort(cell_ids, kind="stable")
+        counts = numpy.bincount(cell_ids, minlength=bins * bins)
+        self._starts = numpy.concatenate([[0], numpy.cumsum(counts)])
+        self._coordinates = numpy.take(coordinates, order, axis=0)
+        self._pixels = numpy.take(pixels, order)
+
+    def __len__(self) -> int:
+        return len(self._pixels)
+
+    @property
+    def nbytes(self) -> int:
+        return self._coordinates.nbytes + self._pixels.nbytes + self._starts.nbytes
+
+    def _get_ranges(self, cells: numpy.ndarray) -> list[tuple[int, int]]:
+        """
+        Get the start and end of the points of the given cells, merging the ranges
+        of consecutive cells.
+
+        Args:
+            cells: (bins, bins) boolean mask of the cells, indexed by y then x.
+        """
+        edges = numpy.diff(
+            numpy.concatenate([[0], cells.ravel().view(numpy.int8), [0]])
+        )
+        first_cells = numpy.flatnonzero(edges == 1)
+        end_cells = numpy.flatnonzero(edges == -1)
+        return list(
+            zip(
+                self._starts[first_cells].tolist(),
+                self._starts[end_cells].tolist(),
+            )
+        )
+
+    def _query(
+        self,
+        inside_cells: numpy.ndarray,
+        boundary_cells: numpy.ndarray,
+        is_inside: Callable[[numpy.ndarray], numpy.ndarray],
+    ) -> numpy.ndarray:
+        """
+        Get the mask of the pixels in a region.
+
+        Args:
+            inside_cells: mask of the cells entirely inside the region.
+            boundary_cells: mask of the cells partially inside the region.
+            is_inside: return which of the given (N, 2) coordinates are in the region.
+
+        Returns:
+            boolean array of the image shape, True for the pixels in the region.
+        """
+        mask = numpy.zeros(self.shape[0] * self.shape[1], dtype=bool)
+
+        for start, end in self._get_ranges(inside_cells):
+            mask[self._pixels[start:end]] = True
+
+        for start, end in self._get_ranges(boundary_cells & ~inside_cells):
+            inside = is_inside(self._coordinates[start:end])
+            mask[self._pixels[start:end][inside]] = True
+
+        return numpy.reshape(mask, self.shape)
+
+    def query_rectangle(
+        self,
+        x_range: tuple[float, float],
+        y_range: tuple[float, float],
+    ) -> numpy.ndarray:
+        """
+        Get the mask of the pixels whose coordinates are in the given rectangle,
+        edges included.
+
+        Returns:
+            boolean array of the image shape.
+        """
+        (x_min, x_max), (y_min, y_max) = sorted(x_range), sorted(y_range)
+        margin = self._margin
+
+        def _get_axis_cells(edges, minimum, maximum):
+            crossed = (edges[1:] >= minimum - margin) & (edges[:-1] <= maximum + margin)
+            inside = (edges[:-1] > minimum + margin) & (edges[1:] < maximum - margin)
+            return crossed, inside
+
+        x_crossed, x_inside = _get_axis_cells(self._edges[0], x_min, x_max)
+        y_crossed, y_inside = _get_axis_cells(self._edges[1], y_min, y_max)
+
+        def _is_inside(coordinates: numpy.ndarray) -> numpy.ndarray:
+            x = coordinates[:, 0]
+            y = coordinates[:, 1]
+            return (x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)
+
+        return self._query(
+            inside_cells=numpy.outer(y_inside, x_inside),
+            boundary_cells=numpy.outer(y_crossed, x_crossed),
+            is_inside=_is_inside,
+        )
+
+    def query_convex_polygon(
+        self,
+        polygon: numpy.ndarray,
+        outside: bool = False,
+    ) -> numpy.ndarray:
+        """
+        Get the mask of the pixels whose coordinates are inside the given polygon.
+
+        Args:
+            polygon: (M, 2) array of the vertices of a convex polygon in
+                counter-clockwise order, as returned by ``geometry.convex_hull``.
+            outside: get the pixels outside the polygon instead.
+
+        Returns:
+            boolean array of the image shape.
+        """
+        margin = self._margin
+        corners = numpy.stack(numpy.meshgrid(*self._edges), axis=-1)
+        corners_inside = points_in_convex_polygon(
+            numpy.reshape(corners, (-1, 2)), polygon, tolerance=-margin
+        )
+        corners_inside = numpy.reshape(corners_inside, corners.shape[:2])
+        # a convex polygon contains the cells whose corners are all inside it
+        cells_inside = (
+            corners_inside[:-1, :-1]
+            & corners_inside[:-1, 1:]
+            & corners_inside[1:, :-1]
+            & corners_inside[1:, 1:]
+        )
+
+        polygon_min = numpy.min(polygon, axis=0) - margin
+        polygon_max = numpy.max(polygon, axis=0) + margin
+        x_edges, y_edges = self._edges
+        x_crossed = (x_edges[1:] >= polygon_min[0]) & (x_edges[:-1] <= polygon_max[0])
+        y_crossed = (y_edges[1:] >= polygon_min[1]) & (y_edges[:-1] <= polygon_max[1])
+        cells_crossed = numpy.outer(y_crossed, x_crossed)
+
+        if not outside:
+            return self._query(
+                inside_cells=cells_inside,
+                boundary_cells=cells_crossed,
+                is_inside=lambda points: points_in_convex_polygon(points, polygon),
+            )
+
+        return self._query(
+            inside_cells=~cells_crossed,
+            boundary_cells=~cells_inside,
+            is_inside=lambda points: ~points_in_convex_polygon(points, polygon),
+        )
+
+
+def build_pixel_index(
+    pyramid: TristimulusPyramid,
+    method: str,
+    bins: int = MAX_BINS,
+) -> ChromaticityIndex:
+    """
+    Index the chromaticity coordinates of all the pixels of an image.
+
+    Args:
+        pyramid: tristimulus values of the image, all its pixels are converted.
+        method: one of the ``chromaticity.DIAGRAM_PROJECTIONS`` key.
+        bins: number of cells on each axis of the grid.
+    """
+    series = pyramid.head(pyramid.size)
+    coordinates = XYZ_to_diagram_coordinates(series.XYZ, method)
+    return ChromaticityIndex(
+        coordinates,
+        pyramid.get_pixels(pyramid.size),
+        shape=pyramid.shape,
+        bins=bins,
+    )
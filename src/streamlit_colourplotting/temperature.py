@@ -0,0 +1,470 @@
+"""
+Correlated color temperature (CCT) and distance to the Planckian locus (Duv) of
+chromaticities, computed for all the points at once from a precomputed table of
+the Planckian locus.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import functools
+import json
+import math
+import typing
+from typing import Optional
+from typing import Sequence
+
+import numpy
+
+from streamlit_colourplotting.chromaticity import XYZ_to_diagram_coordinates
+from streamlit_colourplotting.chromaticity import diagram_coordinates_to_XYZ
+from streamlit_colourplotting.gamut import DEFAULT_CMFS
+
+if typing.TYPE_CHECKING:
+    from streamlit_colourplotting.chromaticity import PlotSeries
+
+CCT_RANGE = (1000.0, 100000.0)
+"""
+temperatures in kelvin covered by the Planckian table, like colour Ohno (2013).
+"""
+
+TABLE_SPACING = 1.01
+"""
+ratio between the temperatures of consecutive entries of the Planckian table.
+"""
+
+MAX_DUV = 0.05
+"""
+chromaticities further from the Planckian locus have no meaningful CCT.
+"""
+
+UCS_METHOD = "CIE 1960 UCS"
+"""
+diagram method the CCT and Duv are defined in.
+"""
+
+PERCENTILES = (5, 50, 95)
+
+CCT_HISTOGRAM_EDGES = numpy.geomspace(*CCT_RANGE, 81)
+"""
+bins of the CCT histograms, of the same width in mireds.
+"""
+
+DUV_HISTOGRAM_EDGES = numpy.linspace(-MAX_DUV, MAX_DUV, 41)
+
+
+@dataclasses.dataclass(frozen=True)
+class PlanckianTable:
+    """
+    Chromaticities of black body radiators of increasing temperatures, with a
+    lookup table of the entries nearest to the chromaticities around the locus.
+    """
+
+    temperatures: numpy.ndarray
+    """
+    (M,) increasing temperatures in kelvin.
+    """
+
+    XYZ: numpy.ndarray
+    """
+    (M, 3) tristimulus values of each radiator, normalized to Y = 1.
+    """
+
+    uv: numpy.ndarray
+    """
+    (M, 2) CIE 1960 UCS coordinates of each radiator.
+    """
+
+    lut_bounds: tuple[float, float, float, float]
+    """
+    umin, umax, vmin, vmax of the area covered by the lookup table, the bounding
+    box of the locus extended by :obj:`MAX_DUV`.
+    """
+
+    lut_entries: numpy.ndarray
+    """
+    (LUT_SIZE, LUT_SIZE, 2) first and last entry that can be the nearest to the
+    chromaticities in each cell of the lookup table, indexed by v then u.
+    """
+
+
+LUT_SIZE = 256
+"""
+number of cells on each axis of the lookup table of a :class:`PlanckianTable`.
+"""
+
+
+def _find_nearest_entries(
+    uv: numpy.ndarray,
+    table_uv: numpy.ndarray,
+    first: numpy.ndarray,
+    last: numpy.ndarray,
+) -> numpy.ndarray:
+    """
+    Find the entry of the table nearest to each point with a binary search between
+    the given entries, as the distance to the entries only decrease then increase
+    along the locus near it.
+
+    Points are removed from the search as soon as they are found.
+    """
+    # reductions along the short last axis are slow, work on each axis instead
+    u, v = uv[:, 0], uv[:, 1]
+    table_u, table_v = table_uv[:, 0], table_uv[:, 1]
+
+    first = first.astype(numpy.intp)
+    last = last.astype(numpy.intp)
+    searching = numpy.flatnonzero(first < last)
+    while len(searching):
+        low = first[searching]
+        high = last[searching]
+        middle = (low + high) // 2
+        point_u = u[searching]
+        point_v = v[searching]
+        distance = (point_u - table_u[middle]) ** 2 + (point_v - table_v[middle]) ** 2
+        next_distance = (point_u - table_u[middle + 1]) ** 2 + (
+            point_v - table_v[middle + 1]
+        ) ** 2
+        is_decreasing = next_distance < distance
+        first[searching] = numpy.where(is_decreasing, middle + 1, low)
+        last[searching] = numpy.where(is_decreasing, high, middle)
+        searching = searching[first[searching] < last[searching]]
+    return first
+
+
+@functools.lru_cache
+def get_planckian_table(
+    cmfs: str = DEFAULT_CMFS,
+    spacing: float = TABLE_SPACING,
+) -> PlanckianTable:
+    """
+    Compute the Planckian table for the given colour matching functions.
+
+    Args:
+        cmfs: name of the colour matching functions in ``colour.MSDS_CMFS``.
+        spacing: ratio between the temperatures of consecutive entries.
+    """
+    import colour
+
+    count = math.ceil(math.log(CCT_RANGE[1] / CCT_RANGE[0]) / math.log(spacing)) + 1
+    temperatures = numpy.geomspace(*CCT_RANGE, count)
+
+    cmfs = colour.MSDS_CMFS[cmfs]
+    wavelengths = cmfs.wavelengths * 1e-9
+    # Planck's law without the first radiation constant, as the XYZ are normalized
+    second_radiation_constant = 1.4387768775e-2
+    spectra = wavelengths**-5 / numpy.expm1(
+        second_radiation_constant / numpy.outer(temperatures, wavelengths)
+    )
+    XYZ = spectra @ cmfs.values
+    XYZ /= XYZ[:, 1:2]
+    uv = XYZ_to_diagram_coordinates(XYZ, UCS_METHOD)
+
+    u_min, v_min = numpy.min(uv, axis=0) - MAX_DUV
+    u_max, v_max = numpy.max(uv, axis=0) + MAX_DUV
+    corners = numpy.stack(
+        numpy.meshgrid(
+            numpy.linspace(u_min, u_max, LUT_SIZE + 1),
+            numpy.linspace(v_min, v_max, LUT_SIZE + 1),
+        ),
+        axis=-1,
+    ).reshape(-1, 2)
+    nearest = _find_nearest_entries(
+        corners,
+        uv,
+        first=numpy.zeros(len(corners)),
+        last=numpy.full(len(corners), count - 1),
+    ).reshape(LUT_SIZE + 1, LUT_SIZE + 1)
+    # the nearest entry of the points in a cell is between the ones of its corners,
+    # extended by one entry to absorb the curvature of the locus.
+    cell_corners = numpy.stack(
+        [nearest[:-1, :-1], nearest[:-1, 1:], nearest[1:, :-1], nearest[1:, 1:]]
+    )
+    lut_entries = numpy.stack(
+        [
+            numpy.maximum(numpy.min(cell_corners, axis=0) - 1, 0),
+            numpy.minimum(numpy.max(cell_corners, axis=0) + 1, count - 1),
+        ],
+        axis=-1,
+    )
+
+    return PlanckianTable(
+        temperatures=temperatures,
+        XYZ=XYZ,
+        uv=uv,
+        lut_bounds=(u_min, u_max, v_min, v_max),
+        lut_entries=lut_entries.astype(numpy.uint16),
+    )
+
+
+def uv_to_CCT_Duv(
+    uv: numpy.ndarray,
+    table: Optional[PlanckianTable] = None,
+) -> numpy.ndarray:
+    """
+    Compute the CCT and Duv of the given CIE 1960 UCS coordinates with the method of
+    Ohno (2013), like ``colour.temperature.uv_to_CCT_Ohno2013``.
+
+    The nearest entry of the Planckian table is searched for all the points at
+    once, only between the few entries given by the lookup table for the area of
+    each point. The CCT and Duv are then interpolated between the neighbours of
+    that entry.
+
+    Args:
+        uv: (N, 2) CIE 1960 UCS coordinates.
+        table: Planckian table to use, :func:`get_planckian_table` if None.
+
+    Returns:
+        (N, 2) float64 array of the CCT in kelvin and the Duv of each point. NaN for
+        points further than :obj:`MAX_DUV` from the locus or outside the
+        temperatures of the table.
+    """
+    table = table or get_planckian_table()
+    table_u = table.uv[:, 0]
+    table_v = table.uv[:, 1]
+    temperatures = table.temperatures
+
+    uv = numpy.asarray(uv, dtype=numpy.float64)
+    CCT_Duv = numpy.full(uv.shape, numpy.nan)
+
+    u_min, u_max, v_min, v_max = table.lut_bounds
+    columns = (uv[:, 0] - u_min) * (LUT_SIZE / (u_max - u_min))
+    rows = (uv[:, 1] - v_min) * (LUT_SIZE / (v_max - v_min))
+    # points outside the lookup table are too far from the locus, this is also
+    # false for non-finite coordinates.
+    in_lut = (columns >= 0) & (columns < LUT_SIZE) & (rows >= 0) & (rows < LUT_SIZE)
+    if not numpy.all(in_lut):
+        uv = uv[in_lut]
+        columns = columns[in_lut]
+        rows = rows[in_lut]
+    u = uv[:, 0]
+    v = uv[:, 1]
+
+    entries = table.lut_entries[rows.astype(numpy.intp), columns.astype(numpy.intp)]
+    nearest = _find_nearest_entries(uv, table.uv, entries[:, 0], entries[:, 1])
+
+    # the nearest entry must have a neighbour on each side
+    in_range = (nearest > 0) & (nearest < len(temperatures) - 1)
+    index = numpy.clip(nearest, 1, len(temperatures) - 2)
+    T_p, T_0, T_n = (
+        temperatures[index - 1],
+        temperatures[index],
+        temperatures[index + 1],
+    )
+
+    def _get_distance(indices: numpy.ndarray) -> numpy.ndarray:
+        return numpy.sqrt((u - table_u[indices]) ** 2 + (v - table_v[indices]) ** 2)
+
+    d_p, d_0, d_n = (
+        _get_distance(index - 1),
+        _get_distance(index),
+        _get_distance(index + 1),
+    )
+
+    # triangular solution
+    length = numpy.sqrt(
+        (table_u[index + 1] - table_u[index - 1]) ** 2
+        + (table_v[index + 1] - table_v[index - 1]) ** 2
+    )
+    x = (d_p**2 - d_n**2 + length**2) / (2 * length)
+    CCT = T_p + (T_n - T_p) * (x / length)
+    v_x = table_v[index - 1] + (table_v[index + 1] - table_v[index - 1]) * (x / length)
+    sign = numpy.sign(v - v_x)
+    Duv = numpy.sqrt(numpy.maximum(d_p**2 - x**2, 0)) * sign
+
+    # parabolic solution, more accurate far from the locus
+    parabolic = numpy.flatnonzero(numpy.abs(Duv) >= 0.002)
+    T_p, T_0, T_n = T_p[parabolic], T_0[parabolic], T_n[parabolic]
+    d_p, d_0, d_n = d_p[parabolic], d_0[parabolic], d_n[parabolic]
+    X = (T_n - T_0) * (T_p - T_n) * (T_0 - T_p)
+    a = (T_p * (d_n - d_0) + T_0 * (d_p - d_n) + T_n * (d_0 - d_p)) / X
+    b = -(T_p**2 * (d_n - d_0) + T_0**2 * (d_p - d_n) + T_n**2 * (d_0 - d_p)) / X
+    c = (
+        -(
+            d_p * (T_n - T_0) * T_0 * T_n
+            + d_0 * (T_p - T_n) * T_p * T_n
+            + d_n * (T_0 - T_p) * T_p * T_0
+        )
+        / X
+    )
+    CCT[parabolic] = -b / (2 * a)
+    Duv[parabolic] = (a * CCT[parabolic] ** 2 + b * CCT[parabolic] + c) * sign[
+        parabolic
+    ]
+
+    valid = in_range & (numpy.abs(Duv) <= MAX_DUV)
+    CCT[~valid] = numpy.nan
+    Duv[~valid] = numpy.nan
+    CCT_Duv[in_lut] = numpy.stack([CCT, Duv], axis=-1)
+    return CCT_Duv
+
+
+def get_planckian_locus(
+    method: str,
+    temperatures: Optional[numpy.ndarray] = None,
+    duv: float = 0.0,
+) -> numpy.ndarray:
+    """
+    Get the coordinates of the Planckian locus in the given diagram coordinates.
+
+    Args:
+        method: one of the ``chromaticity.DIAGRAM_PROJECTIONS`` key.
+        temperatures: temperatures in kelvin to get, all the entries of the
+            Planckian table if None.
+        duv: distance to the locus of the coordinates, positive above the locus.
+
+    Returns:
+        (N, 2) array of coordinates.
+    """
+    table = get_planckian_table()
+    if temperatures is None:
+        temperatures = table.temperatures
+
+    uv = numpy.stack(
+        [
+            numpy.interp(temperatures, table.temperatures, table.uv[:, axis])
+            for axis in (0, 1)
+        ],
+        axis=-1,
+    )
+    if duv:
+        # normal of the locus, pointing to greater v
+        tangent = numpy.stack(
+            [numpy.gradient(table.uv[:, axis], table.temperatures) for axis in (0, 1)],
+            axis=-1,
+        )
+        tangent = numpy.stack(
+            [
+                numpy.interp(temperatures, table.temperatures, tangent[:, axis])
+                for axis in (0, 1)
+            ],
+            axis=-1,
+        )
+        normal = numpy.stack([-tangent[:, 1], tangent[:, 0]], axis=-1)
+        normal *= numpy.sign(normal[:, 1:2]) / numpy.linalg.norm(
+            normal, axis=-1, keepdims=True
+        )
+        uv = uv + normal * duv
+
+    XYZ = diagram_coordinates_to_XYZ(uv, UCS_METHOD)
+    return XYZ_to_diagram_coordinates(XYZ, method)
+
+
+def _get_weighted_percentiles(
+    values: numpy.ndarray,
+    weights: Optional[numpy.ndarray],
+    percentiles: Sequence[float],
+) -> list[Optional[float]]:
+    if not len(values):
+        return [None] * len(percentiles)
+    if weights is None:
+        return numpy.percentile(values, percentiles).tolist()
+    return numpy.percentile(
+        values, percentiles, weights=weights, method="inverted_cdf"
+    ).tolist()
+
+
+@dataclasses.dataclass(frozen=True)
+class TemperatureStatistics:
+    """
+    Distribution of the CCT and Duv of the points of a series.
+    """
+
+    label: str
+
+    points: int
+    """
+    number of points the statistics are computed from.
+    """
+
+    near_locus: float
+    """
+    proportion of the points close enough to the Planckian locus to have a CCT,
+    in the [0-1] range.
+    """
+
+    CCT_percentiles: dict[int, Optional[float]]
+    """
+    percentile and CCT in kelvin at it, of the points near the locus. None if no
+    point is near the locus.
+    """
+
+    Duv_percentiles: dict[int, Optional[float]]
+
+    CCT_histogram: list[float]
+    """
+    proportion of the points near the locus in each bin of
+    :obj:`CCT_HISTOGRAM_EDGES`.
+    """
+
+    Duv_histogram: list[float]
+    """
+    proportion of the points near the locus in each bin of
+    :obj:`DUV_HISTOGRAM_EDGES`.
+    """
+
+    def to_dict(self) -> dict:
+        return dataclasses.asdict(self)
+
+
+def compute_temperature_statistics(
+    series: PlotSeries,
+    method: str,
+    label: str,
+) -> TemperatureStatistics:
+    """
+    Compute the distribution of the CCT and Duv of the points of the series.
+
+    Points of a series with sizes are weighted by their size.
+
+    Args:
+        series: chromaticities in the given diagram coordinates.
+        method: one of the ``chromaticity.DIAGRAM_PROJECTIONS`` key.
+        label: name of the series in the statistics.
+    """
+    uv = XYZ_to_diagram_coordinates(
+        diagram_coordinates_to_XYZ(series.coordinates, method), UCS_METHOD
+    )
+    CCT_Duv = uv_to_CCT_Duv(uv)
+    valid = numpy.isfinite(CCT_Duv[:, 0])
+    CCT = CCT_Duv[valid, 0]
+    Duv = CCT_Duv[valid, 1]
+
+    weights = series.sizes[valid] if series.sizes is not None else None
+    total = len(uv) if series.sizes is None else float(numpy.sum(series.sizes))
+    valid_total = len(CCT) if weights is None else float(numpy.sum(weights))
+
+    def _get_histogram(values: numpy.ndarray, edges: numpy.ndarray) -> list[float]:
+        counts, _ = numpy.histogram(values, bins=edges, weights=weights)
+        return (counts / valid_total if valid_total else counts * 0.0).tolist()
+
+    return TemperatureStatistics(
+        label=label,
+        points=len(uv),
+        near_locus=valid_total / total if total else 0.0,
+        CCT_percentiles=dict(
+            zip(PERCENTILES, _get_weighted_percentiles(CCT, weights, PERCENTILES))
+        ),
+        Duv_percentiles=dict(
+            zip(PERCENTILES, _get_weighted_percentiles(Duv, weights, PERCENTILES))
+        ),
+        CCT_histogram=_get_histogram(CCT, CCT_HISTOGRAM_EDGES),
+        Duv_histogram=_get_histogram(Duv, DUV_HISTOGRAM_EDGES),
+    )
+
+
+def temperature_statistics_to_json(
+    statistics: Sequence[TemperatureStatistics],
+    diagram_method: str,
+) -> str:
+    """
+    Serialize the given statistics to a JSON document.
+    """
+    return json.dumps(
+        {
+            "diagram_method": diagram_method,
+            "CCT_histogram_edges": CCT_HISTOGRAM_EDGES.tolist(),
+            "Duv_histogram_edges": DUV_HISTOGRAM_EDGES.tolist(),
+            "series": [single_statistics.to_dict() for single_statistics in statistics],
+        },
+        indent=4,
+    )
@@ -1,3 +1,5 @@
 from ._config import config
+from ._config import plot_worker
 from ._config import UserIssue
+from ._config import DiagramMethod
 from ._main import create_main_ui
@@ -1,7 +1,7 @@
 import numpy
 import streamlit
 
-from streamlit_colourplotting.colorlib import sRGB_COLORSPACE
+from streamlit_colourplotting import colorlib
 from streamlit_colourplotting.colorlib import convert_float_to_int8
 from streamlit_colourplotting.colorlib import ColorStringFormat
 from streamlit_colourplotting.colorlib import convert_color_to_str
@@ -12,6 +12,7 @@ from streamlit_colourplotting.colorlib import fix_color_str
 from streamlit_colourplotting.ui import config
 from streamlit_colourplotting import widgetify
 from ._colorspacepicker import create_colorspace_picker
+from ._fragments import source_callback
 
 
 @widgetify
@@ -29,7 +30,7 @@ def widget_color_format(key, force_update=False):
 
     # we assume hexadecimal color are always encoded as "display sRGB"
     if value == value.hex:
-        config().USER_SOURCE_COLORSPACE.set(sRGB_COLORSPACE)
+        config().USER_SOURCE_COLORSPACE.set(colorlib.sRGB_COLORSPACE)
         config().USER_SOURCE_FORCE_LINEAR.set(False)
 
 
@@ -65,7 +66,7 @@ def create_color_preview():
     Generate a small thumbnail displaying the picked color
     """
     color = config().color
-    color = color.as_colorspace(sRGB_COLORSPACE)
+    color = color.as_colorspace(colorlib.sRGB_COLORSPACE)
     image_array = color.to_array(alpha=False)
     image_array = convert_float_to_int8(image_array)
     image_array = numpy.full((22, 32, 3), image_array, dtype=numpy.uint8)
@@ -92,7 +93,7 @@ def create_color_picker():
             options=options,
             help="Choose how is formatted your RGB color.\nA `.4` means 4 digit precision.\nhexadecimal are always assume to be sRGB encoded",
             key=str(widget_color_format),
-            on_change=widget_color_format,
+            on_change=source_callback(widget_color_format),
         )
     with column3:
         widget_color_source(force_update=True)
@@ -101,5 +102,5 @@ def create_color_picker():
             # label_visibility="collapsed",
             help="Color expressed under the RGB model.",
             key=str(widget_color_source),
-            on_change=widget_color_source,
+            on_change=source_callback(widget_color_source),
         )
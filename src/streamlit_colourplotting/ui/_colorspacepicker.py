@@ -1,10 +1,11 @@
 import streamlit
 
 from streamlit_colourplotting.colorlib import get_colorspace
-from streamlit_colourplotting.colorlib import sRGB_COLORSPACE
+from streamlit_colourplotting import colorlib
 from streamlit_colourplotting.colorlib import get_available_colorspaces
 from streamlit_colourplotting.ui import config
 from streamlit_colourplotting import widgetify
+from ._fragments import source_callback
 
 
 @widgetify
@@ -17,7 +18,10 @@ def widget_colorspace(key, force_update=False):
     colorspace = get_colorspace(user_value)
     color_format = config().USER_SOURCE_COLOR_FORMAT.get()
 
-    if color_format == color_format.hex and colorspace.name != sRGB_COLORSPACE.name:
+    if (
+        color_format == color_format.hex
+        and colorspace.name != colorlib.sRGB_COLORSPACE.name
+    ):
         user_issues = config().USER_SOURCE_ERROR.get()
         config().USER_SOURCE_ERROR.set(user_issues | user_issues.hex_colorspace)
         # reset to previously stored
@@ -61,7 +65,7 @@ def create_colorspace_picker():
                 options=options,
                 help="Colorspace include primaries, whitepoint and transfer-functions.",
                 key=str(widget_colorspace),
-                on_change=widget_colorspace,
+                on_change=source_callback(widget_colorspace),
             )
 
         with column2:
@@ -71,6 +75,6 @@ def create_colorspace_picker():
             streamlit.checkbox(
                 label="Force Linear",
                 key=str(widget_force_linear),
-                on_change=widget_force_linear,
+                on_change=source_callback(widget_force_linear),
                 help="For the colorspace to be set with linear transfer-functions.",
             )
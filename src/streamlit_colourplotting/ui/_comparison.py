@@ -0,0 +1,141 @@
+from typing import Optional
+from typing import Sequence
+
+import streamlit
+
+from streamlit_colourplotting.difference import DIFFERENCE_METHODS
+from streamlit_colourplotting.difference import HEATMAP_MAXIMUM
+from streamlit_colourplotting.ui import config
+from streamlit_colourplotting.ui._config import ImageComparison
+from streamlit_colourplotting.ui._config import UserImage
+from ._fragments import source_callback
+
+HEATMAP_WIDTH = 400
+"""
+width in pixels of the thumbnail of the difference of each pixel.
+"""
+
+
+def create_comparison_picker(user_images: Sequence[UserImage]):
+    """
+    Create the widgets to pick two of the uploaded images to compare.
+    """
+    enabled = streamlit.toggle(
+        label="Compare Two Images",
+        key="compare",
+        value=config().USER_COMPARE.default,
+        help=(
+            "Compute the color difference of each pixel between two images of the "
+            "same size, in the source colorspace."
+        ),
+        on_change=source_callback(),
+    )
+    config().USER_COMPARE.set(enabled)
+    if not enabled:
+        return
+
+    # uploads can have the same name
+    labels = [
+        f"{index + 1}. {user_image.name}"
+        for index, user_image in enumerate(user_images)
+    ]
+    file_ids = [user_image.file_id for user_image in user_images]
+
+    column1, column2, column3, column4 = streamlit.columns(4)
+    with column1:
+        reference = streamlit.selectbox(
+            label="Reference",
+            options=labels,
+            index=0,
+            key="compareReference",
+            on_change=source_callback(),
+        )
+    with column2:
+        compared = streamlit.selectbox(
+            label="Compared",
+            options=labels,
+            index=1,
+            key="compareCompared",
+            on_change=source_callback(),
+        )
+    config().USER_COMPARE_IMAGES.set(
+        (file_ids[labels.index(reference)], file_ids[labels.index(compared)])
+    )
+
+    with column3:
+        options = list(DIFFERENCE_METHODS)
+        method = streamlit.selectbox(
+            label="Difference",
+            options=options,
+            index=options.index(config().USER_COMPARE_METHOD.default),
+            key="compareMethod",
+            help=(
+                "- ΔE 2000: CIEDE2000 in CIE L*a*b*, relative to the colorspace "
+                "whitepoint.\n"
+                "- ΔE ITP: ITU-R BT.2124 in ICtCp, 1.0 being 100 cd/m²."
+            ),
+            on_change=source_callback(),
+        )
+        config().USER_COMPARE_METHOD.set(method)
+    with column4:
+        worst = streamlit.number_input(
+            label="Worst Pixels",
+            help=(
+                "Plot the chromaticity of the N pixels with the largest difference, "
+                "in both images. 0 to disable."
+            ),
+            min_value=0,
+            step=100,
+            value=config().USER_COMPARE_WORST.default,
+            key="compareWorst",
+            on_change=source_callback(),
+        )
+        config().USER_COMPARE_WORST.set(worst)
+
+
+def create_image_comparison(comparison: Optional[ImageComparison]):
+    """
+    Create a heatmap and a table of the color difference between two images.
+    """
+    if comparison is None:
+        return
+
+    streamlit.subheader("Image Difference")
+
+    difference = comparison.difference
+    if difference is None:
+        streamlit.warning(
+            f"{comparison.reference.name} and {comparison.compared.name} don't have "
+            f"the same size and can't be compared."
+        )
+        return
+
+    column1, column2 = streamlit.columns(2)
+    with column1:
+        streamlit.image(
+            difference.get_heatmap(HEATMAP_WIDTH),
+            caption=(
+                f"{difference.method} from 0 (black) to "
+                f"{HEATMAP_MAXIMUM[difference.method]:g} or more (yellow), "
+                f"largest of the pixels covered"
+            ),
+        )
+    with column2:
+        rows = [("Mean", difference.mean)]
+        for percentile, value in difference.percentiles.items():
+            rows.append(("Median" if percentile == 50 else f"P{percentile}", value))
+        rows.append(("Max", difference.maximum))
+        streamlit.dataframe(
+            {
+                "Statistic": [name for name, _ in rows],
+                difference.method: [value for _, value in rows],
+            },
+            hide_index=True,
+            column_config={
+                difference.method: streamlit.column_config.NumberColumn(format="%.3f")
+            },
+        )
+        streamlit.caption(
+            f"{difference.method} of {comparison.compared.name} "
+            f"relative to {comparison.reference.name}."
+        )
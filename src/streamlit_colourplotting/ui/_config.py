@@ -1,27 +1,94 @@
+from __future__ import annotations
+
+import concurrent.futures
+import dataclasses
 import enum
+import logging
+import math
+import time
+import typing
+from typing import Callable
 from typing import Generic
 from typing import Optional
+from typing import Sequence
 from typing import TypeVar
 
-import colour
-import matplotlib.style
-import matplotlib.pyplot
 import numpy
 import streamlit
 
 from streamlit_colourplotting.colorlib import ColorStringFormat
 from streamlit_colourplotting.colorlib import RGBAColor
-from streamlit_colourplotting.colorlib import RgbColorspace
-from streamlit_colourplotting.colorlib import sRGB_COLORSPACE
+from streamlit_colourplotting import colorlib
 from streamlit_colourplotting.colorlib import get_colorspace
 from streamlit_colourplotting.colorlib import is_colorspace_decoding_linear
 from streamlit_colourplotting._utils import UifiedEnum
-from streamlit_colourplotting.core import transform_box
+from streamlit_colourplotting.chromaticity import PLOT_SERIES_CACHE
+from streamlit_colourplotting.chromaticity import PlotSeries
+from streamlit_colourplotting.chromaticity import TristimulusPyramid
+from streamlit_colourplotting.chromaticity import TristimulusSeries
+from streamlit_colourplotting.chromaticity import compute_series
+from streamlit_colourplotting.chromaticity import compute_tristimulus_series
+from streamlit_colourplotting.chromaticity import project_series
+from streamlit_colourplotting.chromaticity import linearize_image
+from streamlit_colourplotting.core import get_alpha_mask
+from streamlit_colourplotting.difference import DifferenceMap
+from streamlit_colourplotting.difference import compute_difference_map
+from streamlit_colourplotting.gamut import GamutStatistics
+from streamlit_colourplotting.gamut import compute_gamut_statistics
+from streamlit_colourplotting.gamut import get_gamuts
+from streamlit_colourplotting.palette import compute_palette_series
+from streamlit_colourplotting.spatialindex import ChromaticityIndex
+from streamlit_colourplotting.spatialindex import build_pixel_index
+from streamlit_colourplotting.temperature import TemperatureStatistics
+from streamlit_colourplotting.temperature import compute_temperature_statistics
+from streamlit_colourplotting.worker import PlotWorker
+
+if typing.TYPE_CHECKING:
+    import matplotlib.pyplot
+    from streamlit_colourplotting.imagestore import ImageHandle
+    from streamlit_colourplotting.colorlib import RgbColorspace
+    from streamlit_colourplotting.plotting import PlotSettings
+
+LOGGER = logging.getLogger(__name__)
+
+MIN_IMAGE_SAMPLES = 10
+"""
+lowest image samples plotted with individual markers, lower numbers are too slow
+to draw without the raster engine.
+"""
 
 
 class SourceType(enum.Enum):
     color = "Color"
     image = "Image"
+    sequence = "Video / Sequence"
+
+    @classmethod
+    def labels(cls) -> list[str]:
+        return [item.value for item in cls]
+
+
+class SequenceAggregate(enum.Enum):
+    """
+    How the chromaticities of all the frames of a sequence are combined.
+    """
+
+    reservoir = "Random Subset"
+    histogram = "Density"
+
+    @classmethod
+    def labels(cls) -> list[str]:
+        return [item.value for item in cls]
+
+
+class RegionShape(enum.Enum):
+    """
+    How the region of the diagram to select the pixels of the images in is defined.
+    """
+
+    rectangle = "Drawn Rectangle"
+    outside_gamut = "Outside Gamut"
+    inside_gamut = "Inside Gamut"
 
     @classmethod
     def labels(cls) -> list[str]:
@@ -93,6 +160,16 @@ class MarkerShapeStyle(UifiedEnum):
     caretdownbase = ("11", 11)
 
 
+class RasterAggregate(UifiedEnum):
+    """
+    Based on :func:`streamlit_colourplotting.plotting.rasterize_points`
+    """
+
+    last = ("Brightest on Top", "last")
+    mean = ("Mean Color", "mean")
+    saturated = ("Most Saturated", "saturated")
+
+
 T = TypeVar("T")
 
 
@@ -128,6 +205,178 @@ class UserConfigOption(Generic[T]):
             streamlit.session_state[self._identifier] = new_value
 
 
+def _snapshot(value):
+    # options holding containers are often mutated in place then set again
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, list):
+        return list(value)
+    return value
+
+
+@dataclasses.dataclass
+class _StageMemo:
+    key: tuple
+    result: typing.Any
+    version: int
+
+
+class PipelineStage(Generic[T]):
+    """
+    A step of the plot pipeline whose result is kept in the session and only
+    recomputed when one of the options it reads, or one of its upstream stage,
+    changed.
+
+    Args:
+        name: unique name of the stage in the session.
+        compute: function receiving the result of each upstream stage, in order,
+            and returning the result of the stage.
+        options: every option read by ``compute``.
+        upstream: stages whose result is needed by this stage.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        compute: Callable[..., T],
+        options: Sequence[UserConfigOption] = (),
+        upstream: Sequence[PipelineStage] = (),
+    ):
+        self.name = name
+        self._compute = compute
+        self._options = options
+        self._upstream = upstream
+        self._identifier = f"PIPELINE_STAGE_{name}"
+
+    @property
+    def version(self) -> int:
+        """
+        Incremented every time the stage is recomputed.
+        """
+        memo: Optional[_StageMemo] = streamlit.session_state.get(self._identifier)
+        return memo.version if memo else 0
+
+    def get(self) -> T:
+        """
+        Get the result of the stage, recomputing it and its upstream stages if needed.
+        """
+        upstream_results = [stage.get() for stage in self._upstream]
+        key = (
+            tuple(_snapshot(option.get()) for option in self._options),
+            tuple(stage.version for stage in self._upstream),
+        )
+
+        memo: Optional[_StageMemo] = streamlit.session_state.get(self._identifier)
+        if memo is not None and memo.key == key:
+            LOGGER.debug(f"pipeline stage {self.name}: hit")
+            return memo.result
+
+        start_time = time.time()
+        result = self._compute(*upstream_results)
+        version = memo.version + 1 if memo else 1
+        streamlit.session_state[self._identifier] = _StageMemo(key, result, version)
+        LOGGER.debug(
+            f"pipeline stage {self.name}: miss, "
+            f"computed in {time.time() - start_time:.3f}s"
+        )
+        return result
+
+
+@dataclasses.dataclass(frozen=True)
+class UserImage:
+    """
+    An image uploaded by the user.
+    """
+
+    file_id: str
+    """
+    identifier of the upload in the session.
+    """
+
+    name: str
+    handle: ImageHandle
+    """
+    handle on the R-G-B image in the native data type of its encoding.
+    """
+
+
+@dataclasses.dataclass(frozen=True)
+class _Source:
+    """
+    Colors to convert to chromaticities, black if neither an image or a color.
+    """
+
+    label: Optional[str] = None
+    image: Optional[UserImage] = None
+    color: Optional[RGBAColor] = None
+
+
+@dataclasses.dataclass(frozen=True)
+class RegionSelection:
+    """
+    Pixels of an image whose chromaticity is in the region selected by the user.
+    """
+
+    image: UserImage
+
+    mask: Optional[numpy.ndarray]
+    """
+    boolean array of the image height and width, None if no region is selected.
+    """
+
+    duration: float = 0.0
+    """
+    time in seconds the query of the region took.
+    """
+
+
+@dataclasses.dataclass(frozen=True)
+class ImageComparison:
+    """
+    Color difference between two images uploaded by the user.
+    """
+
+    reference: UserImage
+    compared: UserImage
+
+    difference: Optional[DifferenceMap]
+    """
+    None if the images don't have the same size.
+    """
+
+
+def _get_alpha_threshold(
+    image: numpy.ndarray,
+    threshold: Optional[float],
+) -> Optional[float]:
+    """
+    Get the alpha threshold applied to the given image, None if all its pixels are
+    visible.
+
+    Args:
+        image: R-G-B(-A) image in its native data type.
+        threshold: alpha threshold set by the user, None if transparent pixels are
+            kept.
+    """
+    if image.shape[2] < 4:
+        return None
+    return threshold
+
+
+def _get_sample_count(shape: tuple[int, int], samples: int) -> int:
+    """
+    Get the number of pixels kept by plotting one pixel every N on each axis.
+
+    Args:
+        shape: height and width of the image.
+        samples: keep one pixel every N on each axis, if the image is bigger than N.
+    """
+    height, width = shape
+    if height > samples or width > samples:
+        return math.ceil(height / samples) * math.ceil(width / samples)
+    return height * width
+
+
 class UserConfig:
     SOURCE_COLORSPACE_TOKEN = "$SOURCE_COLORSPACE$"
 
@@ -147,7 +396,7 @@ class UserConfig:
             RGBAColor(0.0, 0.0, 0.0), "USER_SOURCE_COLOR"
         )
         self.USER_SOURCE_COLORSPACE: UserConfigOption[RgbColorspace] = UserConfigOption(
-            sRGB_COLORSPACE, "USER_SOURCE_COLORSPACE"
+            colorlib.sRGB_COLORSPACE, "USER_SOURCE_COLORSPACE"
         )
         self.USER_SOURCE_FORCE_LINEAR = UserConfigOption(
             False, "USER_SOURCE_FORCE_LINEAR"
@@ -163,6 +412,11 @@ class UserConfig:
         self.USER_MARKER_STYLE = UserConfigOption(
             MarkerShapeStyle.circle, "USER_MARKER_STYLE"
         )
+        self.USER_SCATTER_OUTLINE = UserConfigOption(False, "USER_SCATTER_OUTLINE")
+        self.USER_SCATTER_RASTER = UserConfigOption(False, "USER_SCATTER_RASTER")
+        self.USER_RASTER_AGGREGATE = UserConfigOption(
+            RasterAggregate.last, "USER_RASTER_AGGREGATE"
+        )
         self.USER_PLOT_POINTER_GAMUT = UserConfigOption(
             False, "USER_PLOT_POINTER_GAMUT"
         )
@@ -172,11 +426,34 @@ class UserConfig:
         self.USER_POINTER_GAMUT_ALPHA = UserConfigOption(
             1.0, "USER_POINTER_GAMUT_ALPHA"
         )
+        self.USER_PLOT_PLANCKIAN_LOCUS = UserConfigOption(
+            False, "USER_PLOT_PLANCKIAN_LOCUS"
+        )
+        self.USER_PLANCKIAN_LOCUS_COLOR = UserConfigOption(
+            "#222222", "USER_PLANCKIAN_LOCUS_COLOR"
+        )
+        self.USER_PLANCKIAN_LOCUS_ALPHA = UserConfigOption(
+            1.0, "USER_PLANCKIAN_LOCUS_ALPHA"
+        )
         self.USER_SHOW_WHITEPOINT = UserConfigOption(True, "USER_SHOW_WHITEPOINT")
-        self.USER_IMAGE: UserConfigOption[Optional[numpy.ndarray]] = UserConfigOption(
-            None, "USER_IMAGE"
+        # handle on the R-G-B image in the native data type of its encoding
+        self.USER_IMAGES: UserConfigOption[list[UserImage]] = UserConfigOption(
+            [], "USER_IMAGES"
         )
         self.USER_IMAGE_SAMPLES = UserConfigOption(20, "USER_IMAGE_SAMPLES")
+        self.USER_IMAGE_PALETTE = UserConfigOption(False, "USER_IMAGE_PALETTE")
+        self.USER_ALPHA_MASK = UserConfigOption(True, "USER_ALPHA_MASK")
+        # pixels with an alpha at or below it are discarded, in [0-1]
+        self.USER_ALPHA_THRESHOLD = UserConfigOption(0.0, "USER_ALPHA_THRESHOLD")
+        self.USER_IMAGE_PALETTE_SIZE = UserConfigOption(8, "USER_IMAGE_PALETTE_SIZE")
+        self.USER_SEQUENCE_FRAME_STEP = UserConfigOption(5, "USER_SEQUENCE_FRAME_STEP")
+        self.USER_SEQUENCE_AGGREGATE = UserConfigOption(
+            SequenceAggregate.reservoir, "USER_SEQUENCE_AGGREGATE"
+        )
+        # chromaticities of all the frames, combined
+        self.USER_SEQUENCE_SERIES: UserConfigOption[Optional[PlotSeries]] = (
+            UserConfigOption(None, "USER_SEQUENCE_SERIES")
+        )
         self.USER_STYLE = UserConfigOption({}, "USER_STYLE")
         self.USER_FIGURE_COLORSPACES: UserConfigOption[list[tuple[str, str]]] = (
             UserConfigOption(
@@ -191,6 +468,174 @@ class UserConfig:
         self.USER_AXES_SCALE = UserConfigOption(1.0, "USER_AXES_SCALE")
         self.USER_AXES_OFFSET_X = UserConfigOption(0.0, "USER_AXES_OFFSET_X")
         self.USER_AXES_OFFSET_Y = UserConfigOption(0.0, "USER_AXES_OFFSET_Y")
+        self.USER_STYLE_BATCHED = UserConfigOption(False, "USER_STYLE_BATCHED")
+        self.USER_REGION_SELECT = UserConfigOption(False, "USER_REGION_SELECT")
+        self.USER_REGION_SHAPE = UserConfigOption(
+            RegionShape.rectangle, "USER_REGION_SHAPE"
+        )
+        # x and y range of the rectangle, in diagram coordinates
+        self.USER_REGION_RECTANGLE: UserConfigOption[
+            Optional[tuple[tuple[float, float], tuple[float, float]]]
+        ] = UserConfigOption(None, "USER_REGION_RECTANGLE")
+        # name of one of the gamuts of get_gamuts
+        self.USER_REGION_GAMUT: UserConfigOption[Optional[str]] = UserConfigOption(
+            None, "USER_REGION_GAMUT"
+        )
+
+        self.USER_COMPARE = UserConfigOption(False, "USER_COMPARE")
+        # file_id of the reference and compared images
+        self.USER_COMPARE_IMAGES: UserConfigOption[Optional[tuple[str, str]]] = (
+            UserConfigOption(None, "USER_COMPARE_IMAGES")
+        )
+        # one of the difference.DIFFERENCE_METHODS key
+        self.USER_COMPARE_METHOD = UserConfigOption("ΔE 2000", "USER_COMPARE_METHOD")
+        # number of pixels with the largest difference to plot, 0 for none
+        self.USER_COMPARE_WORST = UserConfigOption(1000, "USER_COMPARE_WORST")
+
+        colorspace_options = [
+            self.USER_SOURCE_COLORSPACE,
+            self.USER_SOURCE_FORCE_LINEAR,
+        ]
+        alpha_options = [self.USER_ALPHA_MASK, self.USER_ALPHA_THRESHOLD]
+        self.SOURCES_STAGE = PipelineStage(
+            "sources",
+            self._compute_sources,
+            options=[
+                self.USER_SOURCE_TYPE,
+                self.USER_SOURCE_COLOR,
+                self.USER_IMAGES,
+            ],
+        )
+        self.TRISTIMULUS_STAGE = PipelineStage(
+            "tristimulus",
+            self._compute_tristimulus,
+            options=[*colorspace_options, *alpha_options],
+            upstream=[self.SOURCES_STAGE],
+        )
+        # only take a subsample of, and project, the cached tristimulus values
+        self.CHROMATICITY_STAGE = PipelineStage(
+            "chromaticity",
+            self._compute_series,
+            options=[
+                self.USER_IMAGE_SAMPLES,
+                self.USER_SCATTER_RASTER,
+                self.USER_SCATTER_OUTLINE,
+                self.USER_IMAGE_PALETTE,
+                self.USER_IMAGE_PALETTE_SIZE,
+                self.USER_DIAGRAM_METHOD,
+                self.USER_SOURCE_TYPE,
+                self.USER_SEQUENCE_SERIES,
+            ],
+            upstream=[self.SOURCES_STAGE, self.TRISTIMULUS_STAGE],
+        )
+        self.SETTINGS_STAGE = PipelineStage(
+            "settings",
+            self._compute_plot_settings,
+            options=[
+                *colorspace_options,
+                self.USER_DIAGRAM_METHOD,
+                self.USER_FIGURE_COLORSPACES,
+                self.USER_SCATTER_SIZE,
+                self.USER_SCATTER_COLOR,
+                self.USER_SCATTER_COLOR_RGB,
+                self.USER_SCATTER_ALPHA,
+                self.USER_MARKER_STYLE,
+                self.USER_SCATTER_OUTLINE,
+                self.USER_SCATTER_RASTER,
+                self.USER_RASTER_AGGREGATE,
+                self.USER_LOCUS_SHOW,
+                self.USER_LOCUS_COLOR,
+                self.USER_LOCUS_COLOR_RGB,
+                self.USER_LOCUS_ALPHA,
+                self.USER_LOCUS_BACKGROUND_RGB,
+                self.USER_SHOW_WHITEPOINT,
+                self.USER_PLOT_POINTER_GAMUT,
+                self.USER_POINTER_GAMUT_COLOR,
+                self.USER_POINTER_GAMUT_ALPHA,
+                self.USER_PLOT_PLANCKIAN_LOCUS,
+                self.USER_PLANCKIAN_LOCUS_COLOR,
+                self.USER_PLANCKIAN_LOCUS_ALPHA,
+                self.USER_SHOW_LEGEND,
+                self.USER_SHOW_AXES,
+                self.USER_STYLE,
+                self.USER_SHOW_GRID,
+                self.USER_GRID_COLOR,
+                self.USER_GRID_ALPHA,
+                self.USER_AXES_SCALE,
+                self.USER_AXES_OFFSET_X,
+                self.USER_AXES_OFFSET_Y,
+            ],
+        )
+        self.STATISTICS_STAGE = PipelineStage(
+            "statistics",
+            self._compute_statistics,
+            options=[
+                *colorspace_options,
+                self.USER_DIAGRAM_METHOD,
+                self.USER_FIGURE_COLORSPACES,
+            ],
+            upstream=[self.CHROMATICITY_STAGE],
+        )
+        self.TEMPERATURE_STAGE = PipelineStage(
+            "temperature",
+            self._compute_temperature_statistics,
+            options=[self.USER_DIAGRAM_METHOD],
+            upstream=[self.CHROMATICITY_STAGE],
+        )
+        self.COMPARISON_STAGE = PipelineStage(
+            "comparison",
+            self._compute_comparison,
+            options=[
+                *colorspace_options,
+                *alpha_options,
+                self.USER_SOURCE_TYPE,
+                self.USER_COMPARE,
+                self.USER_COMPARE_IMAGES,
+                self.USER_COMPARE_METHOD,
+            ],
+            upstream=[self.SOURCES_STAGE],
+        )
+        self.WORST_PIXELS_STAGE = PipelineStage(
+            "worst_pixels",
+            self._compute_worst_pixels,
+            options=[
+                *colorspace_options,
+                self.USER_DIAGRAM_METHOD,
+                self.USER_COMPARE_WORST,
+            ],
+            upstream=[self.COMPARISON_STAGE],
+        )
+        self.RENDER_STAGE = PipelineStage(
+            "render",
+            lambda series, worst_series, settings: plot_worker().submit(
+                [*series, *worst_series], settings
+            ),
+            upstream=[
+                self.CHROMATICITY_STAGE,
+                self.WORST_PIXELS_STAGE,
+                self.SETTINGS_STAGE,
+            ],
+        )
+        # all the pixels are converted, only done once region selection is enabled
+        self.REGION_INDEX_STAGE = PipelineStage(
+            "region_index",
+            self._compute_region_index,
+            options=[self.USER_REGION_SELECT, self.USER_DIAGRAM_METHOD, *alpha_options],
+            upstream=[self.SOURCES_STAGE, self.TRISTIMULUS_STAGE],
+        )
+        self.REGION_STAGE = PipelineStage(
+            "region",
+            self._compute_region_selections,
+            options=[
+                *colorspace_options,
+                self.USER_DIAGRAM_METHOD,
+                self.USER_FIGURE_COLORSPACES,
+                self.USER_REGION_SHAPE,
+                self.USER_REGION_RECTANGLE,
+                self.USER_REGION_GAMUT,
+            ],
+            upstream=[self.SOURCES_STAGE, self.REGION_INDEX_STAGE],
+        )
 
     @property
     def source_colorspace(self) -> RgbColorspace:
@@ -200,19 +645,36 @@ class UserConfig:
         colorspace = self.USER_SOURCE_COLORSPACE.get()
 
         if self.USER_SOURCE_FORCE_LINEAR.get():
-            colorspace = colorspace.copy()
-            colorspace.cctf_decoding = colour.linear_function
-            colorspace.cctf_encoding = colour.linear_function
+            colorspace = colorlib.get_linearized_colorspace(colorspace)
 
         return colorspace
 
+    @property
+    def alpha_threshold(self) -> Optional[float]:
+        """
+        Pixels of images with an alpha at or below it are discarded, None to keep
+        all the pixels.
+        """
+        if not self.USER_ALPHA_MASK.get():
+            return None
+        return self.USER_ALPHA_THRESHOLD.get()
+
+    @property
+    def min_image_samples(self) -> int:
+        """
+        Lowest image samples allowed by the current plot settings.
+        """
+        if self.USER_SCATTER_RASTER.get() or self.USER_SCATTER_OUTLINE.get():
+            return 1
+        return MIN_IMAGE_SAMPLES
+
     @property
     def color(self) -> RGBAColor:
         colorspace = self.source_colorspace
         color = self.USER_SOURCE_COLOR.get().as_colorspace(colorspace)
         return color
 
-    def _get_figure_colorspaces(self) -> dict[colour.RGB_Colourspace, str]:
+    def _get_figure_colorspaces(self) -> dict[RgbColorspace, str]:
         """
         Generate a list of colorspace to display in the graph with their associated display color.
 
@@ -236,73 +698,307 @@ class UserConfig:
 
         return figure_colorspaces
 
-    def generate_image(self) -> numpy.ndarray:
-        """
-        Return a floating point R-G-B image with an arbitrary dimension.
-        """
+    def _compute_sources(self) -> list[_Source]:
         if self.USER_SOURCE_TYPE.get() == SourceType.color:
+            return [_Source(color=self.USER_SOURCE_COLOR.get())]
+
+        user_images = self.USER_IMAGES.get()
+        if self.USER_SOURCE_TYPE.get() != SourceType.image or not user_images:
+            # sequences are directly converted to chromaticities, see _compute_series
+            return [_Source()]
+
+        return [
+            _Source(label=user_image.name, image=user_image)
+            for user_image in user_images
+        ]
+
+    def _compute_tristimulus(
+        self,
+        sources: list[_Source],
+    ) -> list[typing.Union[TristimulusSeries, TristimulusPyramid]]:
+        colorspace = self.source_colorspace
+        threshold = self.alpha_threshold
+
+        # executed in other threads so must not access the session state
+        def _get_series(
+            source: _Source,
+        ) -> typing.Union[TristimulusSeries, TristimulusPyramid]:
+            if source.image:
+                handle = source.image.handle
+                image = handle.get()
+                alpha_threshold = _get_alpha_threshold(image, threshold)
+                # pixels are converted when a subsample is requested, the cached
+                # pyramid must not keep the handle alive, so the store can evict it
+                return PLOT_SERIES_CACHE.get(
+                    (handle.key, colorspace, alpha_threshold),
+                    lambda: TristimulusPyramid(
+                        handle.get_getter(),
+                        shape=image.shape[:2],
+                        colorspace=colorspace,
+                        mask=(
+                            None
+                            if alpha_threshold is None
+                            else get_alpha_mask(image, alpha_threshold)
+                        ),
+                    ),
+                )
+
             # NOTE: bug with 1976 method, doesn't accept 1x1 array
-            image = numpy.full([2, 2, 3], self.color.to_array(alpha=False))
-            if not is_colorspace_decoding_linear(self.color.colorspace):
-                image = self.color.colorspace.cctf_decoding(image)
+            image = numpy.zeros([2, 2, 3])
+            if source.color:
+                color = source.color.as_colorspace(colorspace)
+                image = numpy.full([2, 2, 3], color.to_array(alpha=False))
+                if not is_colorspace_decoding_linear(color.colorspace):
+                    image = color.colorspace.cctf_decoding(image)
+            return compute_tristimulus_series(image, colorspace)
 
-            return image
+        with concurrent.futures.ThreadPoolExecutor(len(sources)) as executor:
+            return list(executor.map(_get_series, sources))
 
-        elif self.USER_SOURCE_TYPE.get() == SourceType.image:
-            samples = self.USER_IMAGE_SAMPLES.get()
-            image = self.USER_IMAGE.get()
-            source_colorspace = self.source_colorspace
+    def _compute_series(
+        self,
+        sources: list[_Source],
+        tristimulus: list[typing.Union[TristimulusSeries, TristimulusPyramid]],
+    ) -> list[PlotSeries]:
+        sequence_series = self.USER_SEQUENCE_SERIES.get()
+        if self.USER_SOURCE_TYPE.get() == SourceType.sequence and sequence_series:
+            return [sequence_series]
 
-            if image is None:
-                return numpy.full([2, 2, 3], [0.0, 0.0, 0.0])
+        # a stale value from when fast rendering was enabled
+        samples = max(self.USER_IMAGE_SAMPLES.get(), self.min_image_samples)
+        method = self.USER_DIAGRAM_METHOD.get().value
+        palette_size = (
+            self.USER_IMAGE_PALETTE_SIZE.get() if self.USER_IMAGE_PALETTE.get() else 0
+        )
+        whitepoint = self.source_colorspace.whitepoint
 
-            if image.shape[0] > samples or image.shape[1] > samples:
-                image = image[::samples, ::samples, ...]
+        # executed in other threads so must not access the session state
+        def _get_series(
+            source: _Source,
+            series: typing.Union[TristimulusSeries, TristimulusPyramid],
+        ) -> PlotSeries:
+            if not isinstance(series, TristimulusPyramid):
+                return project_series(series, method, label=source.label)
 
-            # NOTE: colour plotting function expect linear encoding
-            if not is_colorspace_decoding_linear(source_colorspace):
-                image = source_colorspace.cctf_decoding(image)
+            count = _get_sample_count(series.shape, samples)
+            # hidden pixels are not in the pyramid, keep the density of the samples
+            count = math.ceil(count * len(series) / (series.shape[0] * series.shape[1]))
+            series = series.head(count)
+            if palette_size:
+                return compute_palette_series(
+                    series, whitepoint, method, palette_size, label=source.label
+                )
+            return project_series(series, method, label=source.label)
 
-            return image
+        with concurrent.futures.ThreadPoolExecutor(len(sources)) as executor:
+            return list(executor.map(_get_series, sources, tristimulus))
 
-        else:
-            raise ValueError(f"Unsupported enum value: {self.USER_SOURCE_TYPE.get()}")
+    def _compute_statistics(self, series: list[PlotSeries]) -> list[GamutStatistics]:
+        gamuts = self.get_gamuts()
+        return [
+            compute_gamut_statistics(
+                single_series,
+                gamuts,
+                label=single_series.label or "Source",
+            )
+            for single_series in series
+        ]
+
+    def _compute_temperature_statistics(
+        self,
+        series: list[PlotSeries],
+    ) -> list[TemperatureStatistics]:
+        return [
+            compute_temperature_statistics(
+                single_series,
+                self.USER_DIAGRAM_METHOD.get().value,
+                label=single_series.label or "Source",
+            )
+            for single_series in series
+        ]
+
+    def _compute_region_index(
+        self,
+        sources: list[_Source],
+        tristimulus: list[typing.Union[TristimulusSeries, TristimulusPyramid]],
+    ) -> list[Optional[ChromaticityIndex]]:
+        if not self.USER_REGION_SELECT.get():
+            return [None] * len(sources)
 
-    def generate_plot(self) -> tuple[matplotlib.pyplot.Figure, matplotlib.pyplot.Axes]:
-        """
-        Generate the matplotlib graph using all the options previously configured.
-        """
-        image = self.generate_image()
         colorspace = self.source_colorspace
-        colour_colorspace = colorspace
-        figure_colorspaces = self._get_figure_colorspaces()
-        diagram_method = self.USER_DIAGRAM_METHOD.get()
+        method = self.USER_DIAGRAM_METHOD.get().value
+        threshold = self.alpha_threshold
 
-        if diagram_method == diagram_method.cie1931:
-            plot_RGB_chromaticities_function = (
-                colour.plotting.plot_RGB_chromaticities_in_chromaticity_diagram_CIE1931
-            )
-        elif diagram_method == diagram_method.cie1960:
-            plot_RGB_chromaticities_function = (
-                colour.plotting.plot_RGB_chromaticities_in_chromaticity_diagram_CIE1960UCS
+        # executed in other threads so must not access the session state
+        def _get_index(
+            source: _Source,
+            series: typing.Union[TristimulusSeries, TristimulusPyramid],
+        ) -> Optional[ChromaticityIndex]:
+            if not isinstance(series, TristimulusPyramid):
+                return None
+            handle = source.image.handle
+            alpha_threshold = _get_alpha_threshold(handle.get(), threshold)
+            return PLOT_SERIES_CACHE.get(
+                (handle.key, colorspace, alpha_threshold, method, "index"),
+                lambda: build_pixel_index(series, method),
             )
-        elif diagram_method == diagram_method.cie1976:
-            plot_RGB_chromaticities_function = (
-                colour.plotting.plot_RGB_chromaticities_in_chromaticity_diagram_CIE1976UCS
+
+        with concurrent.futures.ThreadPoolExecutor(len(sources)) as executor:
+            return list(executor.map(_get_index, sources, tristimulus))
+
+    def _compute_region_selections(
+        self,
+        sources: list[_Source],
+        indexes: list[Optional[ChromaticityIndex]],
+    ) -> list[RegionSelection]:
+        shape = self.USER_REGION_SHAPE.get()
+        rectangle = self.USER_REGION_RECTANGLE.get()
+        gamuts = dict(self.get_gamuts())
+        polygon = gamuts.get(self.USER_REGION_GAMUT.get())
+
+        selections = []
+        for source, index in zip(sources, indexes):
+            if index is None:
+                continue
+
+            start_time = time.time()
+            if shape == RegionShape.rectangle and rectangle:
+                mask = index.query_rectangle(*rectangle)
+            elif shape != RegionShape.rectangle and polygon is not None:
+                mask = index.query_convex_polygon(
+                    polygon, outside=shape == RegionShape.outside_gamut
+                )
+            else:
+                mask = None
+
+            selections.append(
+                RegionSelection(
+                    image=source.image,
+                    mask=mask,
+                    duration=time.time() - start_time,
+                )
             )
-        else:
-            raise ValueError(f"Unsupported diagram method {diagram_method}")
-
-        plot_settings = {}
-        if figure_colorspaces:
-            colors = list(figure_colorspaces.values())
-            if len(colors) == 1:
-                # ensure the list is always of len 2 at minimum
-                colors.append("#000000")
-            color_map = matplotlib.colors.LinearSegmentedColormap.from_list(
-                "user", colors
+        return selections
+
+    def _compute_comparison(self, sources: list[_Source]) -> Optional[ImageComparison]:
+        if not self.USER_COMPARE.get() or not self.USER_COMPARE_IMAGES.get():
+            return None
+
+        images = {
+            source.image.file_id: source.image for source in sources if source.image
+        }
+        reference_id, compared_id = self.USER_COMPARE_IMAGES.get()
+        if reference_id not in images or compared_id not in images:
+            return None
+
+        reference = images[reference_id]
+        compared = images[compared_id]
+        reference_array = reference.handle.get()
+        compared_array = compared.handle.get()
+        if reference_array.shape[:2] != compared_array.shape[:2]:
+            return ImageComparison(reference, compared, difference=None)
+
+        # only the pixels visible in both images are compared
+        mask = None
+        threshold = self.alpha_threshold
+        if threshold is not None:
+            for image in (reference_array, compared_array):
+                image_mask = get_alpha_mask(image, threshold)
+                if image_mask is not None:
+                    mask = image_mask if mask is None else mask & image_mask
+
+        difference = compute_difference_map(
+            reference_array,
+            compared_array,
+            self.source_colorspace,
+            self.USER_COMPARE_METHOD.get(),
+            mask=mask,
+        )
+        return ImageComparison(reference, compared, difference=difference)
+
+    def _compute_worst_pixels(
+        self,
+        comparison: Optional[ImageComparison],
+    ) -> list[PlotSeries]:
+        count = self.USER_COMPARE_WORST.get()
+        if comparison is None or comparison.difference is None or not count:
+            return []
+
+        colorspace = self.source_colorspace
+        method = self.USER_DIAGRAM_METHOD.get().value
+        pixels = comparison.difference.get_worst_pixels(count)
+
+        series = []
+        for user_image in (comparison.reference, comparison.compared):
+            image = user_image.handle.get()
+            RGB = numpy.reshape(image, (-1, image.shape[-1]))[pixels, :3]
+            series.append(
+                compute_series(
+                    linearize_image(RGB, colorspace),
+                    colorspace,
+                    method,
+                    label=f"{user_image.name} (worst {len(pixels)})",
+                )
             )
-            plot_settings["colour_cycle_map"] = color_map
+        return series
+
+    def get_gamuts(self) -> list[tuple[str, numpy.ndarray]]:
+        """
+        Name and polygon of each gamut displayed, in the current diagram coordinates.
+        """
+        # the source colorspace is always drawn
+        colorspaces = [self.source_colorspace, *self._get_figure_colorspaces()]
+        return get_gamuts(colorspaces, self.USER_DIAGRAM_METHOD.get().value)
+
+    def get_temperature_statistics(self) -> list[TemperatureStatistics]:
+        """
+        Distribution of the correlated color temperature of each series.
+        """
+        return self.TEMPERATURE_STAGE.get()
+
+    def get_image_comparison(self) -> Optional[ImageComparison]:
+        """
+        Color difference between the two images picked by the user, None if the
+        comparison is disabled.
+        """
+        return self.COMPARISON_STAGE.get()
+
+    def get_region_selections(self) -> list[RegionSelection]:
+        """
+        Pixels of each image in the region selected by the user, empty if the region
+        selection is disabled.
+        """
+        return self.REGION_STAGE.get()
+
+    def generate_series(self) -> list[PlotSeries]:
+        """
+        Return the chromaticities to scatter, one series per uploaded image.
+        """
+        return self.CHROMATICITY_STAGE.get()
+
+    def get_plot_settings(self) -> PlotSettings:
+        """
+        Snapshot of all the options affecting the look of the plot.
+        """
+        return self.SETTINGS_STAGE.get()
+
+    def get_gamut_statistics(self) -> list[GamutStatistics]:
+        """
+        Proportion of the points of each series outside the displayed gamuts.
+        """
+        return self.STATISTICS_STAGE.get()
+
+    def submit_plot(self) -> int:
+        """
+        Request the plot to be generated by the session worker.
+
+        Returns:
+            generation of the plot in the worker.
+        """
+        return self.RENDER_STAGE.get()
+
+    def _compute_plot_settings(self) -> PlotSettings:
+        from streamlit_colourplotting.plotting import PlotSettings
 
         marker_color = (
             "RGB"
@@ -312,73 +1008,47 @@ class UserConfig:
         locus_color = (
             "RGB" if self.USER_LOCUS_COLOR_RGB.get() else self.USER_LOCUS_COLOR.get()
         )
-        with matplotlib.style.context(self.USER_STYLE.get()):
-            (
-                figure,
-                axes,
-            ) = plot_RGB_chromaticities_function(
-                image,
-                colourspace=colour_colorspace,
-                colourspaces=list(figure_colorspaces.keys()),
-                scatter_kwargs={
-                    "s": self.USER_SCATTER_SIZE.get(),
-                    "c": marker_color,
-                    "alpha": self.USER_SCATTER_ALPHA.get(),
-                    "marker": self.USER_MARKER_STYLE.get().as_core(),
-                    "zorder": 0,
-                },
-                # styling
-                show_spectral_locus=self.USER_LOCUS_SHOW.get(),
-                spectral_locus_colours=locus_color,
-                spectral_locus_opacity=self.USER_LOCUS_ALPHA.get(),
-                show_diagram_colours=self.USER_LOCUS_BACKGROUND_RGB.get(),
-                show_whitepoints=self.USER_SHOW_WHITEPOINT.get(),
-                show_pointer_gamut=self.USER_PLOT_POINTER_GAMUT.get(),
-                pointer_gamut_colours=self.USER_POINTER_GAMUT_COLOR.get(),
-                pointer_gamut_opacity=self.USER_POINTER_GAMUT_ALPHA.get(),
-                transparent_background=False,
-                # prevent calling show()
-                standalone=True,
-                legend=self.USER_SHOW_LEGEND.get(),
-                axes_visible=self.USER_SHOW_AXES.get(),
-                aspect="equal",
-                **plot_settings,
-            )
-
-            bounds_x_min, bounds_x_max = axes.get_xlim()
-            bounds_y_min, bounds_y_max = axes.get_ylim()
-
-            bounds_x_min, bounds_x_max, bounds_y_min, bounds_y_max = transform_box(
-                bounds_x_min,
-                bounds_x_max,
-                bounds_y_min,
-                bounds_y_max,
-                scale=self.USER_AXES_SCALE.get(),
-                offset_x=self.USER_AXES_OFFSET_X.get(),
-                offset_y=self.USER_AXES_OFFSET_Y.get(),
-            )
-
-            axes.set_xlim(bounds_x_min, bounds_x_max)
-            axes.set_ylim(bounds_y_min, bounds_y_max)
-
-            if self.USER_SHOW_GRID.get():
-                # NOTE: doesn't work anyway cause colour use negative zorder
-                axes.set_axisbelow(True)
-                axes.grid(
-                    visible=self.USER_SHOW_GRID.get(),
-                    alpha=self.USER_GRID_ALPHA.get(),
-                    color=self.USER_GRID_COLOR.get(),
-                )
-
-        return figure, axes
+        return PlotSettings(
+            colorspace=self.source_colorspace,
+            diagram_method=self.USER_DIAGRAM_METHOD.get().value,
+            figure_colorspaces=tuple(self._get_figure_colorspaces().items()),
+            scatter_size=self.USER_SCATTER_SIZE.get(),
+            scatter_color=marker_color,
+            scatter_alpha=self.USER_SCATTER_ALPHA.get(),
+            marker_style=self.USER_MARKER_STYLE.get().as_core(),
+            scatter_outline=self.USER_SCATTER_OUTLINE.get(),
+            scatter_raster=self.USER_SCATTER_RASTER.get(),
+            raster_aggregate=self.USER_RASTER_AGGREGATE.get().as_core(),
+            locus_show=self.USER_LOCUS_SHOW.get(),
+            locus_color=locus_color,
+            locus_alpha=self.USER_LOCUS_ALPHA.get(),
+            locus_background=self.USER_LOCUS_BACKGROUND_RGB.get(),
+            show_whitepoints=self.USER_SHOW_WHITEPOINT.get(),
+            show_pointer_gamut=self.USER_PLOT_POINTER_GAMUT.get(),
+            pointer_gamut_color=self.USER_POINTER_GAMUT_COLOR.get(),
+            pointer_gamut_alpha=self.USER_POINTER_GAMUT_ALPHA.get(),
+            show_planckian_locus=self.USER_PLOT_PLANCKIAN_LOCUS.get(),
+            planckian_locus_color=self.USER_PLANCKIAN_LOCUS_COLOR.get(),
+            planckian_locus_alpha=self.USER_PLANCKIAN_LOCUS_ALPHA.get(),
+            show_legend=self.USER_SHOW_LEGEND.get(),
+            show_axes=self.USER_SHOW_AXES.get(),
+            style=dict(self.USER_STYLE.get()),
+            show_grid=self.USER_SHOW_GRID.get(),
+            grid_color=self.USER_GRID_COLOR.get(),
+            grid_alpha=self.USER_GRID_ALPHA.get(),
+            axes_scale=self.USER_AXES_SCALE.get(),
+            axes_offset_x=self.USER_AXES_OFFSET_X.get(),
+            axes_offset_y=self.USER_AXES_OFFSET_Y.get(),
+        )
 
-    def post_clean(self):
+    def generate_plot(self) -> tuple[matplotlib.pyplot.Figure, matplotlib.pyplot.Axes]:
         """
-        Optimize the user config. To use after it has been used as intended.
+        Generate the matplotlib graph using all the options previously configured.
         """
-        # we clear the image array as we don't need it anymore,
-        # this make sure it doesn't stay in memory
-        self.USER_IMAGE.set(None)
+        # plotting modules are slow to import so only do it when needed
+        from streamlit_colourplotting import plotting
+
+        return plotting.generate_plot(self.generate_series(), self.get_plot_settings())
 
 
 def config(force_instance: bool = False) -> UserConfig:
@@ -391,3 +1061,12 @@ def config(force_instance: bool = False) -> UserConfig:
     if "USER_CONFIG" not in streamlit.session_state or force_instance:
         streamlit.session_state["USER_CONFIG"] = UserConfig()
     return streamlit.session_state["USER_CONFIG"]
+
+
+def plot_worker() -> PlotWorker:
+    """
+    Return the worker generating the plots of the current session.
+    """
+    if "PLOT_WORKER" not in streamlit.session_state:
+        streamlit.session_state["PLOT_WORKER"] = PlotWorker()
+    return streamlit.session_state["PLOT_WORKER"]
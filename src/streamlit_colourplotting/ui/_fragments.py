@@ -0,0 +1,38 @@
+"""
+The page is split in fragments so an interaction only reruns the part of the page
+it affects:
+
+- the source fragment, with the widgets to pick the color source.
+- the plot fragment, with the sidebar styling widgets and the plot result.
+
+Widgets changing which source widgets are displayed are created outside
+fragments and rerun the whole app.
+"""
+
+from typing import Callable
+from typing import Optional
+
+import streamlit
+
+SOURCE_FRAGMENT_KEY = "source"
+
+PLOT_FRAGMENT_KEY = "plot"
+
+
+def source_callback(callback: Optional[Callable] = None) -> Callable:
+    """
+    Get a callback for a widget of the source fragment.
+
+    The source fragment and then the plot are rerun after the widget changed, as a
+    fragment only rerun itself by default.
+
+    Args:
+        callback: optional callback of the widget to call before.
+    """
+
+    def _callback():
+        if callback is not None:
+            callback()
+        streamlit.rerun([SOURCE_FRAGMENT_KEY, PLOT_FRAGMENT_KEY])
+
+    return _callback
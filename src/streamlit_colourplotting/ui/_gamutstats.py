@@ -0,0 +1,46 @@
+from typing import Sequence
+
+import streamlit
+
+from streamlit_colourplotting.gamut import GamutStatistics
+from streamlit_colourplotting.gamut import gamut_statistics_to_json
+
+
+def create_gamut_statistics(statistics: Sequence[GamutStatistics], method: str):
+    """
+    Create a table of the proportion of plotted points outside each displayed gamut.
+
+    Args:
+        statistics: statistics of each plotted series.
+        method: diagram method the statistics were computed in.
+    """
+    if not statistics:
+        return
+
+    streamlit.subheader("Out of Gamut")
+
+    gamut_names = list(statistics[0].outside)
+    table = {"Source": [single.label for single in statistics]}
+    table["Points"] = [single.points for single in statistics]
+    for gamut_name in gamut_names:
+        table[gamut_name] = [single.outside[gamut_name] * 100 for single in statistics]
+
+    streamlit.dataframe(
+        table,
+        hide_index=True,
+        column_config={
+            gamut_name: streamlit.column_config.NumberColumn(format="%.2f %%")
+            for gamut_name in gamut_names
+        },
+    )
+    streamlit.caption(
+        "Percentage of the plotted points outside each gamut, "
+        f"in {method} coordinates."
+    )
+
+    streamlit.download_button(
+        label="Download as JSON",
+        data=gamut_statistics_to_json(statistics, method),
+        file_name="gamut_statistics.json",
+        mime="application/json",
+    )
@@ -1,4 +1,5 @@
-import os
+import concurrent.futures
+import hashlib
 import traceback
 
 import numpy
@@ -6,11 +7,17 @@ import streamlit
 
 import streamlit_colourplotting.core
 from streamlit_colourplotting.colorlib import colorspace_to_colorspace
-from streamlit_colourplotting.colorlib import sRGB_COLORSPACE
+from streamlit_colourplotting import colorlib
 from streamlit_colourplotting.colorlib import ChromaticAdaptationTransform
 from streamlit_colourplotting.colorlib import convert_float_to_int8
+from streamlit_colourplotting.imagestore import ImageHandle
+from streamlit_colourplotting.imagestore import get_image_store
+from streamlit_colourplotting.memory import get_memory_budget
 from streamlit_colourplotting.ui import config
+from streamlit_colourplotting.ui._config import UserImage
 from ._colorspacepicker import create_colorspace_picker
+from ._comparison import create_comparison_picker
+from ._fragments import source_callback
 
 SUPPORTED_EXTENSION = [
     ".png",
@@ -27,29 +34,107 @@ SUPPORTED_EXTENSION = [
 ]
 
 
-def _get_image_from_bytes(bytesio):
-    return streamlit_colourplotting.core.read_image_from_bytes(bytesio)
+DECODE_TIMEOUT = 30.0
+"""
+maximum time in seconds to wait for memory to be available to decode an image.
+"""
 
 
-def create_image_preview(image_array: numpy.ndarray, target_width):
+def _get_image_handle(bytesio) -> ImageHandle:
     """
-    Generate a small thumbnail displaying the submitted image
+    Get the image from the shared store, decoding it within the server memory budget
+    if not already stored.
+
+    Can be called from any thread.
+    """
+    info = streamlit_colourplotting.core.probe_image_from_bytes(bytesio)
+    budget = get_memory_budget()
+    stride = budget.get_stride(info)
+    key = f"{hashlib.sha256(bytesio.getbuffer()).hexdigest()}-{stride}"
+
+    def _decode() -> numpy.ndarray:
+        with budget.reserve(info.estimate_read_nbytes(stride), timeout=DECODE_TIMEOUT):
+            return streamlit_colourplotting.core.decode_image_from_bytes(
+                bytesio, stride=stride, keep_alpha=True
+            )
+
+    return get_image_store().acquire(key, _decode, info=info, stride=stride)
+
+
+def get_image_preview(image_array: numpy.ndarray, target_width) -> numpy.ndarray:
+    """
+    Get a small sRGB thumbnail of the submitted image.
+
+    Args:
+        image_array: R-G-B image in any data type supported by ``convert_image_to_float``
+
+    Returns:
+        8bit R-G-B image, rescaled like ``core.rescale_image_fast``.
     """
 
     # we don't care about quality as it's a preview
     preview_array = streamlit_colourplotting.core.rescale_image_fast(
         image_array, target_width
-    )
+    )[..., :3]
+    preview_array = streamlit_colourplotting.core.convert_image_to_float(preview_array)
 
     source_colorspace = config().source_colorspace
     preview_array = colorspace_to_colorspace(
         preview_array,
         source_colorspace,
-        sRGB_COLORSPACE,
+        colorlib.sRGB_COLORSPACE,
         ChromaticAdaptationTransform.get_default(),
     )
-    preview_array = convert_float_to_int8(preview_array)
-    streamlit.image(preview_array, caption=f"sRGB preview {image_array.shape}")
+    return convert_float_to_int8(preview_array)
+
+
+def create_image_preview(image_array: numpy.ndarray, target_width, caption: str):
+    """
+    Generate a small thumbnail displaying the submitted image
+
+    Args:
+        image_array: R-G-B image in any data type supported by ``convert_image_to_float``
+    """
+    streamlit.image(get_image_preview(image_array, target_width), caption=caption)
+
+
+def _format_error(error: Exception) -> str:
+    error_tb = "\n- ".join(
+        [line.split(",", 1)[-1] for line in traceback.format_tb(error.__traceback__)]
+    )
+    return f"{error}\n\n- {error_tb}"
+
+
+def create_alpha_options():
+    """
+    Create the widgets to discard the transparent pixels of the images.
+    """
+    column1, column2 = streamlit.columns(2)
+    with column1:
+        enabled = streamlit.toggle(
+            label="Discard Transparent Pixels",
+            key="alphaMask",
+            value=config().USER_ALPHA_MASK.default,
+            help=(
+                "Ignore the pixels of the images with an alpha channel whose alpha "
+                "is at or below the threshold, they are neither plotted nor "
+                "converted."
+            ),
+            on_change=source_callback(),
+        )
+        config().USER_ALPHA_MASK.set(enabled)
+    with column2:
+        threshold = streamlit.number_input(
+            label="Alpha Threshold",
+            min_value=0.0,
+            max_value=1.0,
+            step=0.05,
+            key="alphaThreshold",
+            value=config().USER_ALPHA_THRESHOLD.default,
+            disabled=not enabled,
+            on_change=source_callback(),
+        )
+        config().USER_ALPHA_THRESHOLD.set(threshold)
 
 
 def create_image_picker():
@@ -58,43 +143,100 @@ def create_image_picker():
     column1, column2 = streamlit.columns([0.3, 0.7])
 
     with column2:
-        user_image = streamlit.file_uploader(
-            label="Image Path",
+        user_files = streamlit.file_uploader(
+            label="Image Paths",
             type=SUPPORTED_EXTENSION,
+            accept_multiple_files=True,
+            on_change=source_callback(),
         )
 
-    image_array = None
-
-    if user_image is not None:
+    # images are kept across reruns, only retrieve the new uploads
+    previous_images = {image.file_id: image for image in config().USER_IMAGES.get()}
+    new_files = [file for file in user_files if file.file_id not in previous_images]
+    futures = {}
+    if new_files:
+        with streamlit.spinner("Decoding images ..."):
+            with concurrent.futures.ThreadPoolExecutor(len(new_files)) as executor:
+                futures = {
+                    file.file_id: executor.submit(_get_image_handle, file)
+                    for file in new_files
+                }
+                concurrent.futures.wait(futures.values())
+
+    user_images = []
+
+    for user_file in user_files:
         try:
-            image_array = _get_image_from_bytes(user_image)
-
-            if os.getenv("STCP_ENABLE_SIZE_LIMITATIONS") and (
-                image_array.shape[0] > 2048 or image_array.shape[1] > 2048
-            ):
-                raise ValueError(
-                    f"Given image has dimensions superior to 2048x2048: {image_array.shape}."
-                    f"This might crash the server, submit a smaller image."
+            user_image = previous_images.get(user_file.file_id)
+            if user_image is None:
+                user_image = UserImage(
+                    file_id=user_file.file_id,
+                    name=user_file.name,
+                    handle=futures[user_file.file_id].result(),
                 )
 
+            image_info = user_image.handle.info
             with column1:
-                create_image_preview(image_array, 200)
+                create_image_preview(
+                    user_image.handle.get(),
+                    200,
+                    caption=(
+                        f"sRGB preview {(image_info.height, image_info.width)} "
+                        f"{image_info.bit_depth}bit"
+                    ),
+                )
+
+            if user_image.handle.stride > 1:
+                with column2:
+                    streamlit.caption(
+                        f"{user_image.name} too large for the server memory, "
+                        f"only 1 in {user_image.handle.stride} pixels was read on each axis."
+                    )
+
+            user_images.append(user_image)
 
         except Exception as error:
-            image_array = None
-            error_tb = "\n- ".join(
-                [
-                    line.split(",", 1)[-1]
-                    for line in traceback.format_tb(error.__traceback__)
-                ]
+            streamlit.error(
+                f"Can't read provided image {user_file.name}: {_format_error(error)}"
             )
-            streamlit.error(f"Can't read provided image: {error}\n\n- {error_tb}")
 
-    else:
+    if not user_files:
         with column1:
             streamlit.caption(
-                "⚠️Please avoid uploading images with too large dimensions (>2K)"
-                "(especially 8/16bit images). "
-                "**You might crash the server.**"
+                "⚠️Images too large for the server memory are read at a lower "
+                "resolution."
             )
-    config().USER_IMAGE.set(image_array)
+
+    config().USER_IMAGES.set(user_images)
+
+    if any(user_image.handle.get().shape[2] > 3 for user_image in user_images):
+        create_alpha_options()
+
+    column1, column2 = streamlit.columns(2)
+    with column1:
+        palette = streamlit.toggle(
+            label="Dominant Colors Only",
+            key="imagePalette",
+            value=config().USER_IMAGE_PALETTE.default,
+            help=(
+                "Plot the dominant colors of the sampled pixels instead of every "
+                "pixel, each sized by the number of pixels of that color. Colors are "
+                "found by clustering the pixels in CIE L*a*b*."
+            ),
+            on_change=source_callback(),
+        )
+        config().USER_IMAGE_PALETTE.set(palette)
+    with column2:
+        palette_size = streamlit.number_input(
+            label="Colors",
+            min_value=1,
+            max_value=64,
+            key="imagePaletteSize",
+            value=config().USER_IMAGE_PALETTE_SIZE.default,
+            disabled=not palette,
+            on_change=source_callback(),
+        )
+        config().USER_IMAGE_PALETTE_SIZE.set(palette_size)
+
+    if len(user_images) >= 2:
+        create_comparison_picker(user_images)
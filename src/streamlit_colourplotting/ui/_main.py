@@ -1,12 +1,28 @@
-import io
-
-import matplotlib.pyplot
 import streamlit
 
 from streamlit_colourplotting.ui import config
+from streamlit_colourplotting.ui import plot_worker
 from ._sidebar import create_sidebar
+from ._sidebar import create_sidebar_style
 from ._colorpicker import create_color_picker
 from ._imagepicker import create_image_picker
+from ._gamutstats import create_gamut_statistics
+from ._temperaturestats import create_temperature_statistics
+from ._regionselect import create_region_selection
+from ._comparison import create_image_comparison
+from ._sequencepicker import create_sequence_picker
+from ._fragments import PLOT_FRAGMENT_KEY
+from ._fragments import SOURCE_FRAGMENT_KEY
+
+PLOT_WAIT_TIMEOUT = 0.5
+"""
+maximum time in seconds the script wait for a plot before displaying the previous one.
+"""
+
+PLOT_POLL_INTERVAL = 0.25
+"""
+time in seconds between each check of the plot being generated.
+"""
 
 
 def create_issue_warning():
@@ -34,37 +50,99 @@ def create_issue_warning():
     config().USER_SOURCE_ERROR.set(issues.unset)
 
 
-def create_body_source():
-    streamlit.header("Color Source")
+def _show_plot_result(generation: int, polling: bool):
+    """
+    Display the latest plot generated, which might be older than the given generation.
+
+    Args:
+        generation: generation of the plot matching the current user config.
+        polling: True if called periodically until the plot is generated.
+    """
+    if polling and plot_worker().is_done(generation):
+        # a full rerun stop the periodic execution of this fragment
+        streamlit.rerun()
+
+    result = plot_worker().get_result()
+    if result is None:
+        streamlit.caption("Generating plot ...")
+        return
+
+    if result.error:
+        streamlit.error(f"Cannot generate the plot: {result.error}")
+        return
+
+    streamlit.image(result.png, width="stretch")
+    if result.generation < generation:
+        streamlit.caption("Updating plot ...")
+
+    streamlit.download_button(
+        label="Download as SVG",
+        data=result.svg,
+        file_name="plot.svg",
+        mime="image/svg+xml",
+    )
+
 
+def create_source():
     create_issue_warning()
 
     if config().USER_SOURCE_TYPE.get() == config().USER_SOURCE_TYPE.get().color:
         create_color_picker()
     elif config().USER_SOURCE_TYPE.get() == config().USER_SOURCE_TYPE.get().image:
         create_image_picker()
+    elif config().USER_SOURCE_TYPE.get() == config().USER_SOURCE_TYPE.get().sequence:
+        create_sequence_picker()
 
-    streamlit.header("Plot Result")
 
-    # make sure the graph is created at the end
-    with streamlit.spinner("Generating plot ..."):
-        figure, axes = config().generate_plot()
+def create_plot(style_container):
+    """
+    Args:
+        style_container: sidebar container to create the styling widgets in.
+    """
+    with style_container:
+        create_sidebar_style()
 
-    # execute before calling matplotlib.pyplot.show()
-    plot_file = io.BytesIO()
-    matplotlib.pyplot.savefig(plot_file, format="svg")
+    # the worst pixels are plotted so the comparison is needed before the plot
+    with streamlit.spinner("Comparing images ..."):
+        comparison = config().get_image_comparison()
 
-    # this call matplotlib.pyplot.show()
-    streamlit.pyplot(figure, clear_figure=True)
+    generation = config().submit_plot()
 
-    config().post_clean()
+    # fast plots are displayed in the same run, slow ones are polled for
+    plot_worker().wait(generation, timeout=PLOT_WAIT_TIMEOUT)
+    is_done = plot_worker().is_done(generation)
+    show_plot_result = streamlit.fragment(
+        _show_plot_result,
+        run_every=None if is_done else PLOT_POLL_INTERVAL,
+    )
+    show_plot_result(generation, polling=not is_done)
 
-    streamlit.download_button(
-        label="Download as SVG", data=plot_file, file_name="plot.svg"
+    create_gamut_statistics(
+        config().get_gamut_statistics(),
+        config().USER_DIAGRAM_METHOD.get().value,
     )
+    create_temperature_statistics(
+        config().get_temperature_statistics(),
+        config().USER_DIAGRAM_METHOD.get().value,
+    )
+
+    is_image = config().USER_SOURCE_TYPE.get() == config().USER_SOURCE_TYPE.get().image
+    if is_image and config().USER_IMAGES.get():
+        create_image_comparison(comparison)
+        create_region_selection()
 
-    plot_file.flush()
-    plot_file.close()
+
+def create_body_source(style_container):
+    """
+    Args:
+        style_container: sidebar container to create the styling widgets in.
+    """
+    streamlit.header("Color Source")
+    streamlit.fragment(create_source, key=SOURCE_FRAGMENT_KEY)()
+
+    streamlit.header("Plot Result")
+    # make sure the graph is created at the end
+    streamlit.fragment(create_plot, key=PLOT_FRAGMENT_KEY)(style_container)
 
 
 def create_main_ui():
@@ -80,9 +158,9 @@ def create_main_ui():
     )
 
     with streamlit.sidebar:
-        create_sidebar()
+        style_container = create_sidebar()
 
-    create_body_source()
+    create_body_source(style_container)
 
     streamlit.divider()
     streamlit.caption(
@@ -0,0 +1,193 @@
+from typing import Optional
+from typing import Sequence
+
+import numpy
+import streamlit
+
+from streamlit_colourplotting.chromaticity import PlotSeries
+from streamlit_colourplotting.core import rescale_image_fast
+from streamlit_colourplotting.ui import config
+from streamlit_colourplotting.ui._config import RegionSelection
+from streamlit_colourplotting.ui._config import RegionShape
+from ._imagepicker import get_image_preview
+
+CHART_MAX_POINTS = 5000
+"""
+maximum number of points of each image drawn in the chart to draw the region on.
+"""
+
+PREVIEW_WIDTH = 300
+"""
+width in pixels of the preview highlighting the selected pixels.
+"""
+
+UNSELECTED_DIMMING = 4
+"""
+factor dividing the color of the pixels outside the region in the preview.
+"""
+
+
+def _to_hexadecimal(colors: numpy.ndarray) -> list[str]:
+    colors = numpy.round(numpy.clip(colors, 0, 1) * 255).astype(numpy.uint8)
+    return [f"#{red:02x}{green:02x}{blue:02x}" for red, green, blue in colors.tolist()]
+
+
+def _create_region_chart(
+    series: Sequence[PlotSeries],
+    gamuts: Sequence[tuple[str, numpy.ndarray]],
+    method: str,
+) -> Optional[tuple[tuple[float, float], tuple[float, float]]]:
+    """
+    Create an interactive scatter of a subsample of the plotted points to draw a
+    rectangle on.
+
+    Returns:
+        x and y range of the rectangle drawn by the user, None if none.
+    """
+    import altair
+    import pandas
+
+    points = []
+    for single_series in series:
+        step = max(len(single_series.coordinates) // CHART_MAX_POINTS, 1)
+        coordinates = single_series.coordinates[::step]
+        points.append(
+            pandas.DataFrame(
+                {
+                    "x": coordinates[:, 0],
+                    "y": coordinates[:, 1],
+                    "color": _to_hexadecimal(single_series.colors[::step]),
+                }
+            )
+        )
+
+    outlines = [
+        pandas.DataFrame(
+            {
+                "x": closed_polygon[:, 0],
+                "y": closed_polygon[:, 1],
+                "gamut": name,
+                "order": numpy.arange(len(closed_polygon)),
+            }
+        )
+        for name, polygon in gamuts
+        for closed_polygon in [numpy.concatenate([polygon, polygon[:1]])]
+    ]
+
+    brush = altair.selection_interval(name="region", encodings=["x", "y"])
+    x_axis = altair.X("x:Q", title=f"{method} x", scale=altair.Scale(zero=False))
+    y_axis = altair.Y("y:Q", title=f"{method} y", scale=altair.Scale(zero=False))
+
+    points_chart = (
+        altair.Chart(pandas.concat(points))
+        .mark_circle(size=12, opacity=0.8)
+        .encode(x=x_axis, y=y_axis, color=altair.Color("color:N", scale=None))
+        .add_params(brush)
+    )
+    outlines_chart = (
+        altair.Chart(pandas.concat(outlines))
+        .mark_line(color="#888888", strokeWidth=1)
+        .encode(x=x_axis, y=y_axis, detail="gamut:N", order="order:Q", tooltip="gamut")
+    )
+
+    event = streamlit.altair_chart(
+        altair.layer(outlines_chart, points_chart).properties(height=400),
+        on_select="rerun",
+        selection_mode="region",
+        # a rectangle drawn in other coordinates doesn't make sense
+        key=f"regionChart{method}",
+        width="stretch",
+    )
+    rectangle = event.selection.get("region")
+    if not rectangle or "x" not in rectangle or "y" not in rectangle:
+        return None
+    return tuple(rectangle["x"]), tuple(rectangle["y"])
+
+
+def _create_selection_preview(selection: RegionSelection):
+    """
+    Display a thumbnail of the image where the pixels outside the region are dimmed.
+    """
+    image = selection.image.handle.get()
+    preview = get_image_preview(image, PREVIEW_WIDTH)
+
+    if selection.mask is None:
+        streamlit.image(preview, caption=selection.image.name)
+        return
+
+    # rescaled like the image so they have the same shape
+    mask = rescale_image_fast(selection.mask, PREVIEW_WIDTH)
+    preview = numpy.where(
+        mask[..., numpy.newaxis], preview, preview // UNSELECTED_DIMMING
+    )
+
+    count = numpy.count_nonzero(selection.mask)
+    streamlit.image(
+        preview,
+        caption=(
+            f"{selection.image.name}: {count} pixels "
+            f"({count / selection.mask.size:.2%}) "
+            f"found in {selection.duration * 1000:.1f}ms"
+        ),
+    )
+
+
+def create_region_selection():
+    """
+    Create the widgets to highlight the pixels of the images whose chromaticity is
+    in a region of the diagram.
+    """
+    streamlit.subheader("Region Selection")
+
+    enabled = streamlit.toggle(
+        label="Select Pixels by Chromaticity",
+        value=config().USER_REGION_SELECT.get(),
+        key="regionSelect",
+        help=(
+            "Highlight the pixels of the images in a region of the diagram. "
+            "Enabling it converts all the pixels of the images once, which can take "
+            "a few seconds for large images."
+        ),
+    )
+    config().USER_REGION_SELECT.set(enabled)
+    if not enabled:
+        return
+
+    method = config().USER_DIAGRAM_METHOD.get().value
+    gamuts = config().get_gamuts()
+    gamut_names = [name for name, _ in gamuts]
+
+    column1, column2 = streamlit.columns(2)
+    with column1:
+        options = RegionShape.labels()
+        shape = streamlit.selectbox(
+            label="Region",
+            options=options,
+            index=options.index(config().USER_REGION_SHAPE.get().value),
+            key="regionShape",
+        )
+        config().USER_REGION_SHAPE.set(RegionShape(shape))
+
+    if config().USER_REGION_SHAPE.get() == RegionShape.rectangle:
+        streamlit.caption("Drag a rectangle on the chart to select the pixels in it.")
+        rectangle = _create_region_chart(config().generate_series(), gamuts, method)
+        config().USER_REGION_RECTANGLE.set(rectangle)
+    else:
+        with column2:
+            gamut = config().USER_REGION_GAMUT.get()
+            gamut = streamlit.selectbox(
+                label="Gamut",
+                options=gamut_names,
+                index=gamut_names.index(gamut) if gamut in gamut_names else 0,
+                help="One of the gamut displayed in the plot.",
+                key="regionGamut",
+            )
+            config().USER_REGION_GAMUT.set(gamut)
+
+    with streamlit.spinner("Indexing the chromaticity of all the pixels ..."):
+        selections = config().get_region_selections()
+
+    columns = streamlit.columns(min(len(selections), 3) or 1)
+    for index, selection in enumerate(selections):
+        with columns[index % len(columns)]:
+            _create_selection_preview(selection)
@@ -0,0 +1,140 @@
+import streamlit
+
+from streamlit_colourplotting.chromaticity import PLOT_SERIES_CACHE
+from streamlit_colourplotting.chromaticity import PlotSeries
+from streamlit_colourplotting.chromaticity import SeriesHistogram
+from streamlit_colourplotting.chromaticity import SeriesReservoir
+from streamlit_colourplotting.chromaticity import compute_series
+from streamlit_colourplotting.chromaticity import linearize_image
+from streamlit_colourplotting.memory import get_memory_budget
+from streamlit_colourplotting.sequence import ARCHIVE_EXTENSIONS
+from streamlit_colourplotting.sequence import VIDEO_EXTENSIONS
+from streamlit_colourplotting.sequence import open_frame_sequence
+from streamlit_colourplotting.ui import config
+from streamlit_colourplotting.ui._config import SequenceAggregate
+from ._colorspacepicker import create_colorspace_picker
+from ._fragments import source_callback
+from ._imagepicker import DECODE_TIMEOUT
+from ._imagepicker import SUPPORTED_EXTENSION
+from ._imagepicker import _format_error
+
+RESERVOIR_MAX_POINTS = 20000
+"""
+maximum number of points kept from all the frames of a sequence.
+"""
+
+HISTOGRAM_BINS = 128
+"""
+number of bins on each axis of the density histogram of a sequence.
+"""
+
+
+def _compute_sequence_series(user_file, progress_bar) -> PlotSeries:
+    """
+    Stream every frame of the given sequence to the chromaticity accumulator.
+
+    Only a single frame is in memory at a time.
+    """
+    colorspace = config().source_colorspace
+    method = config().USER_DIAGRAM_METHOD.get().value
+    samples = config().USER_IMAGE_SAMPLES.get()
+    frame_step = config().USER_SEQUENCE_FRAME_STEP.get()
+
+    if config().USER_SEQUENCE_AGGREGATE.get() == SequenceAggregate.histogram:
+        accumulator = SeriesHistogram(bins=HISTOGRAM_BINS)
+    else:
+        accumulator = SeriesReservoir(max_points=RESERVOIR_MAX_POINTS)
+
+    with open_frame_sequence(
+        user_file.getvalue(), user_file.name, SUPPORTED_EXTENSION
+    ) as sequence:
+        total = max(sequence.count_frames(frame_step), 1)
+        frames = sequence.iter_frames(
+            frame_step=frame_step,
+            stride=samples,
+            budget=get_memory_budget(),
+            timeout=DECODE_TIMEOUT,
+        )
+        for index, frame in enumerate(frames):
+            image = linearize_image(frame, colorspace)
+            accumulator.add(compute_series(image, colorspace, method))
+            # frame count of videos is only an estimation
+            progress_bar.progress(
+                min((index + 1) / total, 1.0),
+                text=f"Processing frame {index + 1}/{total} ...",
+            )
+
+    if not accumulator.count:
+        raise ValueError("No frame could be decoded from the sequence.")
+
+    return accumulator.to_series(label=user_file.name)
+
+
+def create_sequence_picker():
+    create_colorspace_picker()
+
+    user_file = streamlit.file_uploader(
+        label="Video or Zip of Images",
+        type=VIDEO_EXTENSIONS + ARCHIVE_EXTENSIONS,
+        help="A zip archive is read as an image sequence, sorted by file name.",
+        on_change=source_callback(),
+    )
+
+    column1, column2 = streamlit.columns(2)
+
+    with column1:
+        frame_step = streamlit.number_input(
+            label="Frame Step",
+            help="Only process one frame every N.",
+            min_value=1,
+            value=config().USER_SEQUENCE_FRAME_STEP.default,
+            on_change=source_callback(),
+        )
+        config().USER_SEQUENCE_FRAME_STEP.set(frame_step)
+
+    with column2:
+        options = SequenceAggregate.labels()
+        aggregate = streamlit.selectbox(
+            label="Aggregate",
+            options=options,
+            help=(
+                f"How to combine the pixels of all the frames:\n\n"
+                f"- {SequenceAggregate.reservoir.value}: plot up to "
+                f"{RESERVOIR_MAX_POINTS} pixels randomly picked.\n"
+                f"- {SequenceAggregate.histogram.value}: plot a point per area of "
+                f"the diagram, sized by the number of pixels in it."
+            ),
+            index=options.index(config().USER_SEQUENCE_AGGREGATE.default.value),
+            on_change=source_callback(),
+        )
+        config().USER_SEQUENCE_AGGREGATE.set(SequenceAggregate(aggregate))
+
+    if not user_file:
+        config().USER_SEQUENCE_SERIES.set(None)
+        return
+
+    key = (
+        user_file.file_id,
+        frame_step,
+        config().USER_IMAGE_SAMPLES.get(),
+        config().source_colorspace,
+        config().USER_DIAGRAM_METHOD.get().value,
+        config().USER_SEQUENCE_AGGREGATE.get(),
+    )
+
+    progress_bar = streamlit.empty()
+    try:
+        series = PLOT_SERIES_CACHE.get(
+            key,
+            lambda: _compute_sequence_series(user_file, progress_bar),
+        )
+    except Exception as error:
+        streamlit.error(
+            f"Can't read provided sequence {user_file.name}: {_format_error(error)}"
+        )
+        config().USER_SEQUENCE_SERIES.set(None)
+        return
+    finally:
+        progress_bar.empty()
+
+    config().USER_SEQUENCE_SERIES.set(series)
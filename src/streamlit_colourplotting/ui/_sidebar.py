@@ -6,6 +6,7 @@ from streamlit_colourplotting.colorlib import get_available_colorspaces
 from streamlit_colourplotting.ui._config import SourceType
 from streamlit_colourplotting.ui._config import DiagramMethod
 from streamlit_colourplotting.ui._config import MarkerShapeStyle
+from streamlit_colourplotting.ui._config import RasterAggregate
 from streamlit_colourplotting.ui import config
 
 
@@ -28,6 +29,7 @@ def create_colorspace_row(
     with column1:
         use_colorspace = streamlit.checkbox(
             label=f"Use Colorspace {identifier}",
+            key=f"Use Colorspace {identifier}",
             value=identifier == 1,
             label_visibility="collapsed",
             disabled=identifier == 1,
@@ -40,6 +42,7 @@ def create_colorspace_row(
             options = get_available_colorspaces()
             colorspace_name = streamlit.selectbox(
                 label=f"Colorspace {identifier}",
+                key=f"Colorspace {identifier}",
                 options=options,
                 label_visibility="collapsed",
             )
@@ -47,6 +50,7 @@ def create_colorspace_row(
     with column3:
         color = streamlit.color_picker(
             label=f"{identifier} Color",
+            key=f"Colorspace {identifier} Color",
             label_visibility="collapsed",
             value=initial_color,
         )
@@ -85,6 +89,7 @@ def create_style_edit_row(
     with column2:
         color = streamlit.color_picker(
             label=f"{label} Color",
+            key=f"{label} Color",
             label_visibility="collapsed",
             value=initial_color,
         )
@@ -92,6 +97,7 @@ def create_style_edit_row(
         if show_alpha:
             alpha = streamlit.number_input(
                 label=f"{label} Alpha",
+                key=f"{label} Alpha",
                 min_value=0.0,
                 max_value=1.0,
                 value=initial_alpha,
@@ -127,6 +133,7 @@ def create_color_alpha_row(
     with column1:
         widget_color = streamlit.color_picker(
             label=f"{label} Color",
+            key=f"{label} Color",
             label_visibility="collapsed",
             disabled=disable_color,
             value=default_color,
@@ -135,6 +142,7 @@ def create_color_alpha_row(
     with column2:
         widget_alpha = streamlit.number_input(
             label=f"{label} Alpha",
+            key=f"{label} Alpha",
             label_visibility="collapsed",
             min_value=0.0,
             max_value=1.0,
@@ -145,6 +153,13 @@ def create_color_alpha_row(
 
 
 def create_sidebar():
+    """
+    Create the sidebar widgets changing the color source.
+
+    Returns:
+        empty container to create the styling widgets in, see
+        :func:`create_sidebar_style`.
+    """
     streamlit.title("Options".upper())
 
     options = SourceType.labels()
@@ -165,9 +180,49 @@ def create_sidebar():
     )
     config().USER_DIAGRAM_METHOD.set(DiagramMethod(diagram_method))
 
+    style_container = streamlit.container()
+
+    image_samples = streamlit.number_input(
+        label="Image Samples",
+        help="Only plot each pixel every N sample submitted.\n\n"
+        "Higher number increase processing speed of larger images. Enable "
+        "*Fast Rendering* or *Outline Only* to plot less than 10.",
+        min_value=config().min_image_samples,
+        value=config().USER_IMAGE_SAMPLES.default,
+    )
+    config().USER_IMAGE_SAMPLES.set(image_samples)
+
+    return style_container
+
+
+def create_sidebar_style():
+    """
+    Create the sidebar widgets only affecting the look of the plot.
+    """
+    batched = streamlit.toggle(
+        label="Apply Changes Manually",
+        key="styleBatched",
+        help="Group all the changes made below in a single plot update, applied by "
+        "clicking *Apply*.\n\nUseful with large images which take a while to plot.",
+        value=config().USER_STYLE_BATCHED.default,
+    )
+    config().USER_STYLE_BATCHED.set(batched)
+
+    if not batched:
+        create_style_expanders()
+        return
+
+    # widgets are keyed so they keep their value when moved in the form
+    with streamlit.form("styleForm", border=False):
+        create_style_expanders()
+        streamlit.form_submit_button("Apply", type="primary", width="stretch")
+
+
+def create_style_expanders():
     with streamlit.expander("Spectral Locus"):
         show_locus = streamlit.checkbox(
             label="Show Spectral Locus",
+            key="locusShow",
             value=config().USER_LOCUS_SHOW.default,
         )
         config().USER_LOCUS_SHOW.set(show_locus)
@@ -199,6 +254,7 @@ def create_sidebar():
     with streamlit.expander("Pointer's Gamut"):
         show_pointer_gamut = streamlit.checkbox(
             label="Show Pointer's Gamut",
+            key="pointerGamutShow",
             value=config().USER_PLOT_POINTER_GAMUT.default,
         )
         config().USER_PLOT_POINTER_GAMUT.set(show_pointer_gamut)
@@ -211,9 +267,59 @@ def create_sidebar():
         config().USER_POINTER_GAMUT_COLOR.set(pointer_color)
         config().USER_POINTER_GAMUT_ALPHA.set(pointer_alpha)
 
+    with streamlit.expander("Planckian Locus"):
+        show_planckian_locus = streamlit.checkbox(
+            label="Show Planckian Locus",
+            key="planckianLocusShow",
+            value=config().USER_PLOT_PLANCKIAN_LOCUS.default,
+            help="Chromaticity of black body radiators, with their temperature.",
+        )
+        config().USER_PLOT_PLANCKIAN_LOCUS.set(show_planckian_locus)
+
+        planckian_color, planckian_alpha = create_color_alpha_row(
+            label="Planckian Locus",
+            default_color=config().USER_PLANCKIAN_LOCUS_COLOR.default,
+            default_alpha=config().USER_PLANCKIAN_LOCUS_ALPHA.default,
+        )
+        config().USER_PLANCKIAN_LOCUS_COLOR.set(planckian_color)
+        config().USER_PLANCKIAN_LOCUS_ALPHA.set(planckian_alpha)
+
     with streamlit.expander("Markers Styling"):
+        scatter_outline = streamlit.checkbox(
+            label="Outline Only",
+            key="markerOutline",
+            help="Only draw the outline (convex hull) of all the points instead of "
+            "each point.\n\nThe plot is much faster to generate for large images.",
+            value=config().USER_SCATTER_OUTLINE.default,
+        )
+        config().USER_SCATTER_OUTLINE.set(scatter_outline)
+
+        scatter_raster = streamlit.checkbox(
+            label="Fast Rendering",
+            key="markerRaster",
+            help="Draw the markers as squares in an image instead of individual "
+            "shapes.\n\nMillions of points can be plotted in a few seconds, use it "
+            "with a low number of image samples.",
+            value=config().USER_SCATTER_RASTER.default,
+            disabled=scatter_outline,
+        )
+        config().USER_SCATTER_RASTER.set(scatter_raster)
+
+        options = RasterAggregate.labels()
+        raster_aggregate = streamlit.selectbox(
+            label="Overlapping Markers",
+            key="markerRasterAggregate",
+            options=options,
+            help="How the colors of the markers drawn at the same place are combined "
+            "with *Fast Rendering* and RGB marker color.",
+            index=options.index(config().USER_RASTER_AGGREGATE.default.as_label()),
+            disabled=not scatter_raster or scatter_outline,
+        )
+        config().USER_RASTER_AGGREGATE.set(RasterAggregate.from_label(raster_aggregate))
+
         marker_size = streamlit.slider(
             label="Marker Size",
+            key="markerSize",
             min_value=0.0,
             max_value=200.0,
             value=config().USER_SCATTER_SIZE.default,
@@ -236,6 +342,7 @@ def create_sidebar():
         with column2:
             marker_color = streamlit.color_picker(
                 label="Marker Color",
+                key="markerColor",
                 label_visibility="collapsed",
                 disabled=marker_use_rgb,
                 value=config().USER_SCATTER_COLOR.default,
@@ -245,6 +352,7 @@ def create_sidebar():
         with column3:
             marker_alpha = streamlit.number_input(
                 label="Marker Alpha",
+                key="markerAlpha",
                 label_visibility="collapsed",
                 min_value=0.0,
                 max_value=1.0,
@@ -255,6 +363,7 @@ def create_sidebar():
         options = MarkerShapeStyle.labels()
         marker_style = streamlit.selectbox(
             label="Marker Style",
+            key="markerStyle",
             options=options,
             help="Style of the shape of the markers (scatter points).",
             index=options.index(config().USER_MARKER_STYLE.default.as_label()),
@@ -264,6 +373,7 @@ def create_sidebar():
     with streamlit.expander("Colorspaces"):
         show_whitepoints = streamlit.checkbox(
             label="Show Whitepoints",
+            key="whitepointsShow",
             value=config().USER_SHOW_WHITEPOINT.default,
         )
         config().USER_SHOW_WHITEPOINT.set(show_whitepoints)
@@ -286,12 +396,14 @@ def create_sidebar():
     with streamlit.expander("Theming"):
         show_legend = streamlit.checkbox(
             label="Show Legend",
+            key="legendShow",
             value=config().USER_SHOW_LEGEND.default,
         )
         config().USER_SHOW_LEGEND.set(show_legend)
 
         show_axes = streamlit.checkbox(
             label="Show Axes",
+            key="axesShow",
             value=config().USER_SHOW_AXES.default,
         )
         config().USER_SHOW_AXES.set(show_axes)
@@ -300,6 +412,7 @@ def create_sidebar():
 
         figure_size = streamlit.slider(
             label="Figure Size",
+            key="figureSize",
             min_value=1.0,
             max_value=50.0,
             value=25.0,
@@ -310,6 +423,7 @@ def create_sidebar():
 
         font_size = streamlit.slider(
             label="Font Size",
+            key="fontSize",
             min_value=1.0,
             max_value=50.0,
             value=12.0,
@@ -341,6 +455,7 @@ def create_sidebar():
 
         show_grid = streamlit.checkbox(
             label="Show Grid",
+            key="gridShow",
             value=config().USER_SHOW_GRID.default,
         )
         config().USER_SHOW_GRID.set(show_grid)
@@ -356,6 +471,7 @@ def create_sidebar():
     with streamlit.expander("Graph Transform"):
         graph_scale = streamlit.number_input(
             label="Graph Scale",
+            key="graphScale",
             min_value=0.0,
             max_value=100.0,
             step=0.2,
@@ -368,6 +484,7 @@ def create_sidebar():
         with column1:
             graph_offset_x = streamlit.number_input(
                 label="Graph Offset X",
+                key="graphOffsetX",
                 min_value=-100.0,
                 max_value=100.0,
                 step=0.05,
@@ -378,18 +495,10 @@ def create_sidebar():
         with column2:
             graph_offset_y = streamlit.number_input(
                 label="Graph Offset Y",
+                key="graphOffsetY",
                 min_value=-100.0,
                 max_value=100.0,
                 step=0.05,
                 value=config().USER_AXES_OFFSET_Y.default,
             )
             config().USER_AXES_OFFSET_Y.set(graph_offset_y)
-
-    image_samples = streamlit.number_input(
-        label="Image Samples",
-        help="Only plot each pixel every N sample submitted.\n\n"
-        "Higher number increase processing speed of larger images.",
-        min_value=10,
-        value=config().USER_IMAGE_SAMPLES.default,
-    )
-    config().USER_IMAGE_SAMPLES.set(image_samples)
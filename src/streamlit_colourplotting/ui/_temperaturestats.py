@@ -0,0 +1,136 @@
+from typing import Sequence
+
+import numpy
+import streamlit
+
+from streamlit_colourplotting.temperature import CCT_HISTOGRAM_EDGES
+from streamlit_colourplotting.temperature import DUV_HISTOGRAM_EDGES
+from streamlit_colourplotting.temperature import MAX_DUV
+from streamlit_colourplotting.temperature import TemperatureStatistics
+from streamlit_colourplotting.temperature import temperature_statistics_to_json
+
+
+def _create_histogram(
+    statistics: Sequence[TemperatureStatistics],
+    attribute: str,
+    edges: numpy.ndarray,
+    title: str,
+    scale_type: str = "linear",
+):
+    """
+    Create a bar chart of a histogram of each series, overlaid.
+    """
+    import altair
+    import pandas
+
+    data = pandas.concat(
+        [
+            pandas.DataFrame(
+                {
+                    "start": edges[:-1],
+                    "end": edges[1:],
+                    "proportion": getattr(single, attribute),
+                    "source": single.label,
+                }
+            )
+            for single in statistics
+        ]
+    )
+    chart = (
+        altair.Chart(data)
+        .mark_bar(opacity=0.6)
+        .encode(
+            x=altair.X(
+                "start:Q",
+                title=title,
+                scale=altair.Scale(type=scale_type, domain=[edges[0], edges[-1]]),
+            ),
+            x2="end:Q",
+            y=altair.Y("proportion:Q", title="Points", axis=altair.Axis(format="%")),
+            color=altair.Color("source:N", title="Source"),
+            tooltip=[
+                "source",
+                "start",
+                "end",
+                altair.Tooltip("proportion", format=".2%"),
+            ],
+        )
+        .properties(height=250)
+    )
+    streamlit.altair_chart(chart, width="stretch")
+
+
+def create_temperature_statistics(
+    statistics: Sequence[TemperatureStatistics],
+    method: str,
+):
+    """
+    Create a table and histograms of the correlated color temperature of the
+    plotted points.
+
+    Args:
+        statistics: statistics of each plotted series.
+        method: diagram method the plotted points are in.
+    """
+    if not statistics:
+        return
+
+    streamlit.subheader("Color Temperature")
+
+    table = {
+        "Source": [single.label for single in statistics],
+        "Points": [single.points for single in statistics],
+        "Near Locus": [single.near_locus * 100 for single in statistics],
+    }
+    for percentile in statistics[0].CCT_percentiles:
+        name = "Median" if percentile == 50 else f"P{percentile}"
+        table[f"CCT {name}"] = [
+            single.CCT_percentiles[percentile] for single in statistics
+        ]
+    for percentile in statistics[0].Duv_percentiles:
+        name = "Median" if percentile == 50 else f"P{percentile}"
+        table[f"Duv {name}"] = [
+            single.Duv_percentiles[percentile] for single in statistics
+        ]
+
+    streamlit.dataframe(
+        table,
+        hide_index=True,
+        column_config={
+            "Near Locus": streamlit.column_config.NumberColumn(format="%.2f %%"),
+            **{
+                name: streamlit.column_config.NumberColumn(format="%.0f K")
+                for name in table
+                if name.startswith("CCT")
+            },
+            **{
+                name: streamlit.column_config.NumberColumn(format="%.4f")
+                for name in table
+                if name.startswith("Duv")
+            },
+        },
+    )
+    streamlit.caption(
+        "Correlated color temperature (CCT) and distance to the Planckian locus (Duv) "
+        f"of the plotted points closer than {MAX_DUV} to the locus, in CIE 1960 UCS."
+    )
+
+    column1, column2 = streamlit.columns(2)
+    with column1:
+        _create_histogram(
+            statistics,
+            "CCT_histogram",
+            CCT_HISTOGRAM_EDGES,
+            title="CCT (K)",
+            scale_type="log",
+        )
+    with column2:
+        _create_histogram(statistics, "Duv_histogram", DUV_HISTOGRAM_EDGES, "Duv")
+
+    streamlit.download_button(
+        label="Download as JSON",
+        data=temperature_statistics_to_json(statistics, method),
+        file_name="temperature_statistics.json",
+        mime="application/json",
+        key="temperatureStatisticsDownload",
+    )
@@ -0,0 +1,123 @@
+"""
+Warm the process-wide caches in the background so the first user doesn't pay for them.
+
+This include importing colour and matplotlib, building the matplotlib font cache,
+loading the colour matching functions and computing the static diagram layers.
+"""
+
+import dataclasses
+import io
+import logging
+import threading
+import time
+from typing import Optional
+from typing import Sequence
+
+import numpy
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class WarmupReport:
+    """
+    Progress of the warmup, updated by the warmup thread.
+    """
+
+    durations: dict[str, float] = dataclasses.field(default_factory=dict)
+    """
+    time in seconds it took to generate the plot of each diagram method.
+    """
+
+    total_duration: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.total_duration is not None
+
+    def __str__(self) -> str:
+        if self.error:
+            return f"warmup failed: {self.error}"
+        if not self.done:
+            return f"warmup in progress ({len(self.durations)} plots done)"
+        durations = ", ".join(f"{k}={v:.2f}s" for k, v in self.durations.items())
+        return f"warmup done in {self.total_duration:.2f}s ({durations})"
+
+
+_LOCK = threading.Lock()
+_THREAD: Optional[threading.Thread] = None
+_REPORT = WarmupReport()
+
+
+def get_warmup_report() -> WarmupReport:
+    return _REPORT
+
+
+def _warmup(diagram_methods: Sequence[str]):
+    start_time = time.time()
+    try:
+        from streamlit_colourplotting import chromaticity
+        from streamlit_colourplotting import colorlib
+        from streamlit_colourplotting import plotting
+        import matplotlib.pyplot
+
+        colorspace = colorlib.sRGB_COLORSPACE
+        # NOTE: bug with 1976 method, doesn't accept 1x1 array
+        image = numpy.full([2, 2, 3], 0.18)
+
+        for diagram_method in diagram_methods:
+            method_start_time = time.time()
+            settings = plotting.PlotSettings(
+                colorspace=colorspace,
+                diagram_method=diagram_method,
+                figure_colorspaces=((colorspace, "#F44336"),),
+                locus_background=True,
+            )
+            series = chromaticity.compute_series(image, colorspace, diagram_method)
+            figure, _ = plotting.generate_plot([series], settings)
+            # the first draw of a figure is much slower than the next ones
+            figure.savefig(io.BytesIO(), format="png")
+            figure.savefig(io.BytesIO(), format="svg")
+            matplotlib.pyplot.close(figure)
+            _REPORT.durations[diagram_method] = time.time() - method_start_time
+
+        # used by the image preview
+        colorlib.colorspace_to_colorspace(
+            numpy.full([2, 2, 3], 0.18),
+            colorspace,
+            colorspace,
+            colorlib.ChromaticAdaptationTransform.get_default(),
+        )
+
+    except Exception as error:
+        _REPORT.error = str(error)
+        LOGGER.exception(f"error while warming up: {error}")
+        return
+
+    _REPORT.total_duration = time.time() - start_time
+    LOGGER.info(str(_REPORT))
+
+
+def start_warmup(diagram_methods: Sequence[str]) -> threading.Thread:
+    """
+    Start warming the caches in a background thread. Only done once per process,
+    subsequent calls return the already started thread.
+
+    Args:
+        diagram_methods: name of each chromaticity diagram method to warm.
+    """
+    global _THREAD
+
+    with _LOCK:
+        if _THREAD is None:
+            _THREAD = threading.Thread(
+                target=_warmup,
+                args=(tuple(diagram_methods),),
+                name="streamlit_colourplotting.warmup",
+                daemon=True,
+            )
+            _THREAD.start()
+            LOGGER.debug("started warmup thread")
+
+    return _THREAD
@@ -0,0 +1,212 @@
+"""
+Generate plots in a background thread so the streamlit script never waits on them.
+
+Each session own a :class:`PlotWorker`. Every submitted job get a new generation
+number; a job is abandoned as soon as a newer one is submitted, so only the
+latest configuration of the user is ever fully rendered.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import io
+import logging
+import threading
+import time
+import typing
+from typing import Optional
+from typing import Sequence
+
+if typing.TYPE_CHECKING:
+    from streamlit_colourplotting.chromaticity import PlotSeries
+    from streamlit_colourplotting.plotting import PlotSettings
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class PlotResult:
+    """
+    Outcome of a plot job that ran to completion.
+    """
+
+    generation: int
+
+    png: Optional[bytes]
+    """
+    the plot encoded as png, None if the job failed.
+    """
+
+    svg: Optional[bytes]
+    """
+    the plot encoded as svg, None if the job failed.
+    """
+
+    duration: float
+    """
+    time in seconds it took to render the plot.
+    """
+
+    error: Optional[str] = None
+
+
+class _PlotCancelled(Exception):
+    pass
+
+
+@dataclasses.dataclass(frozen=True)
+class _PlotJob:
+    generation: int
+    series: tuple[PlotSeries, ...]
+    settings: PlotSettings
+
+    def is_same(self, series: Sequence[PlotSeries], settings: PlotSettings) -> bool:
+        return (
+            self.settings == settings
+            and len(self.series) == len(series)
+            and all(this.is_same(other) for this, other in zip(self.series, series))
+        )
+
+
+class PlotWorker:
+    """
+    Render the plots of a single session, one at a time, in a background thread.
+
+    The thread is only alive while there is jobs to process.
+    """
+
+    PNG_DPI = 200
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._generation = 0
+        self._last_job: Optional[_PlotJob] = None
+        self._pending_job: Optional[_PlotJob] = None
+        self._result: Optional[PlotResult] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def generation(self) -> int:
+        """
+        Generation of the last submitted job.
+        """
+        return self._generation
+
+    def submit(self, series: Sequence[PlotSeries], settings: PlotSettings) -> int:
+        """
+        Request a new plot, superseding any job not finished yet.
+
+        Submitting the same series and settings as the last job doesn't start a new one.
+
+        Args:
+            series: chromaticities to scatter, see :func:`plotting.generate_plot`.
+            settings: options configuring the look of the graph.
+
+        Returns:
+            generation of the job to render the plot.
+        """
+        with self._condition:
+            if self._last_job is not None and self._last_job.is_same(series, settings):
+                return self._last_job.generation
+
+            self._generation += 1
+            job = _PlotJob(self._generation, tuple(series), settings)
+            self._last_job = job
+            self._pending_job = job
+
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name=f"streamlit_colourplotting.worker.{id(self)}",
+                    daemon=True,
+                )
+                self._thread.start()
+
+            return job.generation
+
+    def is_done(self, generation: int) -> bool:
+        """
+        True if the given or a newer generation has finished rendering.
+        """
+        result = self._result
+        return result is not None and result.generation >= generation
+
+    def get_result(self) -> Optional[PlotResult]:
+        """
+        Latest completed plot, might be older than the last submitted job.
+        """
+        return self._result
+
+    def wait(self, generation: int, timeout: float) -> Optional[PlotResult]:
+        """
+        Block until the given generation finished rendering or the timeout expired.
+
+        Returns:
+            latest completed plot, which might be older than the requested generation.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.is_done(generation), timeout)
+            return self._result
+
+    def _check_cancelled(self, job: _PlotJob):
+        if job.generation != self._generation:
+            raise _PlotCancelled()
+
+    def _render(self, job: _PlotJob) -> PlotResult:
+        from streamlit_colourplotting import plotting
+        import matplotlib.pyplot
+
+        start_time = time.time()
+        self._check_cancelled(job)
+
+        with plotting.RENDER_LOCK:
+            # another job might have been submitted while we waited for the lock
+            self._check_cancelled(job)
+            figure, _ = plotting.generate_plot(job.series, job.settings)
+            try:
+                # savefig can read the global rcParams so keep it locked
+                self._check_cancelled(job)
+                png_file = io.BytesIO()
+                figure.savefig(
+                    png_file, format="png", dpi=self.PNG_DPI, bbox_inches="tight"
+                )
+                self._check_cancelled(job)
+                svg_file = io.BytesIO()
+                figure.savefig(svg_file, format="svg")
+            finally:
+                matplotlib.pyplot.close(figure)
+
+        return PlotResult(
+            generation=job.generation,
+            png=png_file.getvalue(),
+            svg=svg_file.getvalue(),
+            duration=time.time() - start_time,
+        )
+
+    def _run(self):
+        while True:
+            with self._condition:
+                job = self._pending_job
+                self._pending_job = None
+                if job is None:
+                    self._thread = None
+                    return
+
+            try:
+                result = self._render(job)
+            except _PlotCancelled:
+                LOGGER.debug(f"plot generation {job.generation} cancelled")
+                continue
+            except Exception as error:
+                LOGGER.exception(f"error while generating plot: {error}")
+                result = PlotResult(job.generation, None, None, 0.0, error=str(error))
+
+            with self._condition:
+                # even if superseded, a finished plot is still closer to what the
+                # user wants than the one currently displayed.
+                if self._result is None or job.generation > self._result.generation:
+                    self._result = result
+                LOGGER.debug(
+                    f"plot generation {job.generation} done in {result.duration:.3f}s"
+                )
+                self._condition.notify_all()